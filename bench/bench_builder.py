@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# Micro-benchmark: time to build a tagged money cell, as made by
+# IxbrlReporter.create_tagged_money_fact, with objectify.ElementMaker and
+# with the etree builder.  Each is timed with the same namespace maps,
+# built once: the document's, which declares the taxonomy namespaces as
+# well as the iXBRL ones, and each element's own namespace, as documents
+# are built (see BasicElement.add_makers).
+#
+#     python3 bench/bench_builder.py
+
+import timeit
+
+from lxml import objectify, etree
+
+from ixbrl_reporter.builder import ElementMaker
+
+xhtml_ns = "http://www.w3.org/1999/xhtml"
+ix_ns = "http://www.xbrl.org/2013/inlineXBRL"
+
+nsmap = {None: xhtml_ns, "ix": ix_ns}
+for i in range(20):
+    nsmap["ns%d" % i] = "http://example.com/taxonomy/ns%d" % i
+
+nsmaps = {
+    "document namespaces": (nsmap, nsmap),
+    "own namespace": ({None: xhtml_ns}, {"ix": ix_ns}),
+}
+
+def cell(xhtml_maker, ix_maker):
+
+    elt = ix_maker.nonFraction("1,234")
+    elt.set("name", "uk-core:Turnover")
+    elt.set("contextRef", "ctxt-1")
+    elt.set("format", "ixt2:numdotdecimal")
+    elt.set("unitRef", "GBP")
+    elt.set("decimals", "0")
+    elt.set("scale", "0")
+
+    span = xhtml_maker.span()
+    span.append(xhtml_maker.span("( "))
+    span.append(elt)
+    span.append(xhtml_maker.span(" )"))
+    return span
+
+def time_cell(xhtml_maker, ix_maker):
+    t = min(timeit.repeat(
+        lambda: cell(xhtml_maker, ix_maker), number=count, repeat=5
+    ))
+    return t / count * 1e6
+
+count = 20000
+
+for desc, (xhtml_nsmap, ix_nsmap) in nsmaps.items():
+
+    objectify_t = time_cell(
+        objectify.ElementMaker(annotate=False, namespace=xhtml_ns,
+                               nsmap=xhtml_nsmap),
+        objectify.ElementMaker(annotate=False, namespace=ix_ns,
+                               nsmap=ix_nsmap),
+    )
+    builder_t = time_cell(
+        ElementMaker(xhtml_ns, nsmap=xhtml_nsmap),
+        ElementMaker(ix_ns, nsmap=ix_nsmap),
+    )
+
+    print(desc)
+    print("  %-10s %6.2f us/cell" % ("objectify", objectify_t))
+    print("  %-10s %6.2f us/cell" % ("builder", builder_t))
+    print("  speed-up   %6.1fx" % (objectify_t / builder_t))
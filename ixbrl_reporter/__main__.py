@@ -1,23 +1,77 @@
 import sys
+import os
+import io
 
 from ixbrl_reporter.config import Config
 import ixbrl_reporter.accounts as accounts
-from ixbrl_reporter.taxonomy import Taxonomy
+from ixbrl_reporter.taxonomy import Taxonomy, TaxonomyModel
 from ixbrl_reporter.data_source import DataSource
+from ixbrl_reporter.output import get_sink, is_package, FileSink
 
 try:
     from importlib.metadata import version
 except ImportError:
     from importlib_metadata import version # type: ignore
 
+# Output formats: the element method which writes each, the end of the
+# file name used when writing to an output directory, and whether the
+# method writes text rather than a serialised document.
+formats = {
+    "ixbrl": ("to_ixbrl", ".xhtml", False),
+    "ixbrl-stream": ("to_ixbrl_stream", "-stream.xhtml", False),
+    "html": ("to_html", ".html", False),
+    "text": ("to_text", ".txt", True),
+    "debug": ("to_debug", ".debug", True),
+}
+
+# Formats which can be written to a report package, which holds an iXBRL
+# report.
+package_formats = {"ixbrl", "ixbrl-stream"}
+
+# Writes a report to a binary stream.  Text is written as UTF-8.
+def write_report(elt, fmt, tx, out):
+
+    method, ext, text = formats[fmt]
+
+    if text:
+        out = io.TextIOWrapper(out, encoding="utf-8")
+        getattr(elt, method)(tx, out)
+        out.detach()
+    else:
+        getattr(elt, method)(tx, out)
+
 
 def main():
     if len(sys.argv) < 4:
         sys.stderr.write("Usage:\n")
         sys.stderr.write("\tixbrl-reporter <config> <report> <format>\n")
+        sys.stderr.write(
+            "\tixbrl-reporter <config> <report> <format> <output-file>\n"
+        )
+        sys.stderr.write(
+            "\tixbrl-reporter <config> <report> <format>,... <output-dir>\n"
+        )
+        sys.stderr.write(
+            "\tixbrl-reporter <config> explain <computation> <period>\n"
+        )
+        sys.stderr.write(
+            "\tixbrl-reporter compile-taxonomy <taxonomy> <output>\n"
+        )
+        sys.exit(1)
+
+    if sys.argv[2] == "explain" and len(sys.argv) < 5:
+        sys.stderr.write("Usage:\n")
+        sys.stderr.write(
+            "\tixbrl-reporter <config> explain <computation> <period>\n"
+        )
         sys.exit(1)
 
     try:
+
+        if sys.argv[1] == "compile-taxonomy":
+            Taxonomy.compile(sys.argv[2], sys.argv[3])
+            return
+
         cfg = Config.load(sys.argv[1])
         cfg.set("internal.software-name", "ixbrl-reporter")
         
@@ -28,33 +82,79 @@ def main():
         cfg.set("internal.software-version", pkg_version)
 
         kind = cfg.get("accounts.kind")
-        file = cfg.get("accounts.file")
 
-        cls = accounts.get_class(kind)
-        session = cls(file)
+        if kind == "union":
+            cls = accounts.get_class(kind)
+            session = cls(cfg.get("accounts.sources"))
+        else:
+            file = cfg.get("accounts.file")
+            cls = accounts.get_class(kind)
+            session = cls(file)
 
         d = DataSource(cfg, session)
 
+        if sys.argv[2] == "explain":
+            d.enable_provenance()
+            d.explain(sys.argv[3], d.get_period(sys.argv[4]), sys.stdout)
+            return
+
+        fmts = sys.argv[3].split(",")
+
+        for fmt in fmts:
+            if fmt not in formats:
+                raise RuntimeError("Output type '%s' not known." % fmt)
+
+        if len(fmts) > 1 and len(sys.argv) < 5:
+            raise RuntimeError("Several output types need an output directory")
+
+        if len(set(fmts)) < len(fmts):
+            raise RuntimeError("Output types should only be given once")
+
         elt = d.get_element(sys.argv[2])
 
-        if sys.argv[3] == "ixbrl":
-            tx_cfg = cfg.get("report.taxonomy")
-            tx = Taxonomy(tx_cfg, d)
-            elt.to_ixbrl(tx, sys.stdout)
-        elif sys.argv[3] == "html":
-            tx_cfg = cfg.get("report.taxonomy")
-            tx = Taxonomy(tx_cfg, d)
-            elt.to_html(tx, sys.stdout)
-        elif sys.argv[3] == "text":
-            tx_cfg = cfg.get("report.taxonomy")
+        tx_cfg = cfg.get("report.taxonomy")
+
+        # Documents are written as serialised, to the bytes underneath
+        # standard output.
+        if len(sys.argv) < 5:
             tx = Taxonomy(tx_cfg, d)
-            elt.to_text(tx, sys.stdout)
-        elif sys.argv[3] == "debug":
-            tx_cfg = cfg.get("report.taxonomy")
+            sys.stdout.flush()
+            write_report(elt, fmts[0], tx, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            return
+
+        output = sys.argv[4]
+
+        # One format, to a file.  The extension selects compression or
+        # packaging.
+        if len(fmts) == 1 and not os.path.isdir(output):
+            if is_package(output) and fmts[0] not in package_formats:
+                raise RuntimeError(
+                    "Only iXBRL output can be written to a report package, "
+                    "not %s" % fmts[0]
+                )
             tx = Taxonomy(tx_cfg, d)
-            elt.to_debug(tx, sys.stdout)
-        else:
-            raise RuntimeError("Output type '%s' not known." % sys.argv[3])
+            with get_sink(output).open() as out:
+                write_report(elt, fmts[0], tx, out)
+            return
+
+        # Each format is rendered from the same element, so computations
+        # are only done once.  Each gets its own taxonomy document, sharing
+        # the taxonomy configuration.
+        if not isinstance(get_sink(output), FileSink):
+            raise RuntimeError(
+                "Several output types are written to a directory, "
+                "not to %s" % output
+            )
+
+        os.makedirs(output, exist_ok=True)
+
+        model = TaxonomyModel(tx_cfg)
+
+        for fmt in fmts:
+            path = os.path.join(output, sys.argv[2] + formats[fmt][1])
+            with FileSink(path).open() as out:
+                write_report(elt, fmt, model.document(d), out)
 
     except Exception as e:
         sys.stderr.write("Exception: %s\n" % str(e))
@@ -9,6 +9,12 @@ def get_class(kind):
     elif kind == "csv":
         import ixbrl_reporter.accounts_csv as a
         return a.Accounts
+    elif kind == "trial-balance":
+        import ixbrl_reporter.accounts_trial_balance as a
+        return a.Accounts
+    elif kind == "union":
+        import ixbrl_reporter.accounts_union as a
+        return a.Accounts
     else:
         raise RuntimeError("Accounts kind '%s' not known" % kind)
 
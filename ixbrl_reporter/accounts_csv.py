@@ -1,6 +1,7 @@
 
 import csv
 import datetime
+from . splits import Splits, SplitCache
 
 # Wrapper for CSV accounts.
 class Accounts:
@@ -10,6 +11,7 @@ class Accounts:
     def __init__(self, file):
 
         self.transactions = []
+        self.split_cache = SplitCache()
         tx = {}
 
         with open(file) as f:
@@ -27,6 +29,8 @@ class Accounts:
                     tx = {
                         "id": row["Transaction ID"],
                         "description": row["Description"],
+                        "number": row.get("Number", ""),
+                        "notes": row.get("Notes", ""),
                         "date": dt,
                         "splits": {}
                     }
@@ -35,7 +39,10 @@ class Accounts:
                 amt = row["Amount Num."]
                 amt = amt.replace(",", "")
 
-                tx["splits"][acct] = float(amt)
+                tx["splits"][acct] = {
+                    "amount": float(amt),
+                    "memo": row.get("Memo", "")
+                }
 
         if tx: self.transactions.append(tx)
 
@@ -46,10 +53,17 @@ class Accounts:
         pass
 
     # Given a root account and start/end points return all matching splits
-    # recorded against that account and any child accounts.
+    # recorded against that account and any child accounts.  Results are
+    # remembered, the same query from several computations is one scan.
+    # Callers must not modify the returned list.
     def get_splits(self, acct, start, end, endinclusive=True):
 
-        splits = []
+        key = (acct, start, end, endinclusive)
+        splits = self.split_cache.get(key)
+        if splits is not None:
+            return splits
+
+        splits = Splits()
 
         for tx in self.transactions:
 
@@ -68,12 +82,18 @@ class Accounts:
                         inperiod = True
 
                     if inperiod:
+                        spl = tx["splits"][ac]
                         splits.append({
                             "date": dt,
-                            "amount": tx["splits"][ac],
-                            "description": tx["description"]
+                            "amount": spl["amount"],
+                            "description": tx["description"],
+                            "memo": spl["memo"],
+                            "number": tx["number"],
+                            "notes": tx["notes"]
                         })
 
+        self.split_cache.put(key, splits)
+
         return splits
 
     # Return an account given an account locator.  Navigates through
@@ -13,6 +13,7 @@
 import gnucash
 import json
 import math
+from . splits import Splits, SplitCache
 
 # Wrapper for GnuCash accounts.
 class Accounts:
@@ -28,6 +29,7 @@ class Accounts:
             self.session = self.open_session_rw(file)
         self.book = self.session.book
         self.root = self.book.get_root_account()
+        self.split_cache = SplitCache()
 
     def __del__(self):
         if self.session != None:
@@ -50,10 +52,17 @@ class Accounts:
         return session
 
     # Given a root account and start/end points return all matching splits
-    # recorded against that account and any child accounts.
+    # recorded against that account and any child accounts.  Results are
+    # remembered, the same query from several computations is one scan.
+    # Callers must not modify the returned list.
     def get_splits(self, acct, start, end, endinclusive=True):
 
-        splits = []
+        key = (acct.get_full_name(), start, end, endinclusive)
+        splits = self.split_cache.get(key)
+        if splits is not None:
+            return splits
+
+        splits = Splits()
 
         # Recurse into children
         childs = acct.get_children()
@@ -79,10 +88,15 @@ class Accounts:
                     {
                         "date": dt,
                         "amount": spl.GetAmount().to_double(),
-                        "description": tx.GetDescription()
+                        "description": tx.GetDescription(),
+                        "memo": spl.GetMemo(),
+                        "number": tx.GetNum(),
+                        "notes": tx.GetNotes()
                     }
                 )
 
+        self.split_cache.put(key, splits)
+
         return splits
 
     # Return an account given an account locator.  Navigates through
@@ -14,6 +14,7 @@ import warnings
 import piecash
 import json
 import math
+from . splits import Splits, SplitCache
 from datetime import datetime
 
 # Wrapper for GnuCash accounts.
@@ -24,7 +25,12 @@ class Accounts:
     def __init__(self, file, rw=False):
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore", message="relationship '.*' will copy column")
-            self.book = piecash.open_book(file, readonly=not rw)
+            # The book may be opened on a worker thread by the union
+            # backend, and used from the main thread after that.
+            self.book = piecash.open_book(
+                file, readonly=not rw, check_same_thread=False
+            )
+        self.split_cache = SplitCache()
 
     def __del__(self):
         pass
@@ -34,9 +40,17 @@ class Accounts:
         # self.session.save()
 
     # Given a root account and start/end points return all matching splits
-    # recorded against that account and any child accounts.
+    # recorded against that account and any child accounts.  Results are
+    # remembered, the same query from several computations is one scan.
+    # Callers must not modify the returned list.
     def get_splits(self, acct, start, end, endinclusive=True):
-        splits = []
+
+        key = (acct.guid, start, end, endinclusive)
+        splits = self.split_cache.get(key)
+        if splits is not None:
+            return splits
+
+        splits = Splits()
         # Get GBP commodity
         gbp = next(c for c in self.book.commodities if c.mnemonic == "GBP")
 
@@ -80,10 +94,15 @@ class Accounts:
                     {
                         "date": dt,
                         "amount": amount,
-                        "description": tx.description
+                        "description": tx.description,
+                        "memo": spl.memo,
+                        "number": tx.num,
+                        "notes": tx.notes
                     }
                 )
 
+        self.split_cache.put(key, splits)
+
         return splits
 
     # Return an account given an account locator.  Navigates through
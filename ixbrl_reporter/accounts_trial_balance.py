@@ -0,0 +1,211 @@
+
+# Trial balance accounts.  Rather than transactions, the file has the
+# opening balance and movement of each account for each period:
+#
+#     Account,Start,End,Opening,Movement
+#     Income:Sales,2020-01-01,2020-12-31,0,-24000.00
+#     Assets:Bank,2020-01-01,2020-12-31,1200.00,3400.00
+#
+# Amounts have the same sign as splits in a ledger, so income and
+# liabilities are negative.  An account missing from a period had no
+# movement in it.  A period's opening balance must agree with the closing
+# balance of the period before, where the file has one.  An optional Type
+# column gives the account type (INCOME, EXPENSE, ASSET, ...); a parent
+# account has the type its typed children agree on.  Otherwise the type is
+# guessed from the account name as for CSV accounts.
+#
+# A query for splits in a date range is answered with one split holding
+# the change in balance across the range, so the range must start the day
+# after a period boundary (or at the beginning of time) and end on one.
+# There are no transactions, so Line filters can't be used.
+
+import csv
+import datetime
+
+DAY = datetime.timedelta(days=1)
+
+# Balances which differ by less than this agree.
+TOLERANCE = 0.005
+
+class Accounts:
+
+    def __init__(self, file):
+
+        # Account name -> {date: balance at end of that date}
+        self.balances = {}
+
+        # Every period boundary in the file, balances are known for these.
+        self.dates = set()
+
+        # Account name -> type, where the file says.
+        self.types = {}
+
+        with open(file) as f:
+
+            c = csv.DictReader(f)
+            for row in c:
+
+                acct = row["Account"]
+                start = datetime.date.fromisoformat(row["Start"])
+                end = datetime.date.fromisoformat(row["End"])
+                opening = float(row["Opening"].replace(",", ""))
+                movement = float(row["Movement"].replace(",", ""))
+
+                if acct not in self.balances:
+                    self.balances[acct] = {}
+
+                self.set_balance(acct, start - DAY, opening)
+                self.set_balance(acct, end, opening + movement)
+
+                self.dates.add(start - DAY)
+                self.dates.add(end)
+
+                if row.get("Type"):
+                    self.types[acct] = row["Type"].upper()
+
+        if len(self.dates) == 0:
+            raise RuntimeError("Trial balance %s has no balances" % file)
+
+        # Parent accounts take the type their typed children agree on.
+        parent_types = {}
+        for acct, typ in self.types.items():
+            parts = acct.split(":")
+            for i in range(1, len(parts)):
+                parent_types.setdefault(":".join(parts[:i]), set()).add(typ)
+
+        for acct, types in parent_types.items():
+            if acct not in self.types and len(types) == 1:
+                self.types[acct] = types.pop()
+
+        self.first = min(self.dates)
+
+        # Account name -> {date: balance of it and its children}, for
+        # every account and parent account at every period boundary, so a
+        # query is a look-up.
+        self.totals = {}
+
+        dates = sorted(self.dates)
+
+        for name, bals in self.balances.items():
+
+            parts = name.split(":")
+            parents = [
+                self.totals.setdefault(":".join(parts[:i]), {})
+                for i in range(1, len(parts) + 1)
+            ]
+
+            # An account not in a period carries its balance forward.
+            bal = 0.0
+            for dt in dates:
+                bal = bals.get(dt, bal)
+                for totals in parents:
+                    totals[dt] = totals.get(dt, 0.0) + bal
+
+    def __del__(self):
+        pass
+
+    # Balances for the same account and date, from a closing balance and
+    # the next period's opening balance, must agree.
+    def set_balance(self, acct, dt, bal):
+
+        bals = self.balances[acct]
+
+        if dt in bals and abs(bals[dt] - bal) >= TOLERANCE:
+            raise RuntimeError(
+                "Trial balance for %s has balances %.2f and %.2f at %s" % (
+                    acct, bals[dt], bal, dt
+                )
+            )
+
+        bals[dt] = bal
+
+    def save(self):
+        pass
+
+    # Balance of an account and its children at the end of a date.
+    def get_balance(self, acct, dt):
+
+        # Before the first period, nothing has happened.
+        if dt < self.first:
+            return 0.0
+
+        if dt not in self.dates:
+            raise RuntimeError(
+                "Trial balance has no balances at %s" % dt
+            )
+
+        if acct not in self.totals:
+            return 0.0
+
+        return self.totals[acct][dt]
+
+    # Given a root account and start/end points, return a single split
+    # holding the change in balance of the account and its child accounts.
+    def get_splits(self, acct, start, end, endinclusive=True):
+
+        if not endinclusive:
+            end = end - DAY
+
+        amount = self.get_balance(acct, end) - \
+            self.get_balance(acct, start - DAY)
+
+        return [{
+            "date": end,
+            "amount": amount,
+            "description": "Trial balance",
+            "memo": "",
+            "number": "",
+            "notes": "",
+            "balance": True
+        }]
+
+    # Return an account given an account locator.  Navigates through
+    # hierarchy, account parts are colon separated.
+    def get_account(self, par, locator):
+
+        if par == None: return locator
+
+        return par + ":" + locator
+
+    def get_accounts(self, acct=None, pfx=""):
+
+        if acct == None: acct = ""
+
+        return [
+            pfx + k for k in self.balances.keys() if k.startswith(acct)
+        ]
+
+    def is_debit(self, acct):
+        if acct in self.types:
+            return self.types[acct] in ("INCOME", "EQUITY", "EXPENSE")
+        if acct.startswith("Income"): return True
+        if acct.startswith("Equity"): return True
+        if acct.startswith("Expense"): return True
+        return False
+
+    def get_vendor(self, id):
+        raise RuntimeError("Not implemented")
+
+    def get_vendors(self):
+        raise RuntimeError("Not implemented")
+
+    def create_vendor(self, id, currency, name):
+        raise RuntimeError("Not implemented")
+
+    def get_currency(self, mn):
+        raise RuntimeError("Not implemented")
+
+    def next_bill_id(self, vendor):
+        raise RuntimeError("Not implemented")
+
+    def create_bill(self, id, currency, vendor, date_opened):
+        raise RuntimeError("Not implemented")
+
+    def create_bill_entry(self, bill, date_opened):
+        raise RuntimeError("Not implemented")
+
+    def get_vat_vendor(self):
+        raise RuntimeError("Not implemented")
+
+    def post_vat_bill(self, billing_id, bill_date, due_date, vat, notes, memo):
+        raise RuntimeError("Not implemented")
@@ -0,0 +1,161 @@
+
+# Union of several account sources, presented as one set of accounts.
+# e.g. a GnuCash book plus CSV exports of supplementary journals:
+#
+#     accounts:
+#       kind: union
+#       sources:
+#       - kind: piecash
+#         file: main.gnucash
+#       - kind: csv
+#         file: payroll.csv
+#
+# Sources are loaded in parallel on a thread pool, so opening the accounts
+# takes as long as the slowest source rather than the sum of all of them.
+# Account names are merged: an account is the union of the accounts with
+# that name in each source, and its splits are the splits from each.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import ixbrl_reporter.accounts as accounts
+from . splits import Splits, SplitCache
+
+# An account in the union, with the matching account of each source which
+# has one.
+class Account:
+    def __init__(self, name, members):
+        self.name = name
+        self.members = members
+    def __repr__(self):
+        return "Account({0})".format(self.name)
+
+class Source:
+
+    def __init__(self, session):
+
+        self.session = session
+
+        # Names of all accounts, and their parents.  Some backends only
+        # list accounts which have transactions.
+        self.names = set()
+        for name in session.get_accounts():
+            parts = name.split(":")
+            for i in range(len(parts)):
+                self.names.add(":".join(parts[:i + 1]))
+
+    @staticmethod
+    def load(cfg):
+
+        kind = cfg.get("kind")
+        if kind == "union":
+            raise RuntimeError("Accounts kind 'union' can't be a union source")
+
+        cls = accounts.get_class(kind)
+        return Source(cls(cfg.get("file")))
+
+class Accounts:
+
+    # Opens each of a list of sources, each with kind and file.
+    def __init__(self, sources):
+
+        if not sources:
+            raise RuntimeError("Union accounts need at least one source")
+
+        with ThreadPoolExecutor(max_workers=len(sources)) as ex:
+            futures = [ex.submit(Source.load, src) for src in sources]
+            self.sources = [f.result() for f in futures]
+
+        self.split_cache = SplitCache()
+
+    def __del__(self):
+        pass
+
+    def save(self):
+        pass
+
+    # Given a root account and start/end points return all matching splits
+    # recorded against that account and any child accounts, from every
+    # source.  Results are remembered, callers must not modify the
+    # returned list.
+    def get_splits(self, acct, start, end, endinclusive=True):
+
+        key = (acct.name, start, end, endinclusive)
+        splits = self.split_cache.get(key)
+        if splits is not None:
+            return splits
+
+        splits = Splits()
+        for src, ac in acct.members:
+            splits.extend(src.session.get_splits(ac, start, end, endinclusive))
+
+        self.split_cache.put(key, splits)
+
+        return splits
+
+    # Return an account given an account locator.  Navigates through
+    # hierarchy, account parts are colon separated.
+    def get_account(self, par, locator):
+
+        if par == None:
+            name = locator
+        else:
+            name = par.name + ":" + locator
+
+        members = [
+            (src, src.session.get_account(None, name))
+            for src in self.sources
+            if name in src.names
+        ]
+
+        if len(members) == 0:
+            raise RuntimeError("Can't locate account '%s'" % name)
+
+        return Account(name, members)
+
+    def get_accounts(self, acct=None, pfx=""):
+
+        names = set()
+        for src in self.sources:
+            names.update(src.names)
+
+        if acct == None:
+            return [pfx + n for n in sorted(names)]
+
+        under = acct.name + ":"
+
+        return [
+            pfx + n[len(under):] for n in sorted(names) if n.startswith(under)
+        ]
+
+    # Sources should agree on account types, the first source with the
+    # account decides.
+    def is_debit(self, acct):
+        src, ac = acct.members[0]
+        return src.session.is_debit(ac)
+
+    def get_vendor(self, id):
+        raise RuntimeError("Not implemented")
+
+    def get_vendors(self):
+        raise RuntimeError("Not implemented")
+
+    def create_vendor(self, id, currency, name):
+        raise RuntimeError("Not implemented")
+
+    def get_currency(self, mn):
+        raise RuntimeError("Not implemented")
+
+    def next_bill_id(self, vendor):
+        raise RuntimeError("Not implemented")
+
+    def create_bill(self, id, currency, vendor, date_opened):
+        raise RuntimeError("Not implemented")
+
+    def create_bill_entry(self, bill, date_opened):
+        raise RuntimeError("Not implemented")
+
+    def get_vat_vendor(self):
+        raise RuntimeError("Not implemented")
+
+    def post_vat_bill(self, billing_id, bill_date, due_date, vat, notes, memo):
+        raise RuntimeError("Not implemented")
@@ -12,14 +12,27 @@ link_ns = "http://www.xbrl.org/2003/linkbase"
 xbrli_ns = "http://www.xbrl.org/2003/instance"
 xbrldi_ns = "http://xbrl.org/2006/xbrldi"
 
-from lxml import objectify, etree
+from lxml import etree
 
 import json
+import copy
+import sys
+import tempfile
+import contextlib
+from collections import namedtuple
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from . computation import create_uuid
+from . builder import ElementMaker
+
+# The parts of the ix:header which are filled in.
+Header = namedtuple("Header", ["hidden", "references", "resources"])
 
 class BasicElement:
 
+    # Facts are tagged, except when rendering HTML.
+    tag_facts = True
+
     def __init__(self, id, data):
         if id:
             self.id = id
@@ -31,85 +44,60 @@ class BasicElement:
 
         style_text = self.data.get_config("report.style")
 
-        elt.append(
-            self.xhtml_maker.style(style_text)
-        )
+        style = self.xhtml_maker.style(style_text)
+        style.set("type", "text/css")
 
-        elt.style.set("type", "text/css")
+        elt.append(style)
 
     def to_html(self, taxonomy, out):
 
-        # Make the HTML by removing the iXBRL stuff from the iXBRL document.
+        html = self.to_html_tree(taxonomy)
 
-        # Get the iXBRL doc.
-        html = self.to_ixbrl_tree(taxonomy)
+        self.write_doc(html, out)
 
-        # Deep copies the tree, converts all the ix: elements to span elements
-        def walk(elt, level=0):
-            ns = elt.nsmap[elt.prefix]
+    # Makes HTML using the same elements as the iXBRL document, but with
+    # facts rendered as plain spans.  There is no iXBRL header, so no
+    # contexts, units or hidden metadata.
+    def to_html_tree(self, taxonomy):
 
-            if ns == ix_ns:
+        self.init_html(taxonomy)
 
-                if elt.tag == "{%s}header" % ix_ns:
-                    return self.xhtml_maker.span("")
+        self.tag_facts = False
 
-                elt2 = self.xhtml_maker.span(elt.text)
+        self.head = self.xhtml_maker.head()
 
-            else:
-                elt2 = self.xhtml_maker(elt.tag, elt.text)
-                for k in elt.keys():
-                    elt2.set(k, elt.attrib[k])
-            for v in elt.iterchildren():
-                elt2.append(walk(v, level + 1))
-            return elt2
-
-        # Remove ix elements.
-        html = walk(html)
-    
-        if self.data.get_config_bool("pretty-print",
-                                     mandatory=False):
-            out.write(etree.tostring(
-                html, pretty_print=True, xml_declaration=True
-            ).decode("utf-8"))
-        else:
-            out.write(etree.tostring(
-                html, xml_declaration=True
-            ).decode("utf-8"))
+        # Where the iXBRL header would be.
+        self.hidden = self.xhtml_maker.div(
+            {"class": "hidden"}, self.xhtml_maker.span("")
+        )
 
-    def add_makers(self, nsmap):
+        self.body = self.xhtml_maker.body(self.hidden)
 
-        xhtml_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=xhtml_ns,
-            nsmap=nsmap,
-        )
+        self.html = self.xhtml_maker.html(self.head, self.body)
 
-        self.xhtml_maker = xhtml_maker
+        self.create_head()
 
-        self.ix_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=ix_ns,
-        )
+        report = self.xhtml_maker.div({"id": "report", "class": "report"})
+        self.body.append(report)
 
-        self.xlink_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=xlink_ns,
-        )
+        elts = self.to_ixbrl_elt(self, taxonomy)
+        for elt in elts:
+            report.append(elt)
 
-        self.link_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=link_ns,
-        )
+        return self.html
 
-        self.xbrli_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=xbrli_ns,
-        )
+    def add_makers(self, nsmap):
 
-        self.xbrldi_maker = objectify.ElementMaker(
-            annotate=False,
-            namespace=xbrldi_ns,
-        )
+        # The document root declares every namespace, so other elements
+        # only need their own.
+        self.root_maker = ElementMaker(xhtml_ns, nsmap=nsmap)
+
+        self.xhtml_maker = ElementMaker(xhtml_ns)
+        self.ix_maker = ElementMaker(ix_ns, "ix")
+        self.xlink_maker = ElementMaker(xlink_ns, "xlink")
+        self.link_maker = ElementMaker(link_ns, "link")
+        self.xbrli_maker = ElementMaker(xbrli_ns, "xbrli")
+        self.xbrldi_maker = ElementMaker(xbrldi_ns, "xbrldi")
 
     def init_html(self, taxonomy):
 
@@ -133,38 +121,32 @@ class BasicElement:
 
         self.add_makers(self.nsmap)
         
-    def to_ixbrl_tree(self, taxonomy):
+    # Creates the outline of the document, up to the header holding
+    # metadata and schema references.
+    def create_header(self, taxonomy):
+
+        self.header = Header(
+            self.ix_maker.hidden(),
+            self.ix_maker.references(),
+            self.ix_maker.resources(),
+        )
 
-        self.init_html(taxonomy)
+        self.head = self.xhtml_maker.head()
 
-        self.html = self.xhtml_maker.html(
-            self.xhtml_maker.head(),
-            self.xhtml_maker.body(
-                self.xhtml_maker.div(
-                    {"class": "hidden"},
-                    self.ix_maker.header(
-                        self.ix_maker.hidden(),
-                        self.ix_maker.references(),
-                        self.ix_maker.resources(),
-                    ),
-                ),
+        self.hidden = self.xhtml_maker.div(
+            {"class": "hidden"},
+            self.ix_maker.header(
+                self.header.hidden,
+                self.header.references,
+                self.header.resources,
             ),
         )
 
-        def add_title(val):
-            self.html.head.append(
-                self.xhtml_maker.title(val)
-            )
-
-        self.data.get_config("report.title").use(add_title)
-
-        self.add_style(self.html.head)
+        self.body = self.xhtml_maker.body(self.hidden)
 
-        header_op = objectify.ObjectPath(".body.div.{%s}header" % (
-            ix_ns
-        ))
+        self.html = self.root_maker.html(self.head, self.body)
 
-        self.header = header_op(self.html)
+        self.create_head()
 
         # This creates some contexts, hence do this first.
         self.create_metadata(self.ix_maker, taxonomy)
@@ -176,15 +158,18 @@ class BasicElement:
             schema.set("{%s}href" % xlink_ns, url)
             self.header.references.append(schema)
 
-        report = self.xhtml_maker.div({"id": "report", "class": "report"})
-        self.html.body.append(report)
+    def create_head(self):
 
-        elts = self.to_ixbrl_elt(self, taxonomy)
-        for elt in elts:
-            report.append(elt)
+        def add_title(val):
+            self.head.append(
+                self.xhtml_maker.title(val)
+            )
 
-        # Contexts get created above, hence do this last.
-        self.create_contexts(taxonomy)
+        self.data.get_config("report.title").use(add_title)
+
+        self.add_style(self.head)
+
+    def create_units(self):
 
         currency = self.data.get_config("metadata.accounting.currency")
 
@@ -200,24 +185,247 @@ class BasicElement:
         )
         self.header.resources.append(unit)
 
+    def to_ixbrl_tree(self, taxonomy):
+
+        self.init_html(taxonomy)
+
+        self.tag_facts = True
+
+        self.create_header(taxonomy)
+
+        report = self.xhtml_maker.div({"id": "report", "class": "report"})
+        self.body.append(report)
+
+        elts = self.to_ixbrl_elt(self, taxonomy)
+        for elt in elts:
+            report.append(elt)
+
+        self.check_duplicate_facts(
+            self.data.get_config_bool("deduplicate-facts", False,
+                                      mandatory=False)
+        )
+
+        # Contexts get created above, hence do this last.
+        self.create_contexts(taxonomy)
+
+        self.create_units()
+
         return self.html
 
+    # Elements of the report body, produced one at a time.  Containers
+    # override this so that their elements can be written out as each is
+    # produced.
+    def to_ixbrl_elts(self, par, taxonomy):
+        yield from self.to_ixbrl_elt(par, taxonomy)
+
+    # Writes iXBRL without holding the whole document in memory.  The header
+    # has to describe every context used, but comes before the report, so
+    # the report is produced first and written, an element at a time, to a
+    # temporary file.  The document is then written with the header, and
+    # the report copied in from the file.  Only the largest element is held
+    # in memory.
+    def to_ixbrl_stream(self, taxonomy, out):
+
+        self.init_html(taxonomy)
+        self.tag_facts = True
+        self.create_header(taxonomy)
+
+        pretty = self.data.get_config_bool("pretty-print", mandatory=False)
+        dedup = self.data.get_config_bool("deduplicate-facts", False,
+                                          mandatory=False)
+
+        # Metadata facts in the header come first in the document.
+        seen = {}
+        self.check_duplicate_facts(dedup, self.html, seen)
+
+        with tempfile.TemporaryFile() as report:
+
+            # The report is written inside the same elements as in the
+            # document, so it's serialised the same way.  start and end
+            # mark the report's content.
+            with etree.xmlfile(report, encoding="ASCII") as xf:
+                with self.report_element(xf, pretty, False):
+                    xf.flush()
+                    start = report.tell()
+                    self.write_report(taxonomy, xf, pretty, dedup, seen)
+                    xf.flush()
+                    end = report.tell()
+
+            self.create_contexts(taxonomy)
+            self.create_units()
+
+            with etree.xmlfile(out, encoding="ASCII") as xf:
+
+                xf.write_declaration()
+
+                with self.report_element(xf, pretty, True):
+
+                    xf.flush()
+
+                    report.seek(start)
+                    left = end - start
+                    while left > 0:
+                        chunk = report.read(min(left, 1 << 20))
+                        out.write(chunk)
+                        left -= len(chunk)
+
+    # Opens the document's elements down to the report div, writing the
+    # head and hidden header on the way if header is set.
+    @contextlib.contextmanager
+    def report_element(self, xf, pretty, header):
+
+        with xf.element(self.html.tag, nsmap=self.nsmap):
+
+            if header:
+                xf.write(self.head, pretty_print=pretty)
+
+            with xf.element(self.body.tag):
+
+                if header:
+                    xf.write(self.hidden, pretty_print=pretty)
+
+                with xf.element(
+                        "{%s}div" % xhtml_ns,
+                        {"id": "report", "class": "report"}
+                ):
+                    yield
+
+    def write_report(self, taxonomy, xf, pretty, dedup, seen):
+
+        # Elements are put in a holder which declares the document's
+        # namespaces before being written, so each only declares them once,
+        # at the top.
+        holder = self.root_maker.div()
+
+        for elt in self.to_ixbrl_elts(self, taxonomy):
+            self.check_duplicate_facts(dedup, elt, seen)
+            holder.append(elt)
+            xf.write(elt, pretty_print=pretty)
+            holder.remove(elt)
+            xf.flush()
+
     def to_ixbrl(self, taxonomy, out):
 
         html = self.to_ixbrl_tree(taxonomy)
 
+        self.write_doc(html, out)
+
+    # Writes a document, as serialised, to a binary stream.
+    def write_doc(self, html, out):
+
         if self.data.get_config_bool("pretty-print",
                                      mandatory=False):
-            out.write(etree.tostring(
+            doc = etree.tostring(
                 html, pretty_print=True, xml_declaration=True
-            ).decode("utf-8"))
+            )
         else:
-            out.write(etree.tostring(
+            doc = etree.tostring(
                 html, xml_declaration=True
-            ).decode("utf-8"))
+            )
+
+        out.write(doc)
+
+    # Attributes which only mean something on an ix fact, removed when a
+    # fact becomes a span.
+    ix_attributes = {
+        "name", "contextRef", "unitRef", "format", "decimals", "precision",
+        "scale", "sign", "escape", "continuedAt", "order", "target",
+        "tupleRef", "{http://www.w3.org/2001/XMLSchema-instance}nil",
+    }
+
+    # The value a fact states, so that facts can be compared however they
+    # are laid out.  Numbers are parsed according to their format, and
+    # scaled and signed; other facts, and numbers in a format that isn't
+    # understood, are their text.
+    @staticmethod
+    def fact_value(elt):
+
+        text = "".join(elt.itertext()).strip()
+
+        if elt.tag != "{%s}nonFraction" % ix_ns:
+            return text
+
+        fmt = (elt.get("format") or "").split(":")[-1]
+
+        if fmt in ("zerodash", "fixed-zero") or text == "-":
+            num = "0"
+        elif fmt == "numcommadecimal":
+            num = text.replace(".", "").replace(" ", "").replace(",", ".")
+        elif fmt in ("", "numdotdecimal"):
+            num = text.replace(",", "").replace(" ", "")
+        else:
+            return (elt.get("scale"), elt.get("sign"), text)
+
+        try:
+            value = Decimal(num).scaleb(int(elt.get("scale") or 0))
+        except (InvalidOperation, ValueError):
+            return (elt.get("scale"), elt.get("sign"), text)
+
+        if elt.get("sign") == "-":
+            value = -value
+
+        return value
+
+    # A fact value, as given by fact_value, for a warning.
+    @staticmethod
+    def show_value(value):
+        if isinstance(value, tuple):
+            return "'%s'" % value[2]
+        if isinstance(value, str):
+            return "'%s'" % value
+        return str(value)
+
+    # The same figure often appears in several places.  Facts with the same
+    # name, context and unit should have the same value, inconsistent ones
+    # are reported, once for each name, context and unit.  If dedup is set,
+    # only the first of a set of consistent facts is tagged, the others
+    # become plain spans, keeping attributes the layout gave them.  Checks
+    # the document, or a part of it, with the facts seen so far: key ->
+    # [first value, whether it has been reported].
+    def check_duplicate_facts(self, dedup, root=None, seen=None):
+
+        if root is None:
+            root = self.html
+
+        if seen is None:
+            seen = {}
+
+        facts = list(root.iter(
+            "{%s}nonFraction" % ix_ns, "{%s}nonNumeric" % ix_ns
+        ))
+
+        for elt in facts:
+
+            key = (elt.get("name"), elt.get("contextRef"), elt.get("unitRef"))
+            value = self.fact_value(elt)
+
+            first = seen.get(key)
+
+            if first is None:
+                seen[key] = [value, False]
+                continue
+
+            if first[0] != value:
+                if not first[1]:
+                    first[1] = True
+                    sys.stderr.write(
+                        "Warning: fact %s in context %s has inconsistent "
+                        "values %s and %s\n" % (
+                            key[0], key[1], self.show_value(first[0]),
+                            self.show_value(value)
+                        )
+                    )
+                continue
 
-        return
+            if dedup:
+                elt.tag = "{%s}span" % xhtml_ns
+                for k in self.ix_attributes:
+                    if k in elt.attrib:
+                        del elt.attrib[k]
 
+    # Contexts are described once, and remembered in the taxonomy model, so
+    # documents sharing the model copy the description.  The remembered
+    # element is never put in a document.
     def create_contexts(self, taxonomy):
 
         for ctxt, id in taxonomy.contexts.items():
@@ -225,53 +433,60 @@ class BasicElement:
             if id not in taxonomy.contexts_used:
                 continue
 
-            entity = None
-            scheme = None
-            segments = {}
-            period = None
-            instant = None
+            ce = taxonomy.get_context_elt(
+                ctxt, id,
+                lambda: self.describe_context(ctxt, id, taxonomy)
+            )
 
-            for dim in ctxt.get_dimensions():
+            self.header.resources.append(copy.deepcopy(ce))
 
-                if dim[0] == "entity":
-                    scheme = dim[1]
-                    entity = dim[2]
-                elif dim[0] == "segment":
-                    segments[dim[1]] = dim[2]
-                elif dim[0] == "period":
-                    period = (dim[1], dim[2])
-                elif dim[0] == "instant":
-                    instant = dim[1]
-                else:
-                    raise RuntimeError("Should not happen in create_contexts")
+    def describe_context(self, ctxt, id, taxonomy):
 
+        entity = None
+        scheme = None
+        segments = {}
+        period = None
+        instant = None
 
-            segs = []
+        for dim in ctxt.get_dimensions():
 
-            if len(segments) == 0:
-                segs = []
+            if dim[0] == "entity":
+                scheme = dim[1]
+                entity = dim[2]
+            elif dim[0] == "segment":
+                segments[dim[1]] = dim[2]
+            elif dim[0] == "period":
+                period = (dim[1], dim[2])
+            elif dim[0] == "instant":
+                instant = dim[1]
             else:
-                segs = [
-                    self.xbrli_maker.segment()
-                ]
-                for k, v in segments.items():
-                    dim = taxonomy.lookup_dimension(k, v)
-                    if dim:
-                        segs[0].append(dim.describe(self))
+                raise RuntimeError("Should not happen in create_contexts")
+
 
-            crit = []
-            if entity:
-                crit.append(self.create_entity(entity, scheme, segs))
+        segs = []
+
+        if len(segments) == 0:
+            segs = []
+        else:
+            segs = [
+                self.xbrli_maker.segment()
+            ]
+            for k, v in segments.items():
+                dim = taxonomy.lookup_dimension(k, v)
+                if dim:
+                    segs[0].append(dim.describe(self))
 
-            if period:
-                crit.append(self.create_period(period[0], period[1]))
+        crit = []
+        if entity:
+            crit.append(self.create_entity(entity, scheme, segs))
 
-            if instant:
-                crit.append(self.create_instant(instant))
+        if period:
+            crit.append(self.create_period(period[0], period[1]))
 
-            ce = self.create_context(id, crit)
+        if instant:
+            crit.append(self.create_instant(instant))
 
-            self.header.resources.append(ce)
+        return self.create_context(id, crit)
 
     def create_context(self, id, elts):
 
@@ -0,0 +1,75 @@
+
+# A thin element builder over lxml.etree, used in place of
+# objectify.ElementMaker to produce documents:
+#
+#     xhtml = ElementMaker(xhtml_ns)
+#     xhtml.div({"class": "note"}, xhtml.span("Some text"))
+#
+# Elements only declare their own namespace rather than every namespace in
+# the document.  lxml removes declarations which aren't needed once an
+# element is added to the document, but making them is most of the cost
+# of creating an element, so this is several times faster.  The result is
+# a plain etree element.
+
+from lxml import etree
+
+class ElementMaker:
+
+    # The namespace elements are made in, and the namespace declarations
+    # they carry.  By default, just the namespace itself, with a prefix.
+    def __init__(self, namespace, prefix=None, nsmap=None):
+        self.namespace = "{%s}" % namespace
+        if nsmap is None:
+            nsmap = {prefix: namespace}
+        self.nsmap = nsmap
+
+    # Children are strings, which become text, dicts of attributes, or
+    # elements.  Other values are converted to strings, None is ignored.
+    def __call__(self, tag, *children):
+
+        if tag[0] != "{":
+            tag = self.namespace + tag
+
+        elt = etree.Element(tag, nsmap=self.nsmap)
+
+        last = None
+
+        for child in children:
+
+            if child is None:
+                continue
+
+            if isinstance(child, dict):
+                for k, v in child.items():
+                    elt.set(k, v)
+                continue
+
+            if etree.iselement(child):
+                elt.append(child)
+                last = child
+                continue
+
+            if isinstance(child, bool):
+                child = "true" if child else "false"
+            elif not isinstance(child, str):
+                child = str(child)
+
+            if last is None:
+                elt.text = (elt.text or "") + child
+            else:
+                last.tail = (last.tail or "") + child
+
+        return elt
+
+    # maker.div(...) is maker("div", ...).  The function is kept so the
+    # next lookup of the same tag is a plain attribute.
+    def __getattr__(self, tag):
+
+        if tag.startswith("_"):
+            raise AttributeError(tag)
+
+        def make(*children):
+            return self(tag, *children)
+
+        self.__dict__[tag] = make
+        return make
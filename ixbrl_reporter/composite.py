@@ -2,6 +2,7 @@
 # A Composite element is used to wrap several elements into a single document.
 
 from . basic_element import BasicElement
+from . import parallel
 
 class Composite(BasicElement):
     def __init__(self, id, elts, data):
@@ -33,6 +34,13 @@ class Composite(BasicElement):
 
     def to_ixbrl_elt(self, par, taxonomy):
 
+        # Elements can be rendered in parallel, see parallel.py.
+        workers = self.data.get_config("render-workers", 0, mandatory=False)
+        if workers > 1 and len(self.elements) > 1:
+            return parallel.render(
+                self.elements, par, taxonomy, self.data, workers
+            )
+
         elts = []
 
         for v in self.elements:
@@ -40,3 +48,7 @@ class Composite(BasicElement):
             elts.extend(elt)
         
         return elts
+
+    def to_ixbrl_elts(self, par, taxonomy):
+        for v in self.elements:
+            yield from v.to_ixbrl_elts(par, taxonomy)
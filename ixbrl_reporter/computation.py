@@ -6,6 +6,8 @@ import uuid
 
 from . result import SimpleResult, BreakdownResult, NilResult, TotalResult
 from . period import Period
+from . provenance import Source
+from . split_filter import SplitFilter
 
 def get_computation(item, comps, context, data, gcfg):
     if isinstance(item, str):
@@ -19,6 +21,11 @@ IN_YEAR = 1
 AT_START = 2
 AT_END = 3
 
+# Change in a balance between the start and end instants of a period.  This
+# is at-end less at-start, which is the sum of the in-period transactions,
+# so it's computed that way, and reported against a duration context.
+MOVEMENT = 4
+
 ROUND_DOWN = 1
 ROUND_UP = 2
 ROUND_NEAREST = 3
@@ -54,7 +61,8 @@ class Metadata:
         pid = {
             "in-year": IN_YEAR,
             "at-start": AT_START,
-            "at-end": AT_END
+            "at-end": AT_END,
+            "movement": MOVEMENT,
         }.get(pspec, AT_END)
 
         segsdef = cfg.get("segments", [])
@@ -102,7 +110,7 @@ class Metadata:
             )
         elif self.period == AT_END:
             context = self.context.with_instant(end)
-        else: # IN_YEAR
+        else: # IN_YEAR, MOVEMENT
             context = self.context.with_period(Period("", start, end))
 
         if len(self.segments) != 0:
@@ -117,6 +125,13 @@ class Computable:
     def compute(self, accounts, start, end, result):
         raise RuntimeError("Not implemented")
 
+    # Records the inputs combined by this computation, when the result set
+    # is tracking provenance.
+    def record_inputs(self, result, inputs):
+        prov = getattr(result, "provenance", None)
+        if prov is not None:
+            prov.set_inputs(self.metadata.id, inputs)
+
     @staticmethod
     def load(cfg, comps, context, data, gcfg):
 
@@ -154,10 +169,11 @@ class Computable:
 
 class Line(Computable):
 
-    def __init__(self, metadata, accounts, reverse=False):
+    def __init__(self, metadata, accounts, reverse=False, filter=None):
         self.metadata = metadata
         self.accounts = accounts
         self.reverse = reverse
+        self.filter = filter
 
     @staticmethod
     def load(cfg, comps, context, data, gcfg):
@@ -165,7 +181,8 @@ class Line(Computable):
         metadata = Metadata.load(cfg, comps, context, data, gcfg)
 
         return Line(
-            metadata, cfg.get("accounts"), cfg.get_bool("reverse-sign", False)
+            metadata, cfg.get("accounts"), cfg.get_bool("reverse-sign", False),
+            SplitFilter.load(cfg)
         )
 
     def compute(self, session, start, end, result):
@@ -184,14 +201,24 @@ class Line(Computable):
             context = self.metadata.context.with_instant(end)
             history = datetime.date(1970, 1, 1)
             start, end = history, end
-        else: # IN_YEAR
+        else: # IN_YEAR, MOVEMENT
             context = self.metadata.context.with_period(Period("", start, end))
-            
+
+        prov = getattr(result, "provenance", None)
+        if prov is not None:
+            prov.set_sources(self.metadata.id, [
+                Source(acct_name, start, end, self.filter)
+                for acct_name in self.accounts
+            ])
+
         for acct_name in self.accounts:
             acct = session.get_account(None, acct_name)
 
             splits = session.get_splits(acct, start, end)
 
+            if self.filter:
+                splits = self.filter.apply(splits)
+
             acct_total = sum([v["amount"] for v in splits])
 
             if session.is_debit(acct):
@@ -301,6 +328,8 @@ class Group(Computable):
         for input in self.inputs:
             total += input.compute(accounts, start, end, result)
 
+        self.record_inputs(result, self.inputs)
+
         if self.metadata.zero_if == ZERO_IF_LESS and total < 0:
             total = 0
         elif self.metadata.zero_if == ZERO_IF_GREATER and total > 0:
@@ -376,6 +405,7 @@ class ApportionOperation(Computable):
         context = self.metadata.get_context(start, end)
 
         val = self.item.compute(accounts, start, end, result)
+        self.record_inputs(result, [self.item])
         val *= self.fraction
 
         result.set(self.metadata.id,
@@ -418,6 +448,7 @@ class RoundOperation(Computable):
         context = self.metadata.get_context(start, end)
 
         val = self.item.compute(accounts, start, end, result)
+        self.record_inputs(result, [self.item])
 
         if self.direc == ROUND_NEAREST:
             val = round(val)    # Round to nearest int
@@ -469,6 +500,7 @@ class FactorOperation(Computable):
         context = self.metadata.get_context(start, end)
 
         val = self.item.compute(accounts, start, end, result)
+        self.record_inputs(result, [self.item])
 
         if isinstance(self.factor, dict):
             val = val * self.factor[str(end)]
@@ -532,6 +564,7 @@ class Comparison(Computable):
         context = self.metadata.get_context(start, end)
 
         val = self.item.compute(accounts, start, end, result)
+        self.record_inputs(result, [self.item])
 
         if self.comparison == CMP_LESS and val >= self.value:
             val = self.false_value
@@ -581,6 +614,8 @@ class Sum(Computable):
         for v in self.steps:
             total += v.compute(accounts, start, end, result)
 
+        self.record_inputs(result, self.steps)
+
         if self.metadata.zero_if == ZERO_IF_LESS and total < 0:
             total = 0
         elif self.metadata.zero_if == ZERO_IF_GREATER and total > 0:
@@ -627,6 +662,7 @@ class AbsOperation(Computable):
         context = self.metadata.get_context(start, end)
 
         val = self.item.compute(accounts, start, end, result)
+        self.record_inputs(result, [self.item])
 
         val = abs(val)
 
@@ -649,11 +685,18 @@ def get_computations(gcfg, context, data):
     comps = {}
     for comp_def in comp_defs:
         comp =  Computable.load(comp_def, comps, context, data, gcfg)
+        if comp.metadata.id in comps:
+            raise RuntimeError(
+                "Computation id '%s' is defined more than once" %
+                comp.metadata.id
+            )
         comps[comp.metadata.id] = comp
     
     return comps
 
 class ResultSet(dict):
+    # Set to a Provenance object to have computations record their sources.
+    provenance = None
     def set(self, id, value):
         self[id] = value
     def get(self, id):
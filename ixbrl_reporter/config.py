@@ -8,90 +8,366 @@ import os
 import getpass
 import socket
 import sys
+import hashlib
+import tempfile
+import threading
 from datetime import datetime, date
 
+# Use libyaml's loader where PyYAML was built with it, it's many times
+# faster than the pure Python one.
+Loader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
+# Setting this to a directory caches parsed YAML files there, keyed on the
+# file's path, modification time and size.  Entries are JSON, so reading
+# one can't run code, but whoever can write the directory decides what the
+# configuration says.  The directory is only used if it belongs to the
+# user and others can't write to it.
+CACHE_ENV = "IXBRL_REPORTER_CACHE"
+
+# Bump if the cached form changes.
+CACHE_VERSION = 2
+
+# Compiled configuration, e.g. a taxonomy, is JSON after this header.  It
+# can be imported in place of the YAML it was made from.  Being data, an
+# artifact can't run code, but like any configuration it is trusted to say
+# what the report should contain.
+ARTIFACT_MAGIC = b"ixbrl-reporter compiled\n"
+
+# Bump if the compiled form changes.  Artifacts of other versions must be
+# compiled again.
+ARTIFACT_VERSION = 2
+
 # Configuration object, loads configuration from a JSON file, and then
 # supports path navigate with config.get("part1.part2.part3")
+#
+# The tree is typed as it is built, values are typed when stored, so a
+# node got from the tree is the node in the tree.  Each node caches the
+# nodes its paths lead to.  Nodes are shared (by //ref, //import and get),
+# so a write to any node can change what another node's paths lead to;
+# every write counts in Config.writes, and a node whose cache predates the
+# latest write empties it before use.  Writes happen while loading, and
+# rarely after, so caches survive once a configuration is in use.
+#
+# Reading changes the tree (imports are loaded on first read, caches are
+# filled), so writes, loading imports and filling caches are done holding
+# Config.lock, and a configuration can be read from several threads.
+# Cached paths are read without the lock.
 class Config(dict):
+
+    # Held while changing any node.  Re-entrant, as loading an import
+    # reads and writes other nodes.
+    lock = threading.RLock()
+
+    # Count of writes to any node.
+    writes = 0
+
+    # Paths cached per node, the cache is emptied if it grows past this.
+    PATH_CACHE_SIZE = 4096
+
     def __init__(self, value=None):
         if value == None:
             value = {}
-        super().__init__(value)
+        super().__init__({k: Config.makevalue(v) for k, v in value.items()})
+        self.path_cache = {}
+        self.cache_writes = Config.writes
+    def __setitem__(self, key, value):
+        with Config.lock:
+            Config.writes += 1
+            super().__setitem__(key, Config.makevalue(value))
+    # Imports are loaded when first read, once, however many threads read.
+    def __getitem__(self, key):
+        val = super().__getitem__(key)
+        if isinstance(val, Import):
+            with Config.lock:
+                val = super().__getitem__(key)
+                if isinstance(val, Import):
+                    val = val.load()
+                    super().__setitem__(key, val)
+        return val
+    def items(self):
+        for k in self: self[k]
+        return super().items()
+    def values(self):
+        for k in self: self[k]
+        return super().values()
     @staticmethod
     def load(file="config.yaml", resolve=True):
-        with open(file,encoding='utf8') as f:
-            val = yaml.load(f, Loader=yaml.FullLoader)
-        c = Config.makevalue(val)
-        c.file = file
+        imports = Imports(resolve)
+        c = imports.build(file, ())
+        imports.root = c
         if resolve:
             Config.resolve_refs(c, c)
         return c
+    # Parsed files: path -> (key, parsed form), the key being made from the
+    # path, modification time and size.  A file which has changed replaces
+    # its entry, and the cache is emptied if it grows past PARSED_SIZE
+    # files.  The parsed form is only read, never modified, so it can be
+    # shared by every load in the process.
+    parsed = {}
+    PARSED_SIZE = 256
+
+    # Parse a YAML file, using the parse cache if there is one.  A damaged
+    # or unreadable cache entry is just a miss.
+    @staticmethod
+    def parse(file):
+
+        try:
+            st = os.stat(file)
+        except OSError:
+            # Let the open report it.
+            return Config.parse_file(file, None)
+
+        key = "%d:%s:%d:%d:%s" % (
+            CACHE_VERSION, os.path.abspath(file), st.st_mtime_ns, st.st_size,
+            Loader.__name__
+        )
+
+        path = os.path.abspath(file)
+
+        entry = Config.parsed.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        val = Config.parse_file(file, key)
+
+        if path not in Config.parsed and \
+           len(Config.parsed) >= Config.PARSED_SIZE:
+            Config.parsed.clear()
+        Config.parsed[path] = (key, val)
+
+        return val
+
+    @staticmethod
+    def parse_file(file, key):
+
+        if Config.is_artifact(file):
+            return Config.read_artifact(file)
+
+        cache = os.environ.get(CACHE_ENV)
+        if not cache or not key:
+            with open(file,encoding='utf8') as f:
+                return yaml.load(f, Loader=Loader)
+
+        path = os.path.join(
+            cache, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+        )
+
+        trusted = Config.trusted_cache(cache)
+
+        if trusted:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+
+        with open(file,encoding='utf8') as f:
+            val = yaml.load(f, Loader=Loader)
+
+        # Only values which come back from JSON unchanged are cached, YAML
+        # has types and key types which JSON hasn't.  Written to a
+        # temporary file and renamed, so that concurrent runs never see a
+        # partial entry.
+        try:
+            data = json.dumps(val)
+            if json.loads(data) != val:
+                return val
+            if not trusted:
+                os.makedirs(cache, mode=0o700, exist_ok=True)
+                if not Config.trusted_cache(cache):
+                    return val
+            fd, tmp = tempfile.mkstemp(dir=cache, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+
+        return val
+
+    # A cache directory is trusted if it's the user's own, and no-one else
+    # can write to it.
+    @staticmethod
+    def trusted_cache(cache):
+        try:
+            st = os.stat(cache)
+        except OSError:
+            return False
+        if not hasattr(os, "getuid"):
+            return True
+        return st.st_uid == os.getuid() and not (st.st_mode & 0o022)
+
+    @staticmethod
+    def is_artifact(file):
+        try:
+            with open(file, "rb") as f:
+                return f.read(len(ARTIFACT_MAGIC)) == ARTIFACT_MAGIC
+        except Exception:
+            return False
+
+    # Returns the kind of artifact and its data.
     @staticmethod
-    def makevalue(val):
+    def read_artifact(file, kind=None):
+
+        with open(file, "rb") as f:
+
+            if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                raise RuntimeError("%s is not a compiled file" % file)
+
+            try:
+                art = json.loads(f.read().decode("utf-8"))
+            except Exception as e:
+                raise RuntimeError("Could not read %s: %s" % (file, e))
+
+        if not isinstance(art, dict) or \
+           art.get("version") != ARTIFACT_VERSION:
+            raise RuntimeError(
+                "%s was compiled by a different version, compile it again" %
+                file
+            )
+
+        if kind and art.get("kind") != kind:
+            raise RuntimeError("%s is not a compiled %s" % (file, kind))
+
+        return art["data"]
+
+    # Writes a configuration tree as plain data.  Imports are read and
+    # references followed, so the artifact stands alone.
+    @staticmethod
+    def write_artifact(val, kind, file):
+
+        art = {
+            "version": ARTIFACT_VERSION,
+            "kind": kind,
+            "data": Config.plain(val),
+        }
+
+        dir = os.path.dirname(os.path.abspath(file))
+        fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+        try:
+            os.chmod(tmp, 0o644)
+            with os.fdopen(fd, "wb") as f:
+                f.write(ARTIFACT_MAGIC)
+                f.write(json.dumps(art, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp, file)
+        except:
+            os.unlink(tmp)
+            raise
+
+    # Typed configuration values back to plain Python ones.
+    @staticmethod
+    def plain(val):
+        if isinstance(val, dict):
+            for k in val:
+                if not isinstance(k, str):
+                    raise RuntimeError(
+                        "Can't compile key {0}, keys must be strings".format(k)
+                    )
+            return {k: Config.plain(v) for k, v in val.items()}
+        if isinstance(val, list):
+            return [Config.plain(Import.loaded(v)) for v in val]
+        if isinstance(val, (NoneValue, type(None))):
+            return None
+        if isinstance(val, BoolValue):
+            return bool(val)
+        if isinstance(val, bool):
+            return val
+        if isinstance(val, str):
+            return str(val)
+        if isinstance(val, int):
+            return int(val)
+        if isinstance(val, float):
+            return float(val)
+        raise RuntimeError("Can't help with type {0}".format(type(val)))
+
+    # Values already in the tree are typed, and are passed through rather
+    # than rebuilt.  While loading, an importer turns //import values into
+    # Import placeholders; without one, they are loaded straight away.
+    @staticmethod
+    def makevalue(val, importer=None):
+        if isinstance(val, TYPED) or isinstance(val, Import):
+            return val
         if val == None:
-            return NoneValue()
+            return NONE
         if isinstance(val, str):
             if val.startswith("//import "):
+                if importer:
+                    return importer.importer(val[9:])
                 return Config.load(val[9:], resolve=False)
             return StringValue(val)
         if isinstance(val, list):
-            return ListValue([Config.makevalue(v) for v in val])
+            # Imports in lists aren't worth the bother of deferring.
+            return ListValue([
+                Import.loaded(Config.makevalue(v, importer)) for v in val
+            ])
         if isinstance(val, bool):
             return BoolValue(val)
         if isinstance(val, int):
             return IntValue(val)
         if isinstance(val, dict):
-            return Config.import_dict(val)
+            return Config.import_dict(val, importer)
         if isinstance(val, float):
             return FloatValue(val)
         raise RuntimeError("Can't help with type {0}".format(type(val)))
 
     @staticmethod
-    def import_dict(val):
+    def import_dict(val, importer=None):
 
         rtn = {}
 
         for k in val:
-            rtn[k] = Config.makevalue(val[k])
+            rtn[k] = Config.makevalue(val[k], importer)
             
         return Config(rtn)
 
+    # Replace //ref values with the node they refer to.
     def resolve_refs(val, root):
+        Resolver.get(root).resolve(val)
 
-        if isinstance(val, list):
-
-            for i in range(len(val)):
-
-                if isinstance(val[i], str):
-                    if val[i].startswith("//ref "):
-                        val[i] = root.get(val[i][6:])
-                        Config.resolve_refs(val[i], root)
-                elif isinstance(val[i], dict):
-                    Config.resolve_refs(val[i], root)
-                elif isinstance(val[i], list):
-                    Config.resolve_refs(val[i], root)
-
-        if isinstance(val, dict):
-
-            for k in val:
-
-                if isinstance(val[k], str):
-                    if val[k].startswith("//ref "):
-                        val[k] = root.get(val[k][6:])
-                        Config.resolve_refs(val[k], root)
-                if isinstance(val[k], list):
-                    Config.resolve_refs(val[k], root)
-                elif isinstance(val[k], dict):
-                    Config.resolve_refs(val[k], root)
-
+    # Values are looked up once per path, after that the resolved node
+    # (or the fact that there isn't one) comes from the path cache.  Nodes
+    # are shared, not copied, so callers must not modify them other than
+    # through set.  Defaults are typed once and cached with the path.
     def get(self, key, deflt=None, mandatory=True):
+        nav = None
+        if self.cache_writes == Config.writes:
+            nav = self.path_cache.get(key)
+        if nav is None:
+            with Config.lock:
+                if self.cache_writes != Config.writes:
+                    self.path_cache.clear()
+                    self.cache_writes = Config.writes
+                nav = self.path_cache.get(key)
+                if nav is None:
+                    if len(self.path_cache) >= Config.PATH_CACHE_SIZE:
+                        self.path_cache.clear()
+                    nav = self.lookup(key)
+                    self.path_cache[key] = nav
+        if nav is MISSING:
+            if deflt == None:
+                if mandatory:
+                    raise RuntimeError("Config value %s not known" % key)
+                return NONE
+            return self.get_default(key, deflt)
+        return nav
+    def get_default(self, key, deflt):
+        try:
+            dkey = (key, type(deflt), deflt)
+            val = self.path_cache.get(dkey)
+        except TypeError:
+            # Unhashable, e.g. a list.
+            return Config.makevalue(deflt)
+        if val is None:
+            with Config.lock:
+                val = Config.makevalue(deflt)
+                self.path_cache[dkey] = val
+        return val
+    def lookup(self, key):
         if "." not in key:
             if key in self:
                 nav = self[key]
             else:
-                if deflt == None and mandatory:
-                    raise RuntimeError("Config value %s not known" % key)
-                nav = deflt
+                return MISSING
         else:
             keys = key.split(".")
             nav = self
@@ -102,21 +378,12 @@ class Config(dict):
                     try:
                         pos = int(k)
                     except Exception as e:
-                        if deflt == None and mandatory:
-                            raise RuntimeError("Config value %s not known" % key)
-                        return Config.makevalue(deflt)
+                        return MISSING
                     if pos >= len(nav):
-                        if deflt == None and mandatory:
-                            raise RuntimeError(
-                                "Config value %s not known" % key
-                            )
-                        return Config.makevalue(deflt)
+                        return MISSING
                     nav = nav[int(k)]
                 else:
-                    if deflt == None and mandatory:
-                        raise RuntimeError("Config value %s not known" % key)
-
-                    return Config.makevalue(deflt)
+                    return MISSING
         return Config.makevalue(nav)
     def get_date(self, key, dflt=None, mandatory=True):
         val = self.get(key, dflt, mandatory)
@@ -149,6 +416,189 @@ class Config(dict):
         with open(self.file, "w") as config_file:
             config_file.write(json.dumps(self.config, indent=4))
 
+# Resolves //ref values in one pass.  A reference is replaced by the node
+# it points at, shared rather than copied, and that node is resolved before
+# use.  Resolved containers are remembered, so a subtree referenced from
+# many places is walked once.  A reference which leads back to itself, or
+# to a container which contains the reference, is reported.
+class Resolver:
+
+    def __init__(self, root):
+        self.root = root
+
+        # Containers fully resolved, and being resolved, by id.  The
+        # containers are held so that an id can't be reused by another
+        # container while it's recorded.
+        self.done = {}
+        self.active = {}
+
+        # References being followed, for reporting cycles.
+        self.following = []
+
+    # One resolver per root, so that imports loaded later share what's
+    # already been done.
+    @staticmethod
+    def get(root):
+        resolver = getattr(root, "resolver", None)
+        if resolver is None:
+            resolver = Resolver(root)
+            root.resolver = resolver
+        return resolver
+
+    def cycle(self, key):
+        return RuntimeError(
+            "Config reference cycle: %s" % " -> ".join(self.following + [key])
+        )
+
+    # Node a reference points at, resolved.
+    def target(self, key):
+
+        if key in self.following:
+            raise self.cycle(key)
+
+        self.following.append(key)
+
+        try:
+            return self.follow(key)
+        finally:
+            self.following.pop()
+
+    def follow(self, key):
+
+        nav = self.root
+        for k in key.split("."):
+            if isinstance(nav, dict) and k in nav:
+                nav = nav[k]
+            elif isinstance(nav, list):
+                try:
+                    nav = nav[int(k)]
+                except (ValueError, IndexError):
+                    raise RuntimeError("Config value %s not known" % key)
+            else:
+                raise RuntimeError("Config value %s not known" % key)
+
+            # The path may pass through references not resolved yet.
+            if isinstance(nav, str) and nav.startswith("//ref "):
+                nav = self.target(nav[6:])
+
+        self.resolve(nav)
+
+        return nav
+
+    def resolve(self, val):
+
+        if not isinstance(val, (dict, list)):
+            return
+
+        if id(val) in self.done:
+            return
+
+        if id(val) in self.active:
+            raise self.cycle(self.following[-1] if self.following else "?")
+
+        self.active[id(val)] = val
+
+        try:
+            if isinstance(val, list):
+                keys = range(len(val))
+            else:
+                keys = list(val.keys())
+
+            for k in keys:
+
+                if isinstance(val, dict):
+                    v = dict.__getitem__(val, k)
+                    # Imports are resolved when they're loaded.
+                    if isinstance(v, Import):
+                        continue
+                else:
+                    v = val[k]
+
+                if isinstance(v, str) and v.startswith("//ref "):
+                    val[k] = self.target(v[6:])
+                else:
+                    self.resolve(v)
+        finally:
+            del self.active[id(val)]
+
+        self.done[id(val)] = val
+
+        # References in lists are written without Config knowing.
+        Config.writes += 1
+
+# The //import files of one configuration.  Each file is loaded once, when
+# a value in it is first needed, and shared by every place importing it.
+class Imports:
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.root = None
+        self.files = {}
+
+    # Load a file into a tree.  chain is the files importing this one,
+    # outermost first, for cycle detection.
+    def build(self, file, chain):
+
+        path = os.path.abspath(file)
+
+        if path in chain:
+            raise RuntimeError(
+                "Config import cycle: %s" % " -> ".join(chain + (path,))
+            )
+
+        if path in self.files:
+            return self.files[path]
+
+        importer = Importer(self, chain + (path,))
+
+        c = Config.makevalue(Config.parse(file), importer)
+        if isinstance(c, Config):
+            c.file = file
+
+        self.files[path] = c
+
+        return c
+
+class Importer:
+    def __init__(self, imports, chain):
+        self.imports = imports
+        self.chain = chain
+    def importer(self, file):
+        return Import(self.imports, file, self.chain)
+
+# Placeholder for an //import which hasn't been read yet.
+class Import:
+
+    __slots__ = ("imports", "file", "chain")
+
+    def __init__(self, imports, file, chain):
+        self.imports = imports
+        self.file = file
+        self.chain = chain
+
+    def load(self):
+
+        path = os.path.abspath(self.file)
+        done = path in self.imports.files
+
+        c = self.imports.build(self.file, self.chain)
+
+        # References in the import are to the root of the configuration.
+        # Before the root exists, its own resolution covers them.
+        if not done and self.imports.resolve and self.imports.root is not None:
+            Config.resolve_refs(c, self.imports.root)
+
+        return c
+
+    @staticmethod
+    def loaded(val):
+        if isinstance(val, Import):
+            return val.load()
+        return val
+
+    def __repr__(self):
+        return "Import({0})".format(self.file)
+
 class StringValue(str):
     def __new__(cls, value):
         return str.__new__(cls, value)
@@ -168,6 +618,8 @@ class DateValue(date):
     def fromisoformat(s):
         d = date.fromisoformat(s)
         return DateValue(d.year, d.month, d.day)
+    def __reduce__(self):
+        return (DateValue, (self.year, self.month, self.day))
     def use(self, fn):
         return fn(self)
 
@@ -203,6 +655,16 @@ class NoneValue:
     def __bool__(self):
         return False
 
+NONE = NoneValue()
+
+# Marks a path with no value in the path cache.
+MISSING = object()
+
+TYPED = (
+    Config, StringValue, FloatValue, DateValue, IntValue, BoolValue,
+    ListValue, NoneValue
+)
+
 # Initialise configuration file with some (mainly) static values.  Also,
 # collate personal information for the Fraud API.
 def initialise_config(config_file):
@@ -6,96 +6,96 @@
 
 from . datum import *
 
+import weakref
+
+# Contexts are immutable, and interned: deriving a context with the same
+# dimensions as an existing one returns that context, so equal contexts are
+# the same object, whichever tree they were derived in.  Dimensions are
+# worked out once, when a context is created.
 class Context:
-    def __init__(self, parent):
-        self.parent = parent
-        self.entity = None
-        self.scheme = None
-        self.segments = {}
-        self.period = None
-        self.instant = None
-        self.children = {}
+
+    __slots__ = (
+        "parent", "entity", "scheme", "segments", "period", "instant",
+        "dims", "hash", "__weakref__"
+    )
+
+    # Dimension tuple -> context.
+    interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, parent, entity=None, scheme=None, segments=(),
+                period=None, instant=None):
+
+        if parent is not None:
+            dims = parent.dims
+        else:
+            dims = ()
+        if entity:
+            dims = dims + (("entity", scheme, entity),)
+        if segments:
+            dims = dims + tuple(("segment", k, v) for k, v in segments)
+        if period:
+            dims = dims + (("period", str(period.start), str(period.end)),)
+        if instant:
+            dims = dims + (("instant", str(instant)),)
+
+        c = Context.interned.get(dims)
+        if c is not None:
+            return c
+
+        c = object.__new__(cls)
+        for k, v in (
+                ("parent", parent), ("entity", entity), ("scheme", scheme),
+                ("segments", tuple(segments)), ("period", period),
+                ("instant", instant), ("dims", dims), ("hash", hash(dims))
+        ):
+            object.__setattr__(c, k, v)
+
+        Context.interned[dims] = c
+        return c
+
+    def __setattr__(self, k, v):
+        raise AttributeError("Context is immutable")
+
+    def __delattr__(self, k):
+        raise AttributeError("Context is immutable")
+
+    def __eq__(self, other):
+        if self is other: return True
+        if not isinstance(other, Context): return NotImplemented
+        return self.dims == other.dims
+
+    def __hash__(self):
+        return self.hash
+
+    def __reduce__(self):
+        return (Context, (self.parent, self.entity, self.scheme,
+                          self.segments, self.period, self.instant))
 
     def get_hash(self):
         return "@@".join(
             [
                 ",".join(v)
-                for v in self.get_dimensions()
+                for v in self.dims
             ]
         )
 
     def get_dimensions(self):
-        if self.parent:
-            dims = self.parent.get_dimensions()
-        else:
-            dims  = []
-        if self.entity:
-            dims.append(("entity", self.scheme, self.entity))
-        if self.segments:
-            for k, v in self.segments:
-                dims.append(("segment", k, v))
-        if self.period:
-            dims.append(("period", str(self.period.start),
-                         str(self.period.end)))
-        if self.instant:
-            dims.append(("instant", str(self.instant)))
-        return dims
+        return self.dims
 
     def with_segment(self, k, v):
-        return self.with_segments(((k, v)))
+        return self.with_segments(((k, v),))
 
     def with_segments(self, segments):
-
-        # entity, scheme, segments, period, instant
-        seghash = "//".join([
-            "%s=%s" % (k, v)
-            for k, v in segments
-        ])
-        k = (None, None, seghash, None, None)
-        if k in self.children:
-            return self.children[k]
-
-        c = Context(self)
-        self.children[k] = c
-        c.segments = segments
-        return c
+        return Context(self, segments=segments)
 
     def with_period(self, period):
-
-        # entity, scheme, segments, period, instant
-        k = (None, None, None, str(period), None)
-        if k in self.children:
-            return self.children[k]
-
-        c = Context(self)
-        self.children[k] = c
-        c.period = period
-        return c
+        return Context(self, period=period)
 
     def with_instant(self, instant):
-
-        # entity, scheme, segments, period, instant
-        k = (None, None, None, None, str(instant))
-        if k in self.children:
-            return self.children[k]
-
-        c = Context(self)
-        self.children[k] = c
-        c.instant = instant
-        return c
+        return Context(self, instant=instant)
 
     def with_entity(self, scheme, id):
-
-        # entity, scheme, segments, period, instant
-        k = (id, scheme, None, None, None)
-        if k in self.children:
-            return self.children[k]
-
-        c = Context(self)
-        self.children[k] = c
-        c.entity = id
-        c.scheme = scheme
-        return c
+        return Context(self, entity=id, scheme=scheme)
 
     def describe(self):
         if self.parent:
@@ -103,7 +103,7 @@ class Context:
         if self.entity:
             print("Entity: %s (%s)" % (self.entity, self.scheme))
         if self.segments:
-            for k, v in self.segments.items():
+            for k, v in self.segments:
                 print("Segment: %s (%s)" % (k, v))
         if self.period:
             print("Period: %s" % self.period)
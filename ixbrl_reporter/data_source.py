@@ -2,6 +2,7 @@
 from . period import Period
 from . context import Context
 from . computation import get_computations, ResultSet
+from . provenance import Provenance
 from . valueset import ValueSet
 from . simple_sheet import SimpleWorksheet
 from . flex_sheet import FlexWorksheet
@@ -39,15 +40,37 @@ class DataSource:
         self.computations = get_computations(cfg, self.business_context, self)
         self.results = {}
 
+        # Element and worksheet definitions by id, see index.
+        self.element_defs = None
+        self.worksheet_defs = None
+
+        # Periods are parsed once: the accounting periods, an index of
+        # them by name, and periods by configuration key.
+        self.periods = None
+        self.period_names = None
+        self.config_periods = {}
+
+        # Provenance tracking is off unless asked for, computations then
+        # skip recording entirely.
+        self.track_provenance = False
+
         self.notes = {}
 
+        # Note text -> layout it expands to, see expand_string.
+        self.expanded = {}
+
         self.noteheadings = NoteHeadings()
 
     def set_note(self, id, value):
         self.notes[id] = value
 
+    # Expanded notes are kept, so each is only expanded once however many
+    # times, and in however many formats, it is rendered.  Layout elements
+    # hold no rendering state, so can be shared.
     def expand_string(self, value):
-        return expand_string(value, self)
+        if value not in self.expanded:
+            self.expanded[value] = expand_string(value, self)
+        return self.expanded[value]
 
     def get_note(self, id):
         return self.notes[id]
@@ -60,7 +83,11 @@ class DataSource:
 
     def get_report_period(self, i=0):
 
-        return Period.load(self.cfg.get("metadata.accounting.periods." + str(i)))
+        key = "metadata.accounting.periods." + str(i)
+        if key not in self.config_periods:
+            self.config_periods[key] = Period.load(self.cfg.get(key))
+
+        return self.config_periods[key]
 
     def get_report_date(self):
 
@@ -77,6 +104,8 @@ class DataSource:
 
         if c not in self.results:
             res = ResultSet()
+            if self.track_provenance:
+                res.provenance = Provenance()
             self.results[c] = res
 
             for comp in self.computations.values():
@@ -84,6 +113,26 @@ class DataSource:
 
         return self.results[c]
 
+    def enable_provenance(self):
+        # Results computed before this point carry no provenance.
+        self.track_provenance = True
+        self.results = {}
+
+    # Writes a breakdown of a computed value down to the contributing
+    # splits.
+    def explain(self, id, period, out):
+
+        if not self.track_provenance:
+            raise RuntimeError("Provenance tracking is not enabled")
+
+        res = self.perform_computations(period)
+
+        comps = Provenance.index(self.computations)
+        if id not in comps:
+            raise RuntimeError("No such computation '%s'" % id)
+
+        res.provenance.explain(id, self.session, comps, res, out)
+
     def get_result(self, id, period):
         res = self.get_results([id], period)
         return res.get(id)
@@ -99,35 +148,100 @@ class DataSource:
         return d
 
     def get_periods(self):
-        return [
-            Period.load(period)
-            for period in self.cfg.get("metadata.accounting.periods")
-        ]
+
+        if self.periods is None:
+            self.periods = [
+                Period.load(period)
+                for period in self.cfg.get("metadata.accounting.periods")
+            ]
+
+        return self.periods
 
     def get_period(self, name):
 
-        for period in self.get_periods():
-            if period.name == name:
-                return period
+        if self.period_names is None:
+            self.period_names = {}
+            for period in self.get_periods():
+                self.period_names.setdefault(period.name, period)
+
+        if name in self.period_names:
+            return self.period_names[name]
 
         raise RuntimeError("Period '" + name + "' not known")
 
+    # Every period computations are done for: the accounting periods, and
+    # periods named by period-config in element and worksheet definitions.
+    def get_computation_periods(self):
+
+        keys = []
+
+        def find(defn):
+            if isinstance(defn, dict):
+                for k, v in defn.items():
+                    if k == "period-config":
+                        if v not in keys:
+                            keys.append(v)
+                    else:
+                        find(v)
+            elif isinstance(defn, list):
+                for v in defn:
+                    find(v)
+
+        find(self.get_config("report.elements", mandatory=False))
+        find(self.get_config("report.worksheets", mandatory=False))
+
+        periods = list(self.get_periods())
+        for key in keys:
+            period = self.get_config_period(key)
+            if period not in periods:
+                periods.append(period)
+
+        return periods
+
+    # Period described by the configuration at key.
+    def get_config_period(self, key):
+
+        if key not in self.config_periods:
+            self.config_periods[key] = Period.load(self.get_config(key))
+
+        return self.config_periods[key]
+
+    # Index definitions in a config list by id.  Built on first use and
+    # kept, so a template with many references doesn't scan the list for
+    # each one.
+    @staticmethod
+    def index(defs, what):
+
+        ix = {}
+        for defn in defs:
+            id = defn.get("id")
+            if id in ix:
+                raise RuntimeError("%s id '%s' is defined more than once" %
+                                   (what, id))
+            ix[id] = defn
+
+        return ix
+
     def get_worksheet(self, id):
 
-        for ws_def in self.cfg.get("report.worksheets"):
+        if self.worksheet_defs is None:
+            self.worksheet_defs = self.index(
+                self.cfg.get("report.worksheets"), "Worksheet"
+            )
 
-            if ws_def.get("id") == id:
+        if id not in self.worksheet_defs:
+            raise RuntimeError("Could not find worksheet '%s'" % id)
 
-                kind = ws_def.get("kind")
+        ws_def = self.worksheet_defs[id]
 
-                if kind == "simple":
-                    return SimpleWorksheet.load(ws_def, self)
-                if kind == "flex":
-                    return FlexWorksheet.load(ws_def, self)
+        kind = ws_def.get("kind")
 
-                raise RuntimeError("Don't know worksheet type '%s'" % kind)
+        if kind == "simple":
+            return SimpleWorksheet.load(ws_def, self)
+        if kind == "flex":
+            return FlexWorksheet.load(ws_def, self)
 
-        raise RuntimeError("Could not find worksheet '%s'" % id)
+        raise RuntimeError("Don't know worksheet type '%s'" % kind)
 
     def get_element(self, elt):
 
@@ -138,19 +252,19 @@ class DataSource:
 
         # This deals with references
 
-        try:
-            elt_defs = self.cfg.get("report.elements")
-        except:
-            raise RuntimeError("Couldn't find report.elements")
+        if self.element_defs is None:
+
+            try:
+                elt_defs = self.cfg.get("report.elements")
+            except:
+                raise RuntimeError("Couldn't find report.elements")
+
+            self.element_defs = self.index(elt_defs, "Element")
 
-        try:
-            for elt_def in elt_defs:
-                if elt_def.get("id") == elt:
-                    return Element.load(elt_def, self)
-        except:
-            raise RuntimeError("Problem looking for element id '%s'" % elt)
+        if elt not in self.element_defs:
+            raise RuntimeError("Could not find element '%s'" % elt)
 
-        raise RuntimeError("Could not find element '%s'" % elt)
+        return Element.load(self.element_defs[elt], self)
 
     def get_config(self, key, deflt=None, mandatory=True):
         return self.cfg.get(key, deflt, mandatory)
@@ -204,9 +318,7 @@ class DataSource:
 
             comp_id = defn.get("computation")
             key = defn.get("period-config")
-            period = Period.load(self.get_config(
-                key
-            ))
+            period = self.get_config_period(key)
             res = self.get_results([comp_id], period)
             value = res.get(comp_id)
 
@@ -12,7 +12,7 @@ class DebugReporter:
         if isinstance(thing, Table):
 
             out.write("  " * indent)
-            print("Table:")
+            print("Table:", file=out)
 
             for col in thing.columns:
                 self.handle(col, out, indent + 1)
@@ -20,16 +20,16 @@ class DebugReporter:
             for ix in thing.ixs:
                 self.handle(ix, out, indent + 1)
 
-            print()
-            print("Table has", thing.header_levels(), "header levels")
-            print("Table has", thing.column_count(), "columns")
-            print("Table has", thing.row_count(), "rows")
-            print("Table has", thing.ix_levels(), "index levels")
+            print(file=out)
+            print("Table has", thing.header_levels(), "header levels", file=out)
+            print("Table has", thing.column_count(), "columns", file=out)
+            print("Table has", thing.row_count(), "rows", file=out)
+            print("Table has", thing.ix_levels(), "index levels", file=out)
 
         if isinstance(thing, Column):
 
             out.write("  " * indent)
-            print("Column:", thing.metadata.description)
+            print("Column:", thing.metadata.description, file=out)
 
             if thing.children:
                 for col in thing.children:
@@ -40,9 +40,9 @@ class DebugReporter:
             out.write("  " * indent)
 
             if isinstance(thing, TotalIndex):
-                print("Total:")
+                print("Total:", file=out)
             else:
-                print("Index:", thing.metadata.description)
+                print("Index:", thing.metadata.description, file=out)
 
             if isinstance(thing.child, Row):
                 self.handle(thing.child, out, indent + 1)
@@ -53,7 +53,7 @@ class DebugReporter:
         if isinstance(thing, Row):
 
             out.write("  " * indent)
-            print("Row:")
+            print("Row:", file=out)
 
             for value in thing.values:
                 self.handle(value, out, indent + 1)
@@ -64,7 +64,7 @@ class DebugReporter:
 
             value = thing.value.value
             if isinstance(value, float):
-                print("Cell:", round(thing.value.value, 2))
+                print("Cell:", round(thing.value.value, 2), file=out)
             else:
-                print("Cell:", value)
+                print("Cell:", value, file=out)
 
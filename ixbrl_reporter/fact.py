@@ -42,7 +42,7 @@ class MoneyFact(Fact):
 
 
 
-        if self.name:
+        if self.name and base.tag_facts:
             elt = base.ix_maker.nonFraction("{0:,.2f}".format(value))
             elt.set("name", self.name)
             elt.set("contextRef", self.context)
@@ -63,9 +63,10 @@ class MoneyFact(Fact):
     def copy(self):
         return copy.copy(self)
     def rename(self, id, context, tx):
-        self.name = tx.get_tag_name(id)
+        tag = tx.get_tag(id)
+        self.name = tag.name
         self.context = context
-        self.reverse = tx.get_sign_reversed(id)
+        self.reverse = tag.reversed
 
 class CountFact(Fact):
     def __init__(self, context, name, value, unit="pure"):
@@ -75,7 +76,7 @@ class CountFact(Fact):
         self.reverse = False
         self.unit = unit
     def to_elt(self, base):
-        if self.name:
+        if self.name and base.tag_facts:
             elt = base.ix_maker.nonFraction(str(self.value))
             elt.set("name", self.name)
             elt.set("contextRef", self.context)
@@ -93,7 +94,7 @@ class NumberFact(Fact):
         self.reverse = False
         self.unit = unit
     def to_elt(self, base):
-        if self.name:
+        if self.name and base.tag_facts:
             elt = base.ix_maker.nonFraction(str(self.value))
             elt.set("name", self.name)
             elt.set("contextRef", self.context)
@@ -109,7 +110,7 @@ class StringFact(Fact):
         self.context = context
         self.name = name
     def to_elt(self, base):
-        if self.name:
+        if self.name and base.tag_facts:
             # If value is list, assume it is list of elements
             if isinstance(self.value, list):
                 elt = base.ix_maker.nonNumeric()
@@ -136,7 +137,7 @@ class BoolFact(Fact):
         self.name = name
         self.context = context
     def to_elt(self, base):
-        if self.name:
+        if self.name and base.tag_facts:
             elt = base.ix_maker.nonNumeric(json.dumps(self.value))
             elt.set("name", self.name)
             elt.set("contextRef", self.context)
@@ -150,7 +151,7 @@ class DateFact(Fact):
         self.name = name
         self.value = value
     def to_elt(self, base):
-        if self.name:
+        if self.name and base.tag_facts:
             elt = base.ix_maker.nonNumeric(
                 self.value.strftime("%d\xa0%B\xa0%Y")
             )
@@ -56,19 +56,22 @@ class IxbrlReporter:
 
         txt = self.fmt(abs(val))
 
-        # Element always contains positive value.  For negative we
-        # add parentheses
-        elt = self.par.ix_maker.nonFraction(txt)
-        elt.set("name", name)
-
-        elt.set("contextRef", context)
-        elt.set("format", "ixt2:numdotdecimal")
-        elt.set("unitRef", self.currency)
-        elt.set("decimals", str(self.decimals))
-        elt.set("scale", str(self.scale))
-
         if abs(val) < self.tiny: val = 0
 
+        # Element always contains positive value.  For negative we
+        # add parentheses.  HTML output has the same layout, untagged.
+        if self.par.tag_facts:
+            elt = self.par.ix_maker.nonFraction(txt)
+            elt.set("name", name)
+
+            elt.set("contextRef", context)
+            elt.set("format", "ixt2:numdotdecimal")
+            elt.set("unitRef", self.currency)
+            elt.set("decimals", str(self.decimals))
+            elt.set("scale", str(self.scale))
+        else:
+            elt = self.par.xhtml_maker.span(txt)
+
         if abs(val) < self.tiny:
             sign = False
         else:
@@ -80,7 +83,7 @@ class IxbrlReporter:
             if fact.reverse:
                 sign = not sign
 
-        if sign:
+        if sign and self.par.tag_facts:
             elt.set("sign", "-")
 
         # Sign and negativity of value is not the same.
@@ -112,6 +115,9 @@ class IxbrlReporter:
 
         txt = str(val)
 
+        if not self.par.tag_facts:
+            return self.par.xhtml_maker.span(txt)
+
         elt = self.par.ix_maker.nonFraction(txt)
         elt.set("name", name)
 
@@ -84,7 +84,7 @@ class TagElt(Elt):
         for c in self.content:
             c.to_debug(taxonomy, out)
 
-        print("tag:", self.tag.lower())
+        print("tag:", self.tag.lower(), file=out)
 
 class IfdefElt(Elt):
     def __init__(self, key, content, data):
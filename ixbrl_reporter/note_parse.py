@@ -1,6 +1,8 @@
 
 # Note markup parser.
 
+import re
+
 class TextToken:
     def __init__(self, text):
         self.text = text
@@ -28,149 +30,99 @@ class ComputationToken:
         self.context = context
         self.period = period
 
+# Note markup is text, with markup introduced by a tilde:
+#
+#     ~{name=...}        Tagged content, name can have a context: name:context
+#     ~[name]            Metadata, with optional :prefix:suffix:null fields
+#     ~(name)            Computation, with optional :context:period fields
+#
+# The tokenizer is a compiled regex, one alternative per token.  Anything
+# else after a tilde is an error.  Tokens are kept by note text, so a note
+# is only parsed once.
 class NoteParser:
-    @staticmethod
-    def parse(note):
-
-        tokens = []
-
-        stack = []
-
-        IN_TEXT = 1
-        POST_TILDE = 2
-        IN_TAG_NAME = 3
-        IN_COMPUTATION_NAME = 4
-        IN_METADATA_NAME = 5
-
-        state = IN_TEXT
-
-        text = ""
-
-        for c in note:
 
-            if state == IN_TEXT:
+    token = re.compile(r"""
+        (?P<text>[^~}]+)
+      | (?P<close>\})
+      | ~\{(?P<tag>[^=]*)=
+      | ~\[(?P<metadata>[^\]]*)\]
+      | ~\((?P<computation>[^)]*)\)
+      | ~(?P<other>.?)
+    """, re.S | re.X)
 
-                if c == '~':
-                    if text != "":
-                        tokens.append(TextToken(text))
-                    state = POST_TILDE
-                    continue
+    # The state the parser is left in by the start of a token which isn't
+    # finished.
+    unfinished = {"": 2, "{": 3, "(": 4, "[": 5}
 
-                if c == '}':
-                    if text != "":
-                        tokens.append(TextToken(text))
-                    tokens.append(TagClose(stack.pop().name))
-                    state = IN_TEXT
-                    text = ""
-                    continue
+    # Note text -> tokens.
+    cache = {}
 
-                text += c
-                continue
-
-            if state == POST_TILDE:
-
-                if c == '{':
-                    state = IN_TAG_NAME
-                    tag_name = ""
-                    continue
-
-                if c == '[':
-                    state = IN_METADATA_NAME
-                    metadata_name = ""
-                    continue
+    @staticmethod
+    def parse(note):
 
-                if c == '(':
-                    state = IN_COMPUTATION_NAME
-                    computation_name = ""
-                    continue
+        if note not in NoteParser.cache:
+            NoteParser.cache[note] = NoteParser.tokenize(note)
 
-                err = "Didn't expect character '%c' after a tilde" % c
-                raise RuntimeError(err)
+        return list(NoteParser.cache[note])
 
-            if state == IN_TAG_NAME:
+    @staticmethod
+    def tokenize(note):
 
-                if c == '=':
+        tokens = []
 
-                    toks = tag_name.split(":")
+        stack = []
 
-                    if len(toks) == 0:
-                        raise RuntimeError("Empty tag name")
+        for m in NoteParser.token.finditer(note):
 
-                    if len(toks) > 2:
-                        raise RuntimeError(
-                            "Too many parts to tag name: %s" % tag_name
-                        )
+            kind = m.lastgroup
+            value = m.group(kind)
 
-                    if len(toks) > 2:
-                        if toks[2] == "m":
-                            toks[2] = "money"
-                        elif toks[2] == "s":
-                            toks[2] = "string"
-                        elif toks[2] == "c":
-                            toks[2] = "count"
-                        elif toks[2] == "b":
-                            toks[2] = "bool"
-                        elif toks[2] == "n":
-                            toks[2] = "number"
-                        elif toks[2] == "s":
-                            toks[2] = "string"
+            if kind == "text":
+                tokens.append(TextToken(value))
 
-                    tag = TagOpen(*toks)
+            elif kind == "close":
+                tokens.append(TagClose(stack.pop().name))
 
-                    tokens.append(tag)
-                    stack.append(tag)
+            elif kind == "tag":
 
-                    state = IN_TEXT
-                    text = ""
+                toks = value.split(":")
 
-                    continue
+                if len(toks) > 2:
+                    raise RuntimeError(
+                        "Too many parts to tag name: %s" % value
+                    )
 
-                tag_name += c
-                continue
+                tag = TagOpen(*toks)
 
-            if state == IN_METADATA_NAME:
-                if c == ']':
+                tokens.append(tag)
+                stack.append(tag)
 
-                    toks = metadata_name.split(":")
+            elif kind == "metadata":
 
-                    if len(toks) < 1 or len(toks) > 4:
-                        raise RuntimeError(
-                            "Too many fields: %s" % metadata_name
-                        )
-                    tok = MetadataToken(*toks)
+                toks = value.split(":")
 
-                    tokens.append(tok)
-                    text = ""
-                    state = IN_TEXT
-                    continue
+                if len(toks) > 4:
+                    raise RuntimeError("Too many fields: %s" % value)
 
-                metadata_name += c
-                continue
+                tokens.append(MetadataToken(*toks))
 
-            if state == IN_COMPUTATION_NAME:
-                if c == ')':
+            elif kind == "computation":
 
-                    toks = computation_name.split(":")
+                toks = value.split(":")
 
-                    if len(toks) < 1 or len(toks) > 3:
-                        raise RuntimeError(
-                            "Too many fields: %s" % computation_name
-                        )
-                    tok = ComputationToken(*toks)
+                if len(toks) > 3:
+                    raise RuntimeError("Too many fields: %s" % value)
 
-                    tokens.append(tok)
-                    text = ""
-                    state = IN_TEXT
-                    continue
+                tokens.append(ComputationToken(*toks))
 
-                computation_name += c
-                continue
+            elif value in NoteParser.unfinished:
+                raise RuntimeError(
+                    "Unbalanced note, in state %d" %
+                    NoteParser.unfinished[value]
+                )
 
-        if state == IN_TEXT:
-            if text != "":
-                tokens.append(TextToken(text))
-        else:
-            raise RuntimeError("Unbalanced note, in state %d" % state)
+            else:
+                err = "Didn't expect character '%c' after a tilde" % value
+                raise RuntimeError(err)
 
         return tokens
-
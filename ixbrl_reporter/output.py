@@ -0,0 +1,109 @@
+
+# Output sinks.  A sink opens a binary stream which a report is written to,
+# so documents are written out as serialised rather than being decoded
+# to a string first.  Compressed sinks compress as the report is written.
+#
+#     with get_sink("accts.html.gz").open() as out:
+#         elt.to_ixbrl(taxonomy, out)
+
+import gzip
+import io
+import json
+import os
+import time
+import zipfile
+
+# Plain file.
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+    def open(self):
+        return open(self.path, "wb")
+
+# Gzip-compressed file.
+class GzipSink:
+    def __init__(self, path):
+        self.path = path
+    def open(self):
+        return gzip.open(self.path, "wb")
+
+# The report member of a report package.  Closing it completes the
+# package.
+class PackageStream(io.BufferedIOBase):
+
+    def __init__(self, zf, member):
+        self.zf = zf
+        info = zipfile.ZipInfo(member, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.member = zf.open(info, "w")
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.member.write(data)
+
+    def close(self):
+        if not self.closed:
+            self.member.close()
+            self.zf.close()
+        super().close()
+
+# XBRL report package, as used for ESEF filings.  The package has a single
+# top-level directory named after the file, holding META-INF and a reports
+# directory with the report:
+#
+#     accts/META-INF/reportPackage.json
+#     accts/reports/accts.xhtml
+#
+# An .xbri file is an inline XBRL report package, other names are
+# unconstrained report packages.
+class ReportPackageSink:
+
+    def __init__(self, path):
+        self.path = path
+        self.name, ext = os.path.splitext(os.path.basename(path))
+        if ext == ".xbri":
+            self.document_type = "https://xbrl.org/report-package/2023/xbri"
+        else:
+            self.document_type = "https://xbrl.org/report-package/2023"
+
+    def open(self):
+
+        zf = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
+
+        try:
+            zf.writestr(
+                self.name + "/META-INF/reportPackage.json",
+                json.dumps({
+                    "documentInfo": {
+                        "documentType": self.document_type
+                    }
+                }, indent=4)
+            )
+
+            return PackageStream(
+                zf, "%s/reports/%s.xhtml" % (self.name, self.name)
+            )
+        except Exception:
+            zf.close()
+            raise
+
+# Extensions of report package files.
+PACKAGE_EXTENSIONS = [".zip", ".xbri"]
+
+def is_package(path):
+    return os.path.splitext(path)[1] in PACKAGE_EXTENSIONS
+
+# Sink for an output file, chosen by its extension.
+def get_sink(path):
+
+    ext = os.path.splitext(path)[1]
+
+    if ext == ".gz":
+        return GzipSink(path)
+
+    if ext in PACKAGE_EXTENSIONS:
+        return ReportPackageSink(path)
+
+    return FileSink(path)
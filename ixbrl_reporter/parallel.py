@@ -0,0 +1,140 @@
+
+# Renders the elements of a report in a pool of worker processes.  Workers
+# are forked, so they start with the parent's elements, data source and
+# taxonomy.  Each renders one element, and returns it serialised with the
+# contexts it created and used, and the metadata facts it made.  The parent
+# merges contexts in element order, numbering new ones as rendering one
+# element after another would, and renames context references in the
+# fragments and facts to match.  The output is the same as rendering in
+# turn.
+#
+# Workers don't use the accounts: a connection inherited through fork isn't
+# safe to use.  Everything the elements compute is computed before the
+# pool starts.
+
+import multiprocessing
+
+from lxml import etree
+
+# Elements, parent element, taxonomy and data source being rendered.  Set
+# while the pool runs, so workers inherit it.
+state = None
+
+# Stands in for the accounts in a worker.
+class NoAccounts:
+    def __getattr__(self, name):
+        raise RuntimeError(
+            "Accounts used while rendering in a worker, a computation "
+            "wasn't done before the workers started"
+        )
+
+def render_element(i):
+
+    elements, par, taxonomy, data = state
+
+    data.session = NoAccounts()
+
+    known = set(taxonomy.contexts)
+    known_metadata = set(taxonomy.metadata)
+
+    elts = elements[i].to_ixbrl_elt(par, taxonomy)
+
+    # Elements are put in a holder declaring the document's namespaces, so
+    # they don't declare them again when added to the document.
+    holder = par.root_maker.div(*elts)
+
+    # Contexts made by this element, in the order they were made.
+    contexts = [
+        (ctxt, id) for ctxt, id in taxonomy.contexts.items()
+        if ctxt not in known
+    ]
+
+    # Empty text is lost when serialised, and would turn <span></span> into
+    # <span/>, so note where it is.
+    empty = [
+        i for i, elt in enumerate(holder.iter()) if elt.text == ""
+    ]
+
+    # Metadata facts made by this element.
+    facts = [
+        (id, fact) for id, fact in taxonomy.metadata.items()
+        if id not in known_metadata
+    ]
+
+    return (
+        etree.tostring(holder), empty, contexts,
+        list(taxonomy.contexts_used), facts
+    )
+
+# Adds the contexts and facts from a worker to the taxonomy, and returns its
+# elements with context references renamed.
+def merge(result, taxonomy):
+
+    doc, empty, contexts, used, facts = result
+
+    ids = {}
+    for ctxt, id in contexts:
+        ids[id] = taxonomy.get_context_id(ctxt)
+
+    for id in used:
+        taxonomy.contexts_used.add(ids.get(id, id))
+
+    for id, fact in facts:
+        if id in taxonomy.metadata:
+            continue
+        if fact:
+            fact.context = ids.get(fact.context, fact.context)
+        taxonomy.metadata[id] = fact
+
+    holder = etree.fromstring(doc)
+
+    elts = list(holder.iter())
+
+    for i in empty:
+        elts[i].text = ""
+
+    for elt in elts:
+        ref = elt.get("contextRef")
+        if ref in ids:
+            elt.set("contextRef", ids[ref])
+
+    return list(holder)
+
+def render(elements, par, taxonomy, data, workers):
+
+    global state
+
+    # Elements inside a worker are rendered in turn, as are elements on
+    # platforms without fork.
+    if state is not None or \
+       "fork" not in multiprocessing.get_all_start_methods():
+        elts = []
+        for v in elements:
+            elts.extend(v.to_ixbrl_elt(par, taxonomy))
+        return elts
+
+    # Do computations first, so that workers share the results rather than
+    # each computing them, and don't use the accounts.
+    for period in data.get_computation_periods():
+        data.perform_computations(period)
+
+    state = (elements, par, taxonomy, data)
+
+    # A worker renders one element only.  A second element would start
+    # from the contexts the first made, rather than the taxonomy as it was
+    # when the pool started, and its context references couldn't be
+    # renamed.
+    try:
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(min(workers, len(elements)), maxtasksperchild=1) as pool:
+            results = pool.map(
+                render_element, range(len(elements)), chunksize=1
+            )
+    finally:
+        state = None
+
+    elts = []
+    for result in results:
+        elts.extend(merge(result, taxonomy))
+
+    return elts
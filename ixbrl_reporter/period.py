@@ -4,11 +4,26 @@
 # i.e. an event which occurs on the end date is *included in* the period.
 from datetime import datetime
 
+# Periods are immutable and compare by value, so they can be shared and
+# used as keys.
 class Period:
+    __slots__ = ("name", "start", "end")
     def __init__(self, name, s, e):
-        self.name = name
-        self.start = s
-        self.end = e
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "start", s)
+        object.__setattr__(self, "end", e)
+    def __setattr__(self, k, v):
+        raise AttributeError("Period is immutable")
+    def __delattr__(self, k):
+        raise AttributeError("Period is immutable")
+    def __eq__(self, other):
+        if not isinstance(other, Period): return NotImplemented
+        return (self.name, self.start, self.end) == \
+            (other.name, other.start, other.end)
+    def __hash__(self):
+        return hash((self.name, self.start, self.end))
+    def __reduce__(self):
+        return (Period, (self.name, self.start, self.end))
     @staticmethod
     def load(cfg):
         try:
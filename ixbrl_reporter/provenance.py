@@ -0,0 +1,95 @@
+
+# Provenance of computed values.  When enabled, computations record where
+# their values came from: for a Line, the account queries (account name,
+# the inclusive date range handed to the ledger, and any split filter); for
+# operations, the ids of the computations they combine.  Only the query is
+# kept, not the splits, so recording is cheap.  The contributing splits are
+# fetched from the ledger when a value is explained.
+
+class Source:
+    __slots__ = ("account", "start", "end", "filter")
+    def __init__(self, account, start, end, filter=None):
+        self.account = account
+        self.start = start
+        self.end = end
+        self.filter = filter
+    def get_splits(self, session):
+        acct = session.get_account(None, self.account)
+        splits = session.get_splits(acct, self.start, self.end)
+        if self.filter:
+            splits = self.filter.apply(splits)
+        return splits
+    def __repr__(self):
+        return "Source({0},{1}..{2})".format(
+            self.account, self.start, self.end
+        )
+
+class Provenance:
+    def __init__(self):
+        self.sources = {}
+        self.inputs = {}
+
+    # A computation can be evaluated more than once per result set (a named
+    # computation which is also an input to a group), so records replace
+    # rather than accumulate.
+    def set_sources(self, id, sources):
+        self.sources[id] = sources
+
+    def set_inputs(self, id, inputs):
+        self.inputs[id] = [input.metadata.id for input in inputs]
+
+    def get_sources(self, id):
+        return self.sources.get(id, [])
+
+    def get_inputs(self, id):
+        return self.inputs.get(id, [])
+
+    def explain(self, id, session, comps, result, out, indent=0):
+
+        pfx = "  " * indent
+
+        value = result.get(id).value
+        if id in comps:
+            desc = comps[id].metadata.description
+        else:
+            desc = "?"
+
+        out.write("{0}{1} ({2}): {3:,.2f}\n".format(pfx, id, desc, value))
+
+        for src in self.get_sources(id):
+
+            splits = src.get_splits(session)
+            total = sum([v["amount"] for v in splits])
+
+            out.write("{0}  {1} {2}..{3}: {4:,.2f}\n".format(
+                pfx, src.account, src.start, src.end, total
+            ))
+
+            for spl in splits:
+                out.write("{0}    {1} {2:>12,.2f} {3}\n".format(
+                    pfx, spl["date"], spl["amount"], spl["description"]
+                ))
+
+        for input in self.get_inputs(id):
+            self.explain(input, session, comps, result, out, indent + 1)
+
+    # Computations are only indexed by id at the top level, inline inputs
+    # are found by walking down from there.
+    @staticmethod
+    def index(comps):
+
+        ix = {}
+
+        def walk(comp):
+            ix[comp.metadata.id] = comp
+            for attr in ("inputs", "steps"):
+                for v in getattr(comp, attr, []):
+                    walk(v)
+            item = getattr(comp, "item", None)
+            if item is not None:
+                walk(item)
+
+        for comp in comps.values():
+            walk(comp)
+
+        return ix
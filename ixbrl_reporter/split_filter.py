@@ -0,0 +1,128 @@
+
+# Filters restricting which splits a Line computation counts.  A filter
+# has include and exclude rules; each rule maps split fields to regular
+# expressions, all of which must match for the rule to match.  A split
+# counts if it matches an include rule (or there are none) and matches no
+# exclude rule.  A bare string rule is shorthand for a description match.
+#
+# Rules are compiled to a predicate once, when the configuration is
+# loaded.  Filtered splits are remembered on the split list they came from,
+# keyed by the filter's rules, so the same account queried by several Lines
+# with the same rules is filtered once.  Account backends return the same
+# list for the same query, which is what makes the second look-up a hit,
+# and the filtered lists are dropped when the backend drops the list.
+#
+# Backends without transactions answer with a split marked as a balance,
+# which a filter can't say anything about, so filtering one is an error.
+
+import re
+
+FIELDS = ("description", "memo", "number", "notes", "tag")
+
+# GnuCash has no tagging of its own, the convention is #hashtags in
+# the transaction notes or split memo.
+TAG = re.compile(r"#([\w-]+)")
+
+def split_tags(spl):
+    return TAG.findall(spl.get("notes") or "") + \
+        TAG.findall(spl.get("memo") or "")
+
+def compile_rule(rule):
+
+    if isinstance(rule, str):
+        rule = { "description": rule }
+
+    if not isinstance(rule, dict) or len(rule) == 0:
+        raise RuntimeError("Filter rule should be a map of field to pattern")
+
+    tests = []
+
+    for field, pattern in rule.items():
+
+        if field not in FIELDS:
+            raise RuntimeError("Filter field '%s' not known" % field)
+
+        try:
+            rx = re.compile(str(pattern))
+        except re.error as e:
+            raise RuntimeError(
+                "Filter pattern '%s' invalid: %s" % (pattern, e)
+            )
+
+        if field == "tag":
+            tests.append(
+                lambda spl, rx=rx: any(
+                    rx.fullmatch(t) for t in split_tags(spl)
+                )
+            )
+        else:
+            tests.append(
+                lambda spl, rx=rx, field=field: rx.search(
+                    spl.get(field) or ""
+                ) is not None
+            )
+
+    return lambda spl: all(test(spl) for test in tests)
+
+def rule_key(rule):
+    if isinstance(rule, dict):
+        return tuple(sorted((k, str(v)) for k, v in rule.items()))
+    return rule
+
+class SplitFilter:
+
+    def __init__(self, include, exclude):
+
+        self.include = [compile_rule(r) for r in include]
+        self.exclude = [compile_rule(r) for r in exclude]
+
+        # Identifies the rules, filters with the same rules share results.
+        self.key = (
+            tuple(rule_key(r) for r in include),
+            tuple(rule_key(r) for r in exclude)
+        )
+
+    @staticmethod
+    def load(cfg):
+
+        include = cfg.get("include", None, mandatory=False)
+        exclude = cfg.get("exclude", None, mandatory=False)
+
+        if not include and not exclude:
+            return None
+
+        if not include: include = []
+        if not exclude: exclude = []
+
+        if not isinstance(include, list) or not isinstance(exclude, list):
+            raise RuntimeError("Line include/exclude should be lists of rules")
+
+        return SplitFilter(include, exclude)
+
+    def match(self, spl):
+        if self.include and not any(r(spl) for r in self.include):
+            return False
+        return not any(r(spl) for r in self.exclude)
+
+    def apply(self, splits):
+
+        # Only backend split lists (see splits.Splits) remember results.
+        results = getattr(splits, "filtered", None)
+
+        if results is not None and self.key in results:
+            return results[self.key]
+
+        filtered = []
+        for spl in splits:
+            if spl.get("balance"):
+                raise RuntimeError(
+                    "Line filters can't be used with accounts which have "
+                    "balances rather than transactions"
+                )
+            if self.match(spl):
+                filtered.append(spl)
+
+        if results is not None:
+            results[self.key] = filtered
+
+        return filtered
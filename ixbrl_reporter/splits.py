@@ -0,0 +1,42 @@
+
+# Split lists returned by account backends, and the backends' record of
+# them.
+#
+# A backend remembers get_splits results per query, so the same query
+# from several computations is one scan.  The record is bounded, least
+# recently used lists being dropped first, so a long-running process
+# doesn't hold every query it has answered.  Each list carries its own
+# filtered versions (see SplitFilter.apply), which are dropped with it.
+
+from collections import OrderedDict
+
+# Lists remembered per backend.  A report makes a few queries per Line
+# and period, so this comfortably holds a report's working set.
+CACHE_SIZE = 2048
+
+class Splits(list):
+    def __init__(self, *args):
+        super().__init__(*args)
+        # Filter rules -> filtered splits.
+        self.filtered = {}
+
+class SplitCache:
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        splits = self.entries.get(key)
+        if splits is not None:
+            self.entries.move_to_end(key)
+        return splits
+
+    def put(self, key, splits):
+        self.entries[key] = splits
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
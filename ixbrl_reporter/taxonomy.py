@@ -6,12 +6,14 @@ from . fact import (
 )
 
 from . period import Period
-from . config import NoneValue
+from . config import Config, NoneValue
 from . context import Context
 
 from datetime import datetime
+from collections import namedtuple
+import threading
 
-from lxml import objectify
+from . builder import ElementMaker
 
 xbrldi_ns = "http://xbrl.org/2006/xbrldi"
 
@@ -22,6 +24,10 @@ class NamedDimension:
         return expmem
 
 class TypedDimension:
+    def __init__(self):
+        # Namespace -> element maker.  Dimensions with the same definition
+        # share this.
+        self.makers = {}
     def describe(self, base):
 
         # FIXME: Assumes single tag, containing single value
@@ -37,24 +43,236 @@ class TypedDimension:
                 self.content["tag"]
             )
 
-        mkr = objectify.ElementMaker(
-            annotate=False,
-            namespace=ns,
-        )
+        # Other threads may be describing the same dimension, setdefault
+        # makes sure they all end up with one maker.
+        maker = self.makers.get(ns)
+        if maker is None:
+            maker = self.makers.setdefault(ns, ElementMaker(ns, nstag))
 
-        elt = mkr(tag, self.value)
+        elt = maker(tag, self.value)
 
         mem = base.xbrldi_maker.typedMember()
         mem.set("dimension", self.dim)
         mem.append(elt)
         return mem
 
+# How a datum id is tagged: tag name, whether the sign is reversed, and the
+# segments the fact is described with.
+Tag = namedtuple("Tag", ["name", "reversed", "dimensions"])
+
+# A segment's dimension definition.  Typed dimensions have content, and
+# element makers shared by every value; explicit ones map values to members.
+SegmentDef = namedtuple("SegmentDef", ["typed", "dim", "content", "makers"])
+
+# Taxonomy sections, and whether they must be present.
+SECTIONS = {
+    "contexts": True,
+    "metadata": True,
+    "namespaces": True,
+    "schema": True,
+    "tags": True,
+    "description-tags": False,
+    "document-metadata": False,
+    "note-templates": False,
+    "segment": False,
+    "segments": False,
+    "sign-reversed": False,
+}
+
+# The parts of a taxonomy which only depend on its configuration: tagging,
+# segments and namespaces.  One model can be shared by any number of
+# documents.  Lookups are looked up in the configuration when an id is
+# first seen and remembered in the model; the same id always gives the
+# same answer, so it doesn't matter which document asks first.  Filling
+# the lookups is done holding the model's lock, so documents produced on
+# other threads can share the model.  Remembered lookups are read without
+# the lock.
+class TaxonomyModel:
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+
+        # Held while filling the lookups below.  Re-entrant, as filling one
+        # lookup can fill another.
+        self.lock = threading.RLock()
+
+        # Tagging by datum id, and description tag names by computation id.
+        self.tags = {}
+        self.description_tags = {}
+
+        # Segment id -> SegmentDef, and (segment id, value) -> dimension.
+        self.segment_defs = {}
+        self.dimensions = {}
+
+        # Metadata id -> definition, indexed on first use.
+        self.metadata_defs = None
+
+        # (context, context id) -> xbrli:context element, so a context is
+        # only described once however many documents are produced.
+        # Documents number contexts in the order they are used, so
+        # documents of the same report share ids.
+        self.context_elts = {}
+
+    # Per-document state for producing a report from a data source.
+    def document(self, data):
+        return Taxonomy(self.cfg, data, self)
+
+    def get_tag_name(self, id):
+        key = "tags.{0}".format(id)
+        return self.cfg.get(key, mandatory=False)
+
+    def get_sign_reversed(self, id):
+        key = "sign-reversed.{0}".format(id)
+        return self.cfg.get_bool(key, False)
+
+    def get_tag_dimensions(self, id):
+        key = "segments.{0}".format(id)
+        return self.cfg.get(key, mandatory=False)
+
+    def get_description_tag_name(self, id):
+        key = "description-tags.{0}".format(id)
+        return self.cfg.get(key, mandatory=False)
+
+    def get_segment_def(self, id):
+
+        sdef = self.segment_defs.get(id)
+        if sdef is not None:
+            return sdef
+
+        with self.lock:
+            if id not in self.segment_defs:
+                self.segment_defs[id] = self.load_segment_def(id)
+            return self.segment_defs[id]
+
+    def load_segment_def(self, id):
+
+        k = "segment.{0}.typed-dimension".format(id)
+        typed = self.cfg.get(k, mandatory=False)
+
+        if typed:
+            k = "segment.{0}.content".format(id)
+            return SegmentDef(True, typed, self.cfg.get(k), {})
+
+        k = "segment.{0}.dimension".format(id)
+        return SegmentDef(False, self.cfg.get(k), None, None)
+
+    def lookup_dimension(self, id, val):
+
+        key = (id, val)
+        dim = self.dimensions.get(key)
+        if dim is not None:
+            return dim
+
+        with self.lock:
+            if key not in self.dimensions:
+                self.dimensions[key] = self.load_dimension(id, val)
+            return self.dimensions[key]
+
+    def load_dimension(self, id, val):
+
+        sdef = self.get_segment_def(id)
+
+        if sdef.typed:
+            dim = TypedDimension()
+            dim.dim = sdef.dim
+            dim.content = sdef.content
+            dim.makers = sdef.makers
+            dim.value = val
+        else:
+            k = "segment.{0}.map.{1}".format(id, val)
+            dim = NamedDimension()
+            dim.dim = sdef.dim
+            dim.value = self.cfg.get(k)
+
+        return dim
+
+    def get_metadata_defs(self):
+
+        if self.metadata_defs is None:
+            with self.lock:
+                if self.metadata_defs is None:
+                    self.metadata_defs = {
+                        defn.get("id"): defn
+                        for defn in self.cfg.get("metadata")
+                    }
+
+        return self.metadata_defs
+
+    # Tag of a datum id, see Taxonomy.get_tag.
+    def get_tag(self, id, load):
+
+        tag = self.tags.get(id)
+        if tag is not None:
+            return tag
+
+        with self.lock:
+            if id not in self.tags:
+                self.tags[id] = load(id)
+            return self.tags[id]
+
+    # Description of a context, see BasicElement.create_contexts.
+    def get_context_elt(self, ctxt, id, make):
+
+        key = (ctxt, id)
+
+        elt = self.context_elts.get(key)
+        if elt is not None:
+            return elt
+
+        with self.lock:
+            if key not in self.context_elts:
+                self.context_elts[key] = make()
+            return self.context_elts[key]
+
+    def get_description_tag(self, id):
+
+        if id in self.description_tags:
+            return self.description_tags[id]
+
+        with self.lock:
+            if id not in self.description_tags:
+                self.description_tags[id] = self.get_description_tag_name(id)
+            return self.description_tags[id]
+
+    def get_metadata_def(self, id):
+        return self.get_metadata_defs().get(id)
+
+    def get_namespaces(self):
+        key = "namespaces"
+        return self.cfg.get(key)
+
+    def get_schemas(self):
+        key = "schema"
+        return self.cfg.get(key)
+
+# A taxonomy applied to one document: the contexts and metadata facts
+# worked out from a data source, and the contexts facts have used.  Static
+# parts of the taxonomy come from a TaxonomyModel, which is created if one
+# isn't given.
 class Taxonomy:
-    def __init__(self, cfg, data):
+
+    # Datum type -> fact creation method.
+    fact_makers = {
+        StringDatum: "create_string_fact",
+        DateDatum: "create_date_fact",
+        MoneyDatum: "create_money_fact",
+        BoolDatum: "create_bool_fact",
+        CountDatum: "create_count_fact",
+        NumberDatum: "create_number_fact",
+        VariableDatum: "create_variable_fact",
+    }
+
+    def __init__(self, cfg, data, model=None):
         self.cfg = cfg
+
+        if model is None:
+            model = TaxonomyModel(cfg)
+        self.model = model
+
         self.contexts = {}
         self.next_context_id = 0
         self.contexts_used = set()
+
         self.root_context = Context(None)
 
         self.decimals = data.get_config("metadata.accounting.decimals", 2)
@@ -67,12 +285,97 @@ class Taxonomy:
             ctxt = self.load_context(defn, data, self.contexts)
             self.contexts[defn.get("id")] = ctxt
 
-        meta = {}
-        for defn in cfg.get("metadata"):
-            fact = self.load_metadata(data, defn, self.contexts)
-            if fact:
-                meta[defn.get("id")] = fact
-        self.metadata = meta
+        # Metadata id -> fact.  Facts are made when a report first asks for
+        # them, so metadata the report doesn't use costs nothing, and its
+        # contexts aren't output.
+        self.data = data
+        self.metadata = {}
+
+    # Compile a taxonomy file, with its imports, into an artifact which can
+    # be imported in its place.  The taxonomy is checked first.
+    @staticmethod
+    def compile(file, out):
+        cfg = Config.load(file)
+        Taxonomy.validate(cfg)
+        Config.write_artifact(cfg, "taxonomy", out)
+
+    # Checks the structure of a taxonomy, reporting every problem found.
+    @staticmethod
+    def validate(cfg):
+
+        errs = []
+
+        for k in cfg:
+            if k not in SECTIONS:
+                errs.append("unknown section '%s'" % k)
+
+        for k, mandatory in SECTIONS.items():
+            if mandatory and k not in cfg:
+                errs.append("no '%s' section" % k)
+
+        def section(k, typ):
+            val = cfg.get(k, mandatory=False)
+            if not val:
+                return typ()
+            if not isinstance(val, typ):
+                errs.append("'%s' has the wrong type" % k)
+                return typ()
+            return val
+
+        namespaces = section("namespaces", dict)
+
+        ctxts = set()
+        for defn in section("contexts", list):
+            id = defn.get("id", mandatory=False)
+            if not id:
+                errs.append("context without an id")
+                continue
+            if id in ctxts:
+                errs.append("context '%s' defined more than once" % id)
+            frm = defn.get("from", mandatory=False)
+            if frm and frm not in ctxts:
+                errs.append("context '%s' is from unknown context '%s'" %
+                            (id, frm))
+            segs = defn.get("segments", mandatory=False)
+            if segs and (
+                    not isinstance(segs, list) or
+                    any(not isinstance(v, dict) or len(v) != 1 for v in segs)
+            ):
+                errs.append("context '%s' segments should be array of "
+                            "single item maps" % id)
+            ctxts.add(id)
+
+        meta = set()
+        for defn in section("metadata", list):
+            id = defn.get("id", mandatory=False)
+            if not id:
+                errs.append("metadata without an id")
+                continue
+            if id in meta:
+                errs.append("metadata '%s' defined more than once" % id)
+            if defn.get("context", mandatory=False) not in ctxts:
+                errs.append("metadata '%s' has unknown context" % id)
+            if "config" not in defn and "value" not in defn:
+                errs.append("metadata '%s' has no config or value" % id)
+            meta.add(id)
+
+        for k in ["tags", "description-tags"]:
+            for id, tag in section(k, dict).items():
+                if not isinstance(tag, str) or \
+                   tag.split(":")[0] not in namespaces:
+                    errs.append("%s '%s' has tag '%s' without a namespace" %
+                                (k, id, tag))
+
+        for id, sdef in section("segment", dict).items():
+            if "typed-dimension" in sdef:
+                if "content" not in sdef:
+                    errs.append("segment '%s' typed dimension has no "
+                                "content" % id)
+            elif "dimension" not in sdef or "map" not in sdef:
+                errs.append("segment '%s' needs a dimension and map" % id)
+
+        if errs:
+            raise RuntimeError("Taxonomy is not valid: " + "; ".join(errs))
 
     def get_context_id(self, ctxt):
         if ctxt in self.contexts:
@@ -85,73 +388,53 @@ class Taxonomy:
 
     def create_fact(self, val):
 
-        if isinstance(val, StringDatum):
-            return self.create_string_fact(val)
-
-        if isinstance(val, DateDatum):
-            return self.create_date_fact(val)
+        for cls in type(val).__mro__:
+            if cls in self.fact_makers:
+                return getattr(self, self.fact_makers[cls])(val)
 
-        if isinstance(val, MoneyDatum):
-            return self.create_money_fact(val)
-
-        if isinstance(val, BoolDatum):
-            return self.create_bool_fact(val)
-
-        if isinstance(val, CountDatum):
-            return self.create_count_fact(val)
+        raise RuntimeError("Not implemented: " + str(type(val)))
 
-        if isinstance(val, NumberDatum):
-            return self.create_number_fact(val)
+    def create_variable_fact(self, val):
+        return self.get_metadata_by_id(val.value)
 
-        if isinstance(val, VariableDatum):
-            return self.get_metadata_by_id(val.value)
+    # Tagging is remembered in the model, so it's shared by every
+    # document using it.
+    def get_tag(self, id):
+        return self.model.get_tag(id, self.load_tag)
 
-        raise RuntimeError("Not implemented: " + str(type(val)))
+    def load_tag(self, id):
+        return Tag(
+            self.get_tag_name(id), self.get_sign_reversed(id),
+            self.get_tag_dimensions(id)
+        )
 
     def get_tag_name(self, id):
-        key = "tags.{0}".format(id)
-        return self.cfg.get(key, mandatory=False)
+        return self.model.get_tag_name(id)
 
     def get_sign_reversed(self, id):
-        key = "sign-reversed.{0}".format(id)
-        return self.cfg.get_bool(key, False)
+        return self.model.get_sign_reversed(id)
 
     def get_tag_dimensions(self, id):
-        key = "segments.{0}".format(id)
-        return self.cfg.get(key, mandatory=False)
+        return self.model.get_tag_dimensions(id)
 
     def get_description_tag_name(self, id):
-        key = "description-tags.{0}".format(id)
-        return self.cfg.get(key, mandatory=False)
+        return self.model.get_description_tag_name(id)
+
+    def get_context_elt(self, ctxt, id, make):
+        return self.model.get_context_elt(ctxt, id, make)
 
     def create_description_fact(self, meta, desc, context):
         fact = StringFact(self.get_context_id(context),
-                          self.get_description_tag_name(meta.id), desc)
-        fact.dimensions = self.get_tag_dimensions(meta.id)
+                          self.model.get_description_tag(meta.id), desc)
+        fact.dimensions = self.get_tag(meta.id).dimensions
         self.observe_fact(fact)
         return fact
 
-    def lookup_dimension(self, id, val):
+    def get_segment_def(self, id):
+        return self.model.get_segment_def(id)
 
-        try:
-            k1 = "segment.{0}.typed-dimension".format(
-                id
-            )
-            k2 = "segment.{0}.content".format(id)
-            dim = TypedDimension()
-            dim.dim = self.cfg.get(k1)
-            dim.content = self.cfg.get(k2)
-            dim.value = val
-            return dim
-        except:
-            pass
-
-        k1 = "segment.{0}.dimension".format(id)
-        k2 = "segment.{0}.map.{1}".format(id, val)
-        dim = NamedDimension()
-        dim.dim = self.cfg.get(k1)
-        dim.value = self.cfg.get(k2)
-        return dim
+    def lookup_dimension(self, id, val):
+        return self.model.lookup_dimension(id, val)
 
     def observe_fact(self, fact):
         # Keep track of which contexts are used.  Contexts which are
@@ -161,48 +444,54 @@ class Taxonomy:
             self.contexts_used.add(fact.context)
 
     def create_money_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = MoneyFact(self.get_context_id(val.context),
-                         self.get_tag_name(val.id), val.value,
+                         tag.name, val.value,
                          self.currency,
                          self.scale,
                          self.decimals,
-                         self.get_sign_reversed(val.id))
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                         tag.reversed)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
     def create_count_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = CountFact(self.get_context_id(val.context),
-                         self.get_tag_name(val.id), val.value)
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                         tag.name, val.value)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
     def create_number_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = NumberFact(self.get_context_id(val.context),
-                          self.get_tag_name(val.id), val.value)
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                          tag.name, val.value)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
     def create_string_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = StringFact(self.get_context_id(val.context),
-                          self.get_tag_name(val.id), val.value)
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                          tag.name, val.value)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
     def create_bool_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = BoolFact(self.get_context_id(val.context),
-                        self.get_tag_name(val.id), val.value)
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                        tag.name, val.value)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
     def create_date_fact(self, val):
+        tag = self.get_tag(val.id)
         fact = DateFact(self.get_context_id(val.context),
-                        self.get_tag_name(val.id), val.value)
-        fact.dimensions = self.get_tag_dimensions(val.id)
+                        tag.name, val.value)
+        fact.dimensions = tag.dimensions
         self.observe_fact(fact)
         return fact
 
@@ -220,12 +509,10 @@ class Taxonomy:
         return ctxt
 
     def get_namespaces(self):
-        key = "namespaces"
-        return self.cfg.get(key)
+        return self.model.get_namespaces()
 
     def get_schemas(self):
-        key = "schema"
-        return self.cfg.get(key)
+        return self.model.get_schemas()
 
     def get_predefined_contexts(self):
 
@@ -296,29 +583,37 @@ class Taxonomy:
 
     def get_document_metadata(self, data):
 
-        ctxts = self.get_predefined_contexts()
-
         ids = self.cfg.get("document-metadata")
 
         meta = []
 
         for id in ids:
-            if id in self.metadata:
-                meta.append(self.metadata[id])
+            fact = self.get_metadata_by_id(id)
+            if fact:
+                meta.append(fact)
 
         return meta
 
     def get_metadata_by_id(self, id):
 
-        if id in self.metadata:
-            return self.metadata[id]
+        if id not in self.metadata:
+
+            defn = self.model.get_metadata_def(id)
+            if defn is None:
+                return NoneValue()
 
-        return NoneValue()
+            self.metadata[id] = self.load_metadata(
+                self.data, defn, self.contexts
+            )
+
+        return self.metadata[id]
 
     def get_all_metadata(self, id):
 
-        meta = [self.metadata[v] for v in self.metadata]
-        return meta
+        meta = [
+            self.get_metadata_by_id(v) for v in self.model.get_metadata_defs()
+        ]
+        return [fact for fact in meta if fact]
 
     def load_metadata(self, data, defn, ctxts):
 
@@ -35,6 +35,22 @@ class TestGetClass:
         with patch('ixbrl_reporter.accounts_csv.Accounts', mock_accounts_class):
             result = get_class("csv")
             assert result == mock_accounts_class
+
+    def test_get_trial_balance_class(self):
+        """get_class('trial-balance') should return trial balance Accounts class"""
+        mock_accounts_class = Mock()
+
+        with patch('ixbrl_reporter.accounts_trial_balance.Accounts', mock_accounts_class):
+            result = get_class("trial-balance")
+            assert result == mock_accounts_class
+
+    def test_get_union_class(self):
+        """get_class('union') should return union Accounts class"""
+        mock_accounts_class = Mock()
+
+        with patch('ixbrl_reporter.accounts_union.Accounts', mock_accounts_class):
+            result = get_class("union")
+            assert result == mock_accounts_class
     
     def test_get_unknown_class_raises_error(self):
         """get_class with unknown kind should raise RuntimeError"""
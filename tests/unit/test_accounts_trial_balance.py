@@ -0,0 +1,160 @@
+"""
+Unit tests for ixbrl_reporter.accounts_trial_balance module
+"""
+import pytest
+from datetime import date
+
+from ixbrl_reporter.accounts_trial_balance import Accounts
+from ixbrl_reporter.split_filter import SplitFilter
+
+
+TRIAL_BALANCE = """Account,Type,Start,End,Opening,Movement
+Income:Sales,INCOME,2019-01-01,2019-12-31,0.00,-1000.00
+Income:Sales,INCOME,2020-01-01,2020-12-31,-1000.00,-1500.00
+Assets:Bank,ASSET,2019-01-01,2019-12-31,200.00,"1,000.00"
+Assets:Bank,ASSET,2020-01-01,2020-12-31,1200.00,300.00
+Assets:Cash,,2019-01-01,2019-12-31,0.00,50.00
+R&D:Staff,EXPENSE,2020-01-01,2020-12-31,0.00,75.00
+"""
+
+
+@pytest.fixture
+def tb(tmp_path):
+    path = tmp_path / "tb.csv"
+    path.write_text(TRIAL_BALANCE)
+    return Accounts(str(path))
+
+
+def total(tb, acct, start, end):
+    return sum(s["amount"] for s in tb.get_splits(acct, start, end))
+
+
+class TestTrialBalanceQueries:
+    """Test answering Line queries from balances"""
+
+    def test_in_year_is_movement(self, tb):
+        """An in-year query should give the period movement"""
+        assert total(tb, "Income:Sales", date(2020, 1, 1), date(2020, 12, 31)) \
+            == -1500.0
+
+    def test_at_end_is_closing_balance(self, tb):
+        """A query from the beginning of time gives the closing balance"""
+        assert total(tb, "Assets:Bank", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 1500.0
+
+    def test_at_start_is_opening_balance(self, tb):
+        """A query to the day before a period gives its opening balance"""
+        assert total(tb, "Assets:Bank", date(1970, 1, 1), date(2019, 12, 31)) \
+            == 1200.0
+        assert total(tb, "Assets:Bank", date(1970, 1, 1), date(2018, 12, 31)) \
+            == 200.0
+
+    def test_parent_account_sums_children(self, tb):
+        """Parent accounts should include their children"""
+        assert total(tb, "Assets", date(2019, 1, 1), date(2019, 12, 31)) \
+            == 1050.0
+
+    def test_top_level_account_sums_grandchildren(self, tb):
+        """Balances should roll up through every parent account"""
+        assert total(tb, "R&D", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 75.0
+        assert total(tb, "Assets", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 1550.0
+
+    def test_unknown_account_is_zero(self, tb):
+        """Accounts not in the file have no balance"""
+        assert total(tb, "Liabilities", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 0.0
+        assert total(tb, "Asset", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 0.0
+
+    def test_missing_period_carries_balance(self, tb):
+        """An account without a row for a period had no movement"""
+        assert total(tb, "Assets:Cash", date(2020, 1, 1), date(2020, 12, 31)) \
+            == 0.0
+        assert total(tb, "Assets:Cash", date(1970, 1, 1), date(2020, 12, 31)) \
+            == 50.0
+
+    def test_single_split_returned(self, tb):
+        """Queries should be answered with one split"""
+        splits = tb.get_splits("Assets", date(2020, 1, 1), date(2020, 12, 31))
+        assert len(splits) == 1
+        assert splits[0]["date"] == date(2020, 12, 31)
+
+    def test_unknown_boundary_raises_error(self, tb):
+        """Queries must line up with the periods in the file"""
+        with pytest.raises(RuntimeError, match="no balances at 2020-06-30"):
+            tb.get_splits("Assets", date(2020, 1, 1), date(2020, 6, 30))
+
+
+class TestTrialBalanceAccounts:
+    """Test account handling"""
+
+    def test_get_account(self, tb):
+        """Accounts should be located by name"""
+        assert tb.get_account(None, "Assets") == "Assets"
+        assert tb.get_account("Assets", "Bank") == "Assets:Bank"
+
+    def test_get_accounts(self, tb):
+        """All accounts in the file should be listed"""
+        assert sorted(tb.get_accounts()) == [
+            "Assets:Bank", "Assets:Cash", "Income:Sales", "R&D:Staff"
+        ]
+
+    def test_get_accounts_prefix(self, tb):
+        """Listed accounts should be given the prefix"""
+        assert sorted(tb.get_accounts("Assets", "tb:")) == [
+            "tb:Assets:Bank", "tb:Assets:Cash"
+        ]
+
+    def test_is_debit_uses_type(self, tb):
+        """The Type column should decide account type"""
+        assert tb.is_debit("Income:Sales")
+        assert tb.is_debit("R&D:Staff")
+        assert not tb.is_debit("Assets:Bank")
+
+    def test_is_debit_guesses_from_name(self, tb):
+        """Without a type, the account name decides"""
+        assert not tb.is_debit("Assets:Cash")
+        assert tb.is_debit("Expenses:Rent")
+
+    def test_is_debit_parent_from_children(self, tb):
+        """A parent account should have the type of its typed children"""
+        assert tb.is_debit("R&D")
+        assert tb.is_debit("Income")
+        assert not tb.is_debit("Assets")
+
+    def test_is_debit_parent_children_disagree(self, tmp_path):
+        """Children with different types leave the parent guessed by name"""
+        path = tmp_path / "tb.csv"
+        path.write_text(
+            "Account,Type,Start,End,Opening,Movement\n"
+            "Other:Grant,INCOME,2020-01-01,2020-12-31,0.00,-10.00\n"
+            "Other:Deposit,ASSET,2020-01-01,2020-12-31,0.00,10.00\n"
+        )
+        assert not Accounts(str(path)).is_debit("Other")
+
+    def test_opening_balance_disagrees(self, tmp_path):
+        """An opening balance unlike the last closing balance is an error"""
+        path = tmp_path / "tb.csv"
+        path.write_text(
+            "Account,Start,End,Opening,Movement\n"
+            "Assets:Bank,2020-01-01,2020-12-31,1200.00,300.00\n"
+            "Assets:Bank,2019-01-01,2019-12-31,200.00,900.00\n"
+        )
+        with pytest.raises(RuntimeError, match="1200.00 and 1100.00"):
+            Accounts(str(path))
+
+    def test_filter_raises_error(self, tb):
+        """Line filters have no transactions to work on"""
+        f = SplitFilter([], [{"description": "closing"}])
+        splits = tb.get_splits("Assets", date(2019, 1, 1), date(2019, 12, 31))
+        with pytest.raises(RuntimeError, match="Line filters"):
+            f.apply(splits)
+
+    def test_empty_file_raises_error(self, tmp_path):
+        """A trial balance with no rows is an error"""
+        path = tmp_path / "empty.csv"
+        path.write_text("Account,Start,End,Opening,Movement\n")
+        with pytest.raises(RuntimeError, match="has no balances"):
+            Accounts(str(path))
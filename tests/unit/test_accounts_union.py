@@ -0,0 +1,144 @@
+"""
+Unit tests for ixbrl_reporter.accounts_union module
+"""
+import pytest
+import threading
+from unittest.mock import patch
+from datetime import date
+
+from ixbrl_reporter.accounts_union import Accounts
+
+
+class FakeAccounts:
+    """Minimal account source: name -> list of splits"""
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.thread = threading.current_thread()
+
+    def get_accounts(self):
+        return list(self.ledger.keys())
+
+    def get_account(self, par, name):
+        return name
+
+    def get_splits(self, acct, start, end, endinclusive=True):
+        return [
+            spl
+            for name, splits in self.ledger.items()
+            if name == acct or name.startswith(acct + ":")
+            for spl in splits
+            if spl["date"] >= start and spl["date"] <= end
+        ]
+
+    def is_debit(self, acct):
+        return acct.startswith("Income")
+
+
+LEDGERS = {
+    "book.gnucash": {
+        "Income:Sales": [{"date": date(2020, 3, 1), "amount": -100.0}],
+        "Expenses:Rent": [{"date": date(2020, 4, 1), "amount": 20.0}],
+    },
+    "payroll.csv": {
+        "Expenses:Salaries": [{"date": date(2020, 5, 1), "amount": 50.0}],
+        "Expenses:Rent": [{"date": date(2020, 6, 1), "amount": 5.0}],
+    },
+}
+
+SOURCES = [
+    {"kind": "piecash", "file": "book.gnucash"},
+    {"kind": "csv", "file": "payroll.csv"},
+]
+
+
+@pytest.fixture
+def union():
+    with patch('ixbrl_reporter.accounts_union.accounts') as mock_accounts:
+        mock_accounts.get_class.return_value = \
+            lambda file: FakeAccounts(LEDGERS[file])
+        yield Accounts(SOURCES)
+
+
+class TestUnionLoad:
+    """Test loading union sources"""
+
+    def test_sources_loaded_on_worker_threads(self, union):
+        """Sources should be opened on the thread pool"""
+        assert len(union.sources) == 2
+        for src in union.sources:
+            assert src.session.thread is not threading.main_thread()
+
+    def test_no_sources_raises_error(self):
+        """A union needs something to combine"""
+        with pytest.raises(RuntimeError, match="at least one source"):
+            Accounts([])
+
+    def test_nested_union_raises_error(self):
+        """Union sources can't themselves be unions"""
+        with pytest.raises(RuntimeError, match="can't be a union source"):
+            Accounts([{"kind": "union", "file": "x"}])
+
+    def test_source_error_propagates(self):
+        """A source failing to load should fail the union"""
+        with patch('ixbrl_reporter.accounts_union.accounts') as mock_accounts:
+            mock_accounts.get_class.side_effect = RuntimeError(
+                "Accounts kind 'bad' not known"
+            )
+            with pytest.raises(RuntimeError, match="'bad' not known"):
+                Accounts([{"kind": "bad", "file": "x"}])
+
+
+class TestUnionAccounts:
+    """Test the merged account namespace"""
+
+    def test_get_accounts_merges_names(self, union):
+        """Account names from all sources, including parents"""
+        assert union.get_accounts() == [
+            "Expenses", "Expenses:Rent", "Expenses:Salaries",
+            "Income", "Income:Sales"
+        ]
+
+    def test_get_accounts_under_parent(self, union):
+        """Child account names should be relative to the parent"""
+        acct = union.get_account(None, "Expenses")
+        assert union.get_accounts(acct) == ["Rent", "Salaries"]
+
+    def test_get_account_members(self, union):
+        """An account should include each source which has it"""
+        assert len(union.get_account(None, "Expenses:Rent").members) == 2
+        assert len(union.get_account(None, "Income").members) == 1
+
+    def test_get_account_with_parent(self, union):
+        """Locators should be resolved relative to a parent"""
+        par = union.get_account(None, "Expenses")
+        assert union.get_account(par, "Salaries").name == "Expenses:Salaries"
+
+    def test_unknown_account_raises_error(self, union):
+        """An account in no source is an error"""
+        with pytest.raises(RuntimeError, match="Can't locate account 'Assets'"):
+            union.get_account(None, "Assets")
+
+    def test_get_splits_from_all_sources(self, union):
+        """Splits should be combined across sources"""
+        acct = union.get_account(None, "Expenses")
+        splits = union.get_splits(acct, date(2020, 1, 1), date(2020, 12, 31))
+        assert sum(s["amount"] for s in splits) == 75.0
+
+    def test_get_splits_respects_period(self, union):
+        """Only splits in the period should be returned"""
+        acct = union.get_account(None, "Expenses:Rent")
+        splits = union.get_splits(acct, date(2020, 1, 1), date(2020, 4, 30))
+        assert [s["amount"] for s in splits] == [20.0]
+
+    def test_get_splits_remembered(self, union):
+        """The same query should return the same list"""
+        acct = union.get_account(None, "Expenses")
+        a = union.get_splits(acct, date(2020, 1, 1), date(2020, 12, 31))
+        b = union.get_splits(acct, date(2020, 1, 1), date(2020, 12, 31))
+        assert a is b
+
+    def test_is_debit_from_source(self, union):
+        """Debit handling should come from the source"""
+        assert union.is_debit(union.get_account(None, "Income"))
+        assert not union.is_debit(union.get_account(None, "Expenses"))
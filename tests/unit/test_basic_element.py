@@ -3,10 +3,12 @@ Unit tests for ixbrl_reporter.basic_element module
 """
 import pytest
 from unittest.mock import Mock, MagicMock, patch, call
-from io import StringIO
+from io import BytesIO
 from lxml import objectify, etree
 
 from ixbrl_reporter.basic_element import BasicElement
+from ixbrl_reporter.fact import MoneyFact, StringFact, CountFact
+from ixbrl_reporter.taxonomy import TaxonomyModel
 
 
 class TestBasicElementInit:
@@ -63,17 +65,18 @@ class TestBasicElementAddMakers:
         """add_makers should create all required element makers"""
         nsmap = {"test": "http://test.namespace"}
         
-        with patch('ixbrl_reporter.basic_element.objectify.ElementMaker') as mock_maker_class:
-            # Create enough mocks for the 5 ElementMaker calls
-            mock_makers = [Mock() for _ in range(6)]  # Extra one for xbrldi
+        with patch('ixbrl_reporter.basic_element.ElementMaker') as mock_maker_class:
+            # Create enough mocks for the ElementMaker calls
+            mock_makers = [Mock() for _ in range(7)]  # Root and 6 namespaces
             mock_maker_class.side_effect = mock_makers
             
             self.element.add_makers(nsmap)
         
-        # Should create 6 different makers (including xbrldi)
-        assert mock_maker_class.call_count == 6
+        # Should create 7 different makers (including root)
+        assert mock_maker_class.call_count == 7
         
         # Verify all makers are set
+        assert hasattr(self.element, 'root_maker')
         assert hasattr(self.element, 'xhtml_maker')
         assert hasattr(self.element, 'ix_maker')
         assert hasattr(self.element, 'xlink_maker')
@@ -85,31 +88,27 @@ class TestBasicElementAddMakers:
         """add_makers should use correct namespaces"""
         nsmap = {"custom": "http://custom.namespace"}
         
-        with patch('ixbrl_reporter.basic_element.objectify.ElementMaker') as mock_maker_class:
-            self.element.add_makers(nsmap)
-        
-        # Check namespace arguments
-        calls = mock_maker_class.call_args_list
-        
-        # XHTML maker should include nsmap
-        xhtml_call = calls[0]
-        assert xhtml_call[1]['nsmap'] == nsmap
-        assert xhtml_call[1]['namespace'] == "http://www.w3.org/1999/xhtml"
+        self.element.add_makers(nsmap)
         
-        # IX maker
-        ix_call = calls[1]
-        assert ix_call[1]['namespace'] == "http://www.xbrl.org/2013/inlineXBRL"
+        # Only the root maker declares the whole nsmap
+        assert self.element.root_maker.nsmap == nsmap
+        assert self.element.xhtml_maker.nsmap == {
+            None: "http://www.w3.org/1999/xhtml"
+        }
+        assert self.element.ix_maker.nsmap == {
+            "ix": "http://www.xbrl.org/2013/inlineXBRL"
+        }
     
-    def test_add_makers_annotate_false(self):
-        """add_makers should set annotate=False for all makers"""
-        nsmap = {}
+    def test_add_makers_plain_elements(self):
+        """add_makers should make plain etree elements"""
+        self.element.add_makers({None: "http://www.w3.org/1999/xhtml"})
         
-        with patch('ixbrl_reporter.basic_element.objectify.ElementMaker') as mock_maker_class:
-            self.element.add_makers(nsmap)
+        elt = self.element.xhtml_maker.div({"class": "x"}, "text")
         
-        # All calls should have annotate=False
-        for call_args in mock_maker_class.call_args_list:
-            assert call_args[1]['annotate'] is False
+        assert type(elt) is etree._Element
+        assert elt.tag == "{http://www.w3.org/1999/xhtml}div"
+        assert elt.get("class") == "x"
+        assert elt.text == "text"
 
 
 class TestBasicElementInitHtml:
@@ -382,7 +381,7 @@ class TestBasicElementToIxbrl:
         self.mock_data = Mock()
         self.element = BasicElement("test", self.mock_data)
         self.mock_taxonomy = Mock()
-        self.output = StringIO()
+        self.output = BytesIO()
     
     def test_to_ixbrl_basic_workflow(self):
         """to_ixbrl should generate iXBRL document and write to output"""
@@ -399,7 +398,7 @@ class TestBasicElementToIxbrl:
         
         # Note: to_ixbrl_tree is patched, so we can't check its calls
         # The key verification is that output was written
-        assert "<html>test</html>" in self.output.getvalue()
+        assert b"<html>test</html>" in self.output.getvalue()
         
         # Verify pretty-print config check
         self.mock_data.get_config_bool.assert_called_once_with("pretty-print", mandatory=False)
@@ -408,8 +407,21 @@ class TestBasicElementToIxbrl:
         mock_tostring.assert_called_once_with(mock_tree, xml_declaration=True)
         
         # Check output
-        assert self.output.getvalue() == '<html>test</html>'
+        assert self.output.getvalue() == b'<html>test</html>'
     
+    def test_to_ixbrl_binary_output(self):
+        """to_ixbrl should write bytes to a binary stream"""
+        output = BytesIO()
+
+        with patch.object(self.element, 'to_ixbrl_tree', return_value=Mock()):
+            with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
+                mock_tostring.return_value = b'<html>test</html>'
+                self.mock_data.get_config_bool.return_value = False
+
+                self.element.to_ixbrl(self.mock_taxonomy, output)
+
+        assert output.getvalue() == b'<html>test</html>'
+
     def test_to_ixbrl_pretty_print_enabled(self):
         """to_ixbrl should use pretty printing when enabled"""
         mock_tree = Mock()
@@ -428,7 +440,7 @@ class TestBasicElementToIxbrl:
             mock_tree, pretty_print=True, xml_declaration=True
         )
         
-        assert self.output.getvalue() == '<html>\n  <body>test</body>\n</html>'
+        assert self.output.getvalue() == b'<html>\n  <body>test</body>\n</html>'
     
     def test_to_ixbrl_return_value(self):
         """to_ixbrl should return None"""
@@ -450,85 +462,71 @@ class TestBasicElementToHtml:
     def setup_method(self):
         """Set up common test fixtures"""
         self.mock_data = Mock()
+        self.mock_data.get_config.side_effect = lambda key: {
+            "report.title": Mock(),
+            "report.style": "body {}",
+        }[key]
+        self.mock_data.get_config_bool.return_value = False
         self.element = BasicElement("test", self.mock_data)
         self.mock_taxonomy = Mock()
-        self.output = StringIO()
-        
-        # Mock xhtml_maker
-        self.element.xhtml_maker = Mock()
-    
-    def test_to_html_ix_element_conversion(self):
-        """to_html should convert ix: elements to span elements"""
-        # Create a mock iXBRL tree
-        mock_ixbrl_tree = Mock()
-        
-        # Mock the element's attributes for ix namespace conversion
-        mock_ixbrl_tree.nsmap = {None: "http://www.xbrl.org/2013/inlineXBRL"}
-        mock_ixbrl_tree.prefix = None
-        mock_ixbrl_tree.tag = "{http://www.xbrl.org/2013/inlineXBRL}nonfraction"
-        mock_ixbrl_tree.text = "1000"
-        mock_ixbrl_tree.iterchildren.return_value = []
-        
-        # Mock span creation
-        mock_span = Mock()
-        self.element.xhtml_maker.span.return_value = mock_span
-        
-        with patch.object(self.element, 'to_ixbrl_tree', return_value=mock_ixbrl_tree):
-            with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
-                mock_tostring.return_value = b'<html>converted</html>'
-                self.mock_data.get_config_bool.return_value = False
-                
-                self.element.to_html(self.mock_taxonomy, self.output)
-        
-        # Should have created span for ix element
-        self.element.xhtml_maker.span.assert_called()
-    
-    def test_to_html_header_conversion(self):
-        """to_html should convert ix:header to empty span"""
-        mock_ixbrl_tree = Mock()
-        mock_ixbrl_tree.nsmap = {None: "http://www.xbrl.org/2013/inlineXBRL"}
-        mock_ixbrl_tree.prefix = None
-        mock_ixbrl_tree.tag = "{http://www.xbrl.org/2013/inlineXBRL}header"
-        mock_ixbrl_tree.iterchildren.return_value = []
-        
-        mock_empty_span = Mock()
-        self.element.xhtml_maker.span.return_value = mock_empty_span
-        
-        with patch.object(self.element, 'to_ixbrl_tree', return_value=mock_ixbrl_tree):
-            with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
-                mock_tostring.return_value = b'<html>converted</html>'
-                self.mock_data.get_config_bool.return_value = False
-                
-                self.element.to_html(self.mock_taxonomy, self.output)
-        
-        # Should create empty span for header
-        self.element.xhtml_maker.span.assert_called_with("")
-    
+        self.mock_taxonomy.get_namespaces.return_value = {}
+        self.output = BytesIO()
+
+    def render(self, *facts):
+        """Render the element with the report body made of facts"""
+        def elts(par, taxonomy):
+            return [fact.to_elt(par) for fact in facts]
+        with patch.object(self.element, 'to_ixbrl_elt', side_effect=elts,
+                          create=True):
+            return self.element.to_html_tree(self.mock_taxonomy)
+
+    def test_to_html_facts_untagged(self):
+        """Facts should be rendered as plain spans"""
+        html = self.render(
+            MoneyFact("ctxt-1", "uk-core:Turnover", 1000, "GBP", 0, 2),
+            StringFact("ctxt-1", "uk-bus:EntityName", "Example Ltd"),
+        )
+
+        ix = "{http://www.xbrl.org/2013/inlineXBRL}"
+        assert list(html.iter(ix + "nonFraction", ix + "nonNumeric")) == []
+
+        report = html.find(".//{http://www.w3.org/1999/xhtml}div[@id='report']")
+        assert [e.text for e in report] == ["1,000.00", "Example Ltd"]
+        assert [e.attrib for e in report] == [{}, {}]
+        assert self.element.tag_facts is False
+
+    def test_to_html_no_header(self):
+        """There should be no iXBRL header, contexts or ix namespace"""
+        html = self.render()
+
+        assert html.nsmap == {None: "http://www.w3.org/1999/xhtml"}
+        hidden = html.find(".//{http://www.w3.org/1999/xhtml}div[@class='hidden']")
+        assert [e.tag for e in hidden] == ["{http://www.w3.org/1999/xhtml}span"]
+        self.mock_taxonomy.get_document_metadata.assert_not_called()
+
+    def test_to_ixbrl_tags_facts_after_html(self):
+        """Rendering iXBRL after HTML should tag facts again"""
+        self.render()
+        self.element.tag_facts = True
+
+        fact = StringFact("ctxt-1", "uk-bus:EntityName", "Example Ltd")
+        elt = fact.to_elt(self.element)
+        assert elt.tag == "{http://www.xbrl.org/2013/inlineXBRL}nonNumeric"
+
     def test_to_html_pretty_print(self):
         """to_html should respect pretty-print configuration"""
         mock_tree = Mock()
         
-        with patch.object(self.element, 'to_ixbrl_tree', return_value=mock_tree):
-            # Mock the walk function by patching it
+        with patch.object(self.element, 'to_html_tree', return_value=mock_tree):
             with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
                 mock_tostring.return_value = b'<html>\n  <body/>\n</html>'
                 self.mock_data.get_config_bool.return_value = True
                 
-                # Mock the walk function result
-                mock_converted_tree = Mock()
-                with patch.object(self.element, 'to_ixbrl_tree', return_value=mock_converted_tree):
-                    # Set up basic attributes to prevent AttributeError
-                    mock_converted_tree.nsmap = {"test": "http://test.ns"}
-                    mock_converted_tree.prefix = "test"
-                    mock_converted_tree.tag = "html"
-                    mock_converted_tree.text = None
-                    mock_converted_tree.keys.return_value = []
-                    mock_converted_tree.iterchildren.return_value = []
-                    
-                    self.element.to_html(self.mock_taxonomy, self.output)
+                self.element.to_html(self.mock_taxonomy, self.output)
         
         # Should use pretty printing
         assert mock_tostring.call_args[1]['pretty_print'] is True
+        assert self.output.getvalue() == b'<html>\n  <body/>\n</html>'
 
 
 class TestBasicElementToIxbrlTree:
@@ -567,22 +565,22 @@ class TestBasicElementToIxbrlTree:
         with patch.object(self.element, 'init_html') as mock_init:
             with patch.object(self.element, 'add_style') as mock_add_style:
                 with patch.object(self.element, 'create_metadata') as mock_create_meta:
-                    with patch.object(self.element, 'create_contexts') as mock_create_contexts:
+                    with patch.object(self.element, 'check_duplicate_facts'), patch.object(self.element, 'create_contexts') as mock_create_contexts:
                         with patch.object(self.element, 'to_ixbrl_elt', return_value=[], create=True):
-                            # Set up minimal structure to avoid ObjectPath errors
+                            # Set up minimal structure
                             mock_html = Mock()
                             mock_html.head = Mock()
                             mock_html.body = Mock()
                             self.element.html = mock_html
                             
-                            # Mock header structure to avoid ObjectPath errors
+                            # Mock header structure
                             mock_header = Mock()
                             mock_header.resources = Mock()
-                            with patch('ixbrl_reporter.basic_element.objectify.ObjectPath') as mock_path:
-                                mock_path.return_value.return_value = mock_header
+                            with patch('ixbrl_reporter.basic_element.Header', return_value=mock_header):
                                 
                                 # Mock makers
                                 # Mock all required makers
+                                self.element.root_maker = Mock()
                                 self.element.xhtml_maker = Mock()
                                 self.element.ix_maker = Mock()
                                 self.element.link_maker = Mock()
@@ -621,7 +619,7 @@ class TestBasicElementToIxbrlTree:
         with patch.object(self.element, 'init_html'):
             with patch.object(self.element, 'add_style'):
                 with patch.object(self.element, 'create_metadata'):
-                    with patch.object(self.element, 'create_contexts'):
+                    with patch.object(self.element, 'check_duplicate_facts'), patch.object(self.element, 'create_contexts'):
                         with patch.object(self.element, 'to_ixbrl_elt', return_value=[], create=True):
                             # Mock required components
                             mock_html = Mock()
@@ -631,10 +629,10 @@ class TestBasicElementToIxbrlTree:
                             
                             mock_header = Mock()
                             mock_header.resources = Mock()
-                            with patch('ixbrl_reporter.basic_element.objectify.ObjectPath') as mock_path:
-                                mock_path.return_value.return_value = mock_header
+                            with patch('ixbrl_reporter.basic_element.Header', return_value=mock_header):
                                 
                                 # Mock all required makers
+                                self.element.root_maker = Mock()
                                 self.element.xhtml_maker = Mock()
                                 self.element.ix_maker = Mock()
                                 self.element.link_maker = Mock()
@@ -669,10 +667,11 @@ class TestBasicElementToIxbrlTree:
         with patch.object(self.element, 'init_html'):
             with patch.object(self.element, 'add_style'):
                 with patch.object(self.element, 'create_metadata'):
-                    with patch.object(self.element, 'create_contexts'):
+                    with patch.object(self.element, 'check_duplicate_facts'), patch.object(self.element, 'create_contexts'):
                         with patch.object(self.element, 'to_ixbrl_elt', return_value=[], create=True):
-                            with patch('ixbrl_reporter.basic_element.objectify.ObjectPath') as mock_path:
-                                mock_path.return_value.return_value = mock_header
+                            with patch('ixbrl_reporter.basic_element.Header', return_value=mock_header):
+                                
+                                self.element.root_maker = Mock()
                                 
                                 self.element.xhtml_maker = Mock()
                                 self.element.ix_maker = Mock()
@@ -720,10 +719,11 @@ class TestBasicElementToIxbrlTree:
         with patch.object(self.element, 'init_html'):
             with patch.object(self.element, 'add_style'):
                 with patch.object(self.element, 'create_metadata'):
-                    with patch.object(self.element, 'create_contexts'):
+                    with patch.object(self.element, 'check_duplicate_facts'), patch.object(self.element, 'create_contexts'):
                         with patch.object(self.element, 'to_ixbrl_elt', return_value=[], create=True):
-                            with patch('ixbrl_reporter.basic_element.objectify.ObjectPath') as mock_path:
-                                mock_path.return_value.return_value = mock_header
+                            with patch('ixbrl_reporter.basic_element.Header', return_value=mock_header):
+                                
+                                self.element.root_maker = Mock()
                                 
                                 self.element.xhtml_maker = Mock()
                                 self.element.ix_maker = Mock()
@@ -751,6 +751,9 @@ class TestBasicElementCreateContexts:
         self.mock_data = Mock()
         self.element = BasicElement("test", self.mock_data)
         self.mock_taxonomy = Mock()
+        self.model = TaxonomyModel(Mock())
+        self.mock_taxonomy.get_context_elt.side_effect = \
+            self.model.get_context_elt
         
         # Mock header and resources
         self.mock_header = Mock()
@@ -886,6 +889,31 @@ class TestBasicElementCreateContexts:
         # Verify entity was created with segments
         mock_create_entity.assert_called_once_with("entity-123", "http://scheme.test", [mock_segment])
     
+    def test_create_contexts_reuses_elements(self):
+        """create_contexts should describe each context only once"""
+        mock_context = Mock()
+        mock_context.get_dimensions.return_value = [
+            ("entity", "http://scheme.test", "entity-123")
+        ]
+
+        self.mock_taxonomy.contexts = {mock_context: "ctx1"}
+        self.mock_taxonomy.contexts_used = {"ctx1"}
+
+        mock_elt = Mock()
+        with patch.object(self.element, 'create_context', return_value=mock_elt) as mock_create_context, \
+             patch('ixbrl_reporter.basic_element.copy.deepcopy') as mock_copy:
+            self.element.create_contexts(self.mock_taxonomy)
+            self.element.create_contexts(self.mock_taxonomy)
+
+        mock_create_context.assert_called_once()
+        assert self.model.context_elts == {(mock_context, "ctx1"): mock_elt}
+
+        # Each document gets a copy, the remembered element is kept out of
+        # documents.
+        mock_copy.assert_called_with(mock_elt)
+        assert mock_copy.call_count == 2
+        self.mock_resources.append.assert_called_with(mock_copy.return_value)
+
     def test_create_contexts_unknown_dimension_raises_error(self):
         """create_contexts should raise error for unknown dimension types"""
         mock_context = Mock()
@@ -988,6 +1016,212 @@ class TestBasicElementCreateMetadata:
         self.mock_hidden.append.assert_not_called()
 
 
+class TestBasicElementDuplicateFacts:
+    """Test checking and de-duplicating repeated facts"""
+
+    def setup_method(self):
+        self.element = BasicElement("test", Mock())
+        self.element.add_makers({
+            None: "http://www.w3.org/1999/xhtml",
+            "ix": "http://www.xbrl.org/2013/inlineXBRL",
+        })
+
+    def make_html(self, *facts):
+        ix = self.element.ix_maker
+        elts = []
+        for name, ctxt, value in facts:
+            elt = ix.nonFraction(value)
+            elt.set("name", name)
+            elt.set("contextRef", ctxt)
+            elt.set("unitRef", "GBP")
+            elts.append(elt)
+        self.element.html = self.element.xhtml_maker.html(
+            self.element.xhtml_maker.body(*elts)
+        )
+
+    def tagged(self):
+        return [
+            (e.get("name"), e.get("contextRef"), e.text)
+            for e in self.element.html.iter(
+                "{http://www.xbrl.org/2013/inlineXBRL}nonFraction"
+            )
+        ]
+
+    def test_duplicates_kept_by_default(self):
+        """Repeated facts should all stay tagged without dedup"""
+        self.make_html(("profit", "c1", "10"), ("profit", "c1", "10"))
+
+        self.element.check_duplicate_facts(False)
+
+        assert len(self.tagged()) == 2
+
+    def test_dedup_tags_first_occurrence(self):
+        """With dedup, only the first of a repeated fact is tagged"""
+        self.make_html(
+            ("profit", "c1", "10"), ("profit", "c2", "8"),
+            ("profit", "c1", "10")
+        )
+
+        self.element.check_duplicate_facts(True)
+
+        assert self.tagged() == [("profit", "c1", "10"), ("profit", "c2", "8")]
+        spans = self.element.html.findall(
+            ".//{http://www.w3.org/1999/xhtml}span"
+        )
+        assert len(spans) == 1
+        assert spans[0].text == "10"
+        assert spans[0].attrib == {}
+
+    def test_same_value_different_layout_consistent(self):
+        """Facts stating the same number differently should not conflict"""
+        self.make_html(
+            ("profit", "c1", "1,000"), ("profit", "c1", "1000.00"),
+            ("profit", "c1", "1")
+        )
+        facts = list(self.element.html.iter(
+            "{http://www.xbrl.org/2013/inlineXBRL}nonFraction"
+        ))
+        facts[0].set("format", "ixt2:numdotdecimal")
+        facts[2].set("scale", "3")
+
+        with patch('ixbrl_reporter.basic_element.sys.stderr') as mock_err:
+            self.element.check_duplicate_facts(True)
+
+        mock_err.write.assert_not_called()
+        assert self.tagged() == [("profit", "c1", "1,000")]
+
+    def test_sign_makes_values_differ(self):
+        """A negative sign should be part of a fact's value"""
+        self.make_html(("profit", "c1", "10"), ("profit", "c1", "10"))
+        facts = list(self.element.html.iter(
+            "{http://www.xbrl.org/2013/inlineXBRL}nonFraction"
+        ))
+        facts[1].set("sign", "-")
+
+        with patch('ixbrl_reporter.basic_element.sys.stderr') as mock_err:
+            self.element.check_duplicate_facts(True)
+
+        assert len(self.tagged()) == 2
+        assert mock_err.write.called
+
+    def test_dedup_keeps_layout_attributes(self):
+        """Only ix attributes should be removed from a de-duplicated fact"""
+        self.make_html(("profit", "c1", "10"), ("profit", "c1", "10"))
+        fact = list(self.element.html.iter(
+            "{http://www.xbrl.org/2013/inlineXBRL}nonFraction"
+        ))[1]
+        fact.set("id", "f2")
+        fact.set("class", "figure")
+        fact.set("format", "ixt2:numdotdecimal")
+        fact.set("decimals", "2")
+
+        self.element.check_duplicate_facts(True)
+
+        span = self.element.html.find(
+            ".//{http://www.w3.org/1999/xhtml}span"
+        )
+        assert dict(span.attrib) == {"id": "f2", "class": "figure"}
+
+    def test_inconsistent_duplicates_reported(self):
+        """Inconsistent values should be warned about and left tagged"""
+        self.make_html(("profit", "c1", "10"), ("profit", "c1", "12"))
+
+        with patch('ixbrl_reporter.basic_element.sys.stderr') as mock_err:
+            self.element.check_duplicate_facts(True)
+
+        assert len(self.tagged()) == 2
+        assert "profit" in mock_err.write.call_args[0][0]
+
+    def test_inconsistent_duplicates_reported_once(self):
+        """Each inconsistent fact should be warned about once, naming values"""
+        self.make_html(
+            ("profit", "c1", "-291"), ("profit", "c1", "291"),
+            ("profit", "c1", "291"), ("profit", "c2", "5")
+        )
+        seen = {}
+
+        with patch('ixbrl_reporter.basic_element.sys.stderr') as mock_err:
+            self.element.check_duplicate_facts(False, seen=seen)
+            self.element.check_duplicate_facts(False, seen=seen)
+
+        assert mock_err.write.call_count == 1
+        msg = mock_err.write.call_args[0][0]
+        assert "profit in context c1" in msg
+        assert "values -291 and 291" in msg
+
+
+class TestBasicElementToIxbrlStream:
+    """Test streaming iXBRL output"""
+
+    def setup_method(self):
+        self.mock_data = Mock()
+        self.mock_data.get_config.side_effect = lambda key: {
+            "report.title": Mock(),
+            "report.style": "",
+            "metadata.accounting.currency": "GBP",
+        }[key]
+        self.mock_data.get_config_bool.return_value = False
+
+        self.mock_taxonomy = Mock()
+        self.mock_taxonomy.get_namespaces.return_value = {}
+        self.mock_taxonomy.get_schemas.return_value = ["http://schema.test"]
+        self.mock_taxonomy.get_document_metadata.return_value = []
+        self.mock_taxonomy.contexts = {}
+
+        self.element = BasicElement("test", self.mock_data)
+
+        def to_ixbrl_elt(par, taxonomy):
+            fact = par.ix_maker.nonFraction("10")
+            fact.set("name", "profit")
+            return [par.xhtml_maker.div({"class": "page"}, fact)]
+
+        self.element.to_ixbrl_elt = Mock(side_effect=to_ixbrl_elt)
+
+    def c14n(self, text):
+        return etree.tostring(
+            etree.fromstring(text), method="c14n"
+        )
+
+    def test_stream_matches_tree(self):
+        """Streamed output should be the same document as to_ixbrl"""
+        tree = BytesIO()
+        self.element.to_ixbrl(self.mock_taxonomy, tree)
+
+        stream = BytesIO()
+        self.element.to_ixbrl_stream(self.mock_taxonomy, stream)
+
+        assert stream.getvalue().startswith(b"<?xml")
+        assert self.c14n(stream.getvalue()) == self.c14n(tree.getvalue())
+
+    def test_stream_renders_once(self):
+        """The report should be produced once, before contexts are made"""
+        order = []
+        self.element.to_ixbrl_elt.side_effect = \
+            lambda par, tx: order.append("elt") or []
+
+        with patch.object(self.element, 'create_contexts',
+                          side_effect=lambda tx: order.append("contexts")):
+            self.element.to_ixbrl_stream(self.mock_taxonomy, BytesIO())
+
+        assert order == ["elt", "contexts"]
+
+    def test_composite_streams_elements(self):
+        """Composites should produce their elements one at a time"""
+        from ixbrl_reporter.composite import Composite
+
+        a = Mock()
+        a.to_ixbrl_elts.return_value = iter(["a1", "a2"])
+        b = Mock()
+        b.to_ixbrl_elts.return_value = iter(["b1"])
+
+        composite = Composite("c", [a, b], self.mock_data)
+        elts = composite.to_ixbrl_elts(self.element, self.mock_taxonomy)
+
+        assert next(elts) == "a1"
+        b.to_ixbrl_elts.assert_not_called()
+        assert list(elts) == ["a2", "b1"]
+
+
 class TestBasicElementIntegration:
     """Integration tests for BasicElement"""
     
@@ -1014,7 +1248,7 @@ class TestBasicElementIntegration:
         }[key]
         self.mock_data.get_config_bool.return_value = False
         
-        output = StringIO()
+        output = BytesIO()
         
         with patch.object(self.element, 'to_ixbrl_elt', return_value=[], create=True):
             with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
@@ -1023,41 +1257,30 @@ class TestBasicElementIntegration:
                 self.element.to_ixbrl(self.mock_taxonomy, output)
         
         # Verify output was generated
-        assert output.getvalue() == '<?xml version="1.0"?><html>complete</html>'
+        assert output.getvalue() == b'<?xml version="1.0"?><html>complete</html>'
         
         # Verify key methods were involved
         self.mock_data.get_config.assert_any_call("metadata.accounting.currency")
         mock_title.use.assert_called_once()
     
     def test_html_conversion_workflow(self):
-        """Test HTML conversion removes iXBRL elements"""
-        # Create a simple mock tree structure
-        mock_tree = Mock()
-        mock_tree.nsmap = {"ix": "http://www.xbrl.org/2013/inlineXBRL"}
-        mock_tree.prefix = "ix"
-        mock_tree.tag = "{http://www.xbrl.org/2013/inlineXBRL}nonfraction"
-        mock_tree.text = "1000"
-        mock_tree.keys.return_value = []
-        mock_tree.attrib = {}
-        mock_tree.iterchildren.return_value = []
-        
-        # Mock span creation
-        self.element.xhtml_maker = Mock()
-        mock_span = Mock()
-        self.element.xhtml_maker.span.return_value = mock_span
-        
-        output = StringIO()
+        """Test HTML output has no iXBRL elements"""
+        self.mock_taxonomy.get_namespaces.return_value = {}
+        self.mock_data.get_config.side_effect = lambda key: {
+            "report.title": Mock(),
+            "report.style": "body {}",
+        }[key]
         self.mock_data.get_config_bool.return_value = False
-        
-        with patch.object(self.element, 'to_ixbrl_tree', return_value=mock_tree):
-            with patch('ixbrl_reporter.basic_element.etree.tostring') as mock_tostring:
-                mock_tostring.return_value = b'<html><span>1000</span></html>'
-                
-                self.element.to_html(self.mock_taxonomy, output)
-        
-        # Should have converted ix element to span
-        self.element.xhtml_maker.span.assert_called()
-        assert output.getvalue() == '<html><span>1000</span></html>'
+
+        output = BytesIO()
+
+        fact = CountFact("ctxt-1", "uk-core:Employees", 3)
+        with patch.object(self.element, 'to_ixbrl_elt', create=True,
+                          side_effect=lambda par, tx: [fact.to_elt(par)]):
+            self.element.to_html(self.mock_taxonomy, output)
+
+        assert b"<span>3</span>" in output.getvalue()
+        assert b"ix:" not in output.getvalue()
 
 
 class TestBasicElementErrorCases:
@@ -1095,6 +1318,8 @@ class TestBasicElementErrorCases:
         mock_taxonomy = Mock()
         mock_taxonomy.contexts = {mock_context: "ctx1"}
         mock_taxonomy.contexts_used = {"ctx1"}
+        mock_taxonomy.get_context_elt.side_effect = \
+            lambda ctxt, id, make: make()
         
         # Should raise RuntimeError for unknown dimension type
         with pytest.raises(RuntimeError, match="Should not happen in create_contexts"):
@@ -1109,7 +1334,7 @@ class TestBasicElementErrorCases:
                 # Simulate serialization error
                 mock_tostring.side_effect = etree.XMLSyntaxError("Invalid XML", None, 0, 0)
                 
-                output = StringIO()
+                output = BytesIO()
                 self.mock_data.get_config_bool.return_value = False
                 
                 with pytest.raises(etree.XMLSyntaxError):
@@ -0,0 +1,70 @@
+"""
+Unit tests for ixbrl_reporter.builder module
+"""
+import pytest
+from lxml import etree
+
+from ixbrl_reporter.builder import ElementMaker
+
+xhtml_ns = "http://www.w3.org/1999/xhtml"
+ix_ns = "http://www.xbrl.org/2013/inlineXBRL"
+
+
+class TestElementMaker:
+    """Test building elements"""
+
+    def setup_method(self):
+        self.xhtml = ElementMaker(xhtml_ns)
+        self.ix = ElementMaker(ix_ns, "ix")
+
+    def test_tag_in_namespace(self):
+        """Tags should be made in the maker's namespace"""
+        elt = self.xhtml.div()
+        assert elt.tag == "{%s}div" % xhtml_ns
+        assert elt.nsmap == {None: xhtml_ns}
+
+        elt = self.ix.nonFraction()
+        assert elt.tag == "{%s}nonFraction" % ix_ns
+        assert elt.prefix == "ix"
+
+    def test_call_with_tag(self):
+        """Calling the maker should take a tag, or a qualified tag"""
+        assert self.xhtml("h3").tag == "{%s}h3" % xhtml_ns
+        assert self.xhtml("{%s}span" % ix_ns).tag == "{%s}span" % ix_ns
+
+    def test_children(self):
+        """Strings, attributes and elements should make content"""
+        elt = self.xhtml.p(
+            "one", {"class": "note"}, self.xhtml.b("two"), "three", 4
+        )
+        assert elt.text == "one"
+        assert elt.get("class") == "note"
+        assert elt[0].text == "two"
+        assert elt[0].tail == "three4"
+
+    def test_other_values(self):
+        """None should be ignored, booleans written as XML booleans"""
+        assert self.xhtml.span(None).text is None
+        assert self.xhtml.span(True).text == "true"
+        assert self.xhtml.span(1.5).text == "1.5"
+
+    def test_tag_functions_kept(self):
+        """Looking up a tag should only make its function once"""
+        assert self.xhtml.td is self.xhtml.td
+
+    def test_private_names_not_tags(self):
+        """Private names shouldn't be taken as tags"""
+        with pytest.raises(AttributeError):
+            self.xhtml._private
+
+    def test_document_declares_namespaces_once(self):
+        """Declarations on elements should be dropped in a document"""
+        root = ElementMaker(xhtml_ns, nsmap={None: xhtml_ns, "ix": ix_ns})
+        span = self.xhtml.span(self.xhtml.span(self.ix.nonFraction("1")))
+        html = root.html(self.xhtml.body(span))
+
+        assert etree.tostring(html).decode("utf-8") == (
+            '<html xmlns="%s" xmlns:ix="%s"><body><span><span>'
+            '<ix:nonFraction>1</ix:nonFraction></span></span></body></html>'
+            % (xhtml_ns, ix_ns)
+        )
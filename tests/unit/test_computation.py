@@ -6,11 +6,12 @@ from unittest.mock import Mock, MagicMock, patch, call
 from datetime import date, timedelta
 import json
 
+from ixbrl_reporter.split_filter import SplitFilter
 from ixbrl_reporter.computation import (
     Metadata, Computable, Line, Constant, Group, Sum, AbsOperation,
     ApportionOperation, RoundOperation, FactorOperation, Comparison,
     get_computation, create_uuid, ResultSet,
-    IN_YEAR, AT_START, AT_END,
+    IN_YEAR, AT_START, AT_END, MOVEMENT,
     ROUND_DOWN, ROUND_UP, ROUND_NEAREST,
     CMP_LESS, CMP_LESS_EQUAL, CMP_GREATER, CMP_GREATER_EQUAL,
     ZERO_IF_LESS, ZERO_IF_GREATER
@@ -67,6 +68,7 @@ class TestConstants:
         assert IN_YEAR == 1
         assert AT_START == 2
         assert AT_END == 3
+        assert MOVEMENT == 4
     
     def test_rounding_constants(self):
         """Test rounding direction constants"""
@@ -200,6 +202,7 @@ class TestMetadata:
             ("in-year", IN_YEAR),
             ("at-start", AT_START),
             ("at-end", AT_END),
+            ("movement", MOVEMENT),
             ("invalid", AT_END)  # Default fallback
         ]
         
@@ -466,7 +469,19 @@ class TestMetadata:
         mock_period_class.assert_called_once_with("", start_date, end_date)
         self.mock_context.with_period.assert_called_once_with(mock_period)
         assert result == mock_period_context
-    
+
+    def test_metadata_get_context_movement(self):
+        """get_context should give MOVEMENT a duration context"""
+        metadata = Metadata("id", "desc", self.mock_context, [], MOVEMENT, None)
+
+        mock_period_context = Mock()
+        self.mock_context.with_period.return_value = mock_period_context
+
+        result = metadata.get_context(date(2023, 1, 1), date(2023, 12, 31))
+
+        self.mock_context.with_instant.assert_not_called()
+        assert result == mock_period_context
+
     def test_metadata_get_context_with_segments(self):
         """get_context should apply segments to context"""
         segments = [("dim1", "val1"), ("dim2", "val2")]
@@ -585,8 +600,10 @@ class TestLine:
     def test_line_load_basic(self):
         """Line.load should create Line from config"""
         mock_cfg = Mock()
-        mock_cfg.get.side_effect = lambda key: {
-            "accounts": ["Assets:Bank"]
+        mock_cfg.get.side_effect = lambda key, *deflt, **kwargs: {
+            "accounts": ["Assets:Bank"],
+            "include": None,
+            "exclude": None
         }[key]
         mock_cfg.get_bool.return_value = False
         
@@ -597,6 +614,44 @@ class TestLine:
         assert line.metadata == self.mock_metadata
         assert line.accounts == ["Assets:Bank"]
         assert line.reverse is False
+        assert line.filter is None
+
+    def test_line_load_with_filter(self):
+        """Line.load should compile include/exclude rules into a filter"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = lambda key, *deflt, **kwargs: {
+            "accounts": ["Income"],
+            "include": None,
+            "exclude": [{"description": "^Closing"}]
+        }[key]
+        mock_cfg.get_bool.return_value = False
+
+        with patch.object(Metadata, 'load', return_value=self.mock_metadata):
+            line = Line.load(mock_cfg, "comps", "context", "data", "gcfg")
+
+        assert line.filter is not None
+        assert line.filter.match({"description": "Sales"})
+        assert not line.filter.match({"description": "Closing entry"})
+
+    def test_line_compute_with_filter(self):
+        """Line.compute should only total splits passing the filter"""
+        self.mock_metadata.period = IN_YEAR
+
+        mock_session = Mock()
+        mock_session.get_splits.return_value = [
+            {"amount": 100.0, "description": "Sale"},
+            {"amount": 40.0, "description": "Year-end closing"}
+        ]
+        mock_session.is_debit.return_value = False
+
+        flt = SplitFilter([], [{"description": "closing"}])
+        line = Line(self.mock_metadata, ["Income"], filter=flt)
+
+        total = line.compute(
+            mock_session, date(2023, 1, 1), date(2023, 12, 31), Mock()
+        )
+
+        assert total == 100.0
     
     def test_line_load_with_reverse_sign(self):
         """Line.load should handle reverse-sign flag"""
@@ -715,7 +770,34 @@ class TestLine:
         
         # Should query for exact period
         mock_session.get_splits.assert_called_once_with(mock_account, start_date, end_date)
-    
+
+    def test_line_compute_movement_period(self):
+        """Line.compute should take MOVEMENT as the in-period sum over a duration"""
+        self.mock_metadata.period = MOVEMENT
+
+        mock_context = Mock()
+        mock_session = Mock()
+        mock_account = Mock()
+        mock_result = Mock()
+
+        self.mock_metadata.context.with_period.return_value = mock_context
+        mock_session.get_account.return_value = mock_account
+        mock_session.get_splits.return_value = [{"amount": 40.0}, {"amount": -15.0}]
+        mock_session.is_debit.return_value = False
+
+        line = Line(self.mock_metadata, ["Assets:Bank"], reverse=False)
+
+        start_date = date(2023, 1, 1)
+        end_date = date(2023, 12, 31)
+
+        total = line.compute(mock_session, start_date, end_date, mock_result)
+
+        # One query over the period, not two over the full history
+        mock_session.get_splits.assert_called_once_with(mock_account, start_date, end_date)
+        self.mock_metadata.context.with_period.assert_called_once()
+        self.mock_metadata.context.with_instant.assert_not_called()
+        assert total == 25.0
+
     def test_line_compute_multiple_accounts(self):
         """Line.compute should sum multiple accounts"""
         self.mock_metadata.period = AT_END
@@ -2103,4 +2185,20 @@ class TestIntegration:
         assert "comp1" in result
         assert "comp2" in result
         assert result["comp1"] == mock_comp1
-        assert result["comp2"] == mock_comp2
\ No newline at end of file
+        assert result["comp2"] == mock_comp2
+
+    def test_get_computations_duplicate_id_raises_error(self):
+        """Test get_computations rejects two computations with one id"""
+        mock_gcfg = Mock()
+        mock_gcfg.get.return_value = [{"kind": "line"}, {"kind": "line"}]
+
+        with patch('ixbrl_reporter.computation.Computable.load') as mock_load:
+            mock_comp1 = Mock()
+            mock_comp1.metadata.id = "comp1"
+            mock_comp2 = Mock()
+            mock_comp2.metadata.id = "comp1"
+            mock_load.side_effect = [mock_comp1, mock_comp2]
+
+            from ixbrl_reporter.computation import get_computations
+            with pytest.raises(RuntimeError, match="Computation id 'comp1' is defined more than once"):
+                get_computations(mock_gcfg, Mock(), Mock())
@@ -4,11 +4,16 @@ Unit tests for ixbrl_reporter.config module
 import pytest
 import yaml
 import os
+import pickle
+import json
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import mock_open, patch
 
 from ixbrl_reporter.config import (
     Config, StringValue, FloatValue, IntValue, BoolValue, 
-    ListValue, NoneValue, DateValue
+    ListValue, NoneValue, DateValue, Import, ARTIFACT_MAGIC
 )
 
 
@@ -68,7 +73,112 @@ class TestConfigLoad:
         Config.load("test.yaml")
         mock_yaml_load.assert_called_once()
         args, kwargs = mock_yaml_load.call_args
-        assert kwargs.get('Loader') == yaml.FullLoader
+        assert kwargs.get('Loader') == getattr(
+            yaml, "CFullLoader", yaml.FullLoader
+        )
+
+    def test_load_uses_parse_cache(self, temp_config_file, tmp_path,
+                                   monkeypatch):
+        """A cached parse should be used while the file is unchanged"""
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(tmp_path / "cache"))
+
+        first = Config.load(temp_config_file)
+        assert len(os.listdir(tmp_path / "cache")) == 1
+
+        with patch("yaml.load") as mock_yaml_load:
+            second = Config.load(temp_config_file)
+            mock_yaml_load.assert_not_called()
+
+        assert second == first
+
+    def test_load_parse_cache_invalidated(self, tmp_path, monkeypatch):
+        """Changing the file should give a fresh parse"""
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(tmp_path / "cache"))
+
+        path = tmp_path / "c.yaml"
+        path.write_text("key: one\n")
+        assert Config.load(str(path)).get("key") == "one"
+
+        path.write_text("key: three\n")
+        assert Config.load(str(path)).get("key") == "three"
+
+    def test_load_keeps_one_parse_per_file(self, tmp_path, monkeypatch):
+        """An edited file should replace its earlier parse in the process"""
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(tmp_path / "cache"))
+        Config.parsed.clear()
+
+        path = tmp_path / "c.yaml"
+        path.write_text("key: one\n")
+        assert Config.load(str(path)).get("key") == "one"
+
+        path.write_text("key: two\n")
+        os.utime(path, ns=(0, 0))
+        assert Config.load(str(path)).get("key") == "two"
+        assert list(Config.parsed) == [os.path.abspath(str(path))]
+
+    def test_load_parse_cache_bounded(self, tmp_path, monkeypatch):
+        """The in-process parse cache should not grow past its limit"""
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(tmp_path / "cache"))
+        monkeypatch.setattr(Config, "PARSED_SIZE", 3)
+        Config.parsed.clear()
+
+        for i in range(5):
+            path = tmp_path / ("c%d.yaml" % i)
+            path.write_text("key: %d\n" % i)
+            Config.load(str(path))
+        assert len(Config.parsed) <= 3
+
+    def test_load_damaged_cache_entry(self, temp_config_file, tmp_path,
+                                      monkeypatch):
+        """A corrupt cache entry should be ignored"""
+        cache = tmp_path / "cache"
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(cache))
+
+        Config.load(temp_config_file)
+        for name in os.listdir(cache):
+            (cache / name).write_bytes(b"junk")
+
+        assert "accounts" in Config.load(temp_config_file)
+
+    def test_parse_cache_is_json(self, temp_config_file, tmp_path,
+                                 monkeypatch):
+        """Cache entries should be data, not pickles"""
+        cache = tmp_path / "cache"
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(cache))
+
+        Config.load(temp_config_file)
+        for name in os.listdir(cache):
+            with open(cache / name) as f:
+                assert "accounts" in json.load(f)
+
+    @pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX only")
+    def test_parse_cache_writable_by_others_ignored(self, tmp_path,
+                                                    monkeypatch):
+        """A cache directory others can write to should not be used"""
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        os.chmod(cache, 0o777)
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(cache))
+
+        path = tmp_path / "c.yaml"
+        path.write_text("key: one\n")
+        assert Config.parse_file(str(path), "k") == {"key": "one"}
+        assert os.listdir(cache) == []
+
+        name = hashlib.sha256(b"k").hexdigest() + ".json"
+        (cache / name).write_text('{"key": "forged"}')
+        assert Config.parse_file(str(path), "k") == {"key": "one"}
+
+    def test_parse_cache_skips_non_json_values(self, tmp_path,
+                                               monkeypatch):
+        """Values JSON can't hold unchanged should not be cached"""
+        cache = tmp_path / "cache"
+        monkeypatch.setenv("IXBRL_REPORTER_CACHE", str(cache))
+
+        path = tmp_path / "c.yaml"
+        path.write_text("1: one\n")
+        assert Config.parse_file(str(path), "k") == {1: "one"}
+        assert not cache.exists() or os.listdir(cache) == []
 
 
 class TestConfigMakevalue:
@@ -135,6 +245,13 @@ class TestConfigMakevalue:
         with pytest.raises(RuntimeError, match="Can't help with type"):
             Config.makevalue(object())
 
+    def test_makevalue_typed_passes_through(self):
+        """Already-typed values should not be rebuilt"""
+        tree = Config.makevalue({"list": [1, 2], "str": "x"})
+        assert Config.makevalue(tree) is tree
+        assert Config.makevalue(tree["list"]) is tree["list"]
+        assert Config.makevalue(tree["str"]) is tree["str"]
+
 
 class TestConfigGet:
     """Test Config.get method"""
@@ -194,6 +311,71 @@ class TestConfigGet:
             config.get("items.invalid")
 
 
+    def test_get_returns_shared_node(self):
+        """Repeated lookups should return the same node"""
+        config = Config.makevalue({"a": {"b": {"c": [1, 2]}}})
+        first = config.get("a.b")
+        assert config.get("a.b") is first
+        assert config.get("a.b.c") is first["c"]
+
+    def test_get_missing_is_cached(self):
+        """A missing path should still honour defaults and mandatory"""
+        config = Config.makevalue({"a": {"b": 1}})
+        assert config.get("a.x", 5, mandatory=False) == 5
+        assert config.get("a.x", 6, mandatory=False) == 6
+        with pytest.raises(RuntimeError, match="Config value a.x not known"):
+            config.get("a.x")
+
+    def test_set_invalidates_cache(self):
+        """set should be visible to later lookups"""
+        config = Config.makevalue({"a": {"b": 1}})
+        assert config.get("a.b") == 1
+        config.set("a.b", 2)
+        assert config.get("a.b") == 2
+
+    def test_set_through_sub_node(self):
+        """Writes through any node should be seen through every other"""
+        root = Config({"a": {"b": {"c": 1}}})
+        assert root.get("a.b.c") == 1
+
+        sub = root.get("a")
+        assert sub.get("b.c") == 1
+
+        sub.set("b.c", 2)
+        assert root.get("a.b.c") == 2
+
+        root.set("a.b.c", 3)
+        assert sub.get("b.c") == 3
+
+    def test_tree_typed_when_built(self):
+        """Plain values given to Config should be typed in place"""
+        root = Config({"a": {"b": [{"c": 1}]}})
+        assert isinstance(root["a"], Config)
+        assert root.get("a") is root["a"]
+        assert root.get("a.b.0") is root["a"]["b"][0]
+
+    def test_default_typed_once(self):
+        """A default for a missing path should be typed once"""
+        config = Config({"a": 1})
+        first = config.get("x", "d", mandatory=False)
+        assert isinstance(first, StringValue)
+        assert config.get("x", "d", mandatory=False) is first
+        assert config.get("x", ["l"], mandatory=False) == ["l"]
+
+    def test_path_cache_bounded(self):
+        """The path cache should not grow past its limit"""
+        config = Config({"a": 1})
+        for i in range(Config.PATH_CACHE_SIZE + 10):
+            config.get("x%d" % i, mandatory=False)
+        assert len(config.path_cache) <= Config.PATH_CACHE_SIZE
+
+    def test_set_stores_typed_value(self):
+        """set should store typed values"""
+        config = Config()
+        config.set("key", "value")
+        assert isinstance(config["key"], StringValue)
+
+
 class TestConfigSet:
     """Test Config.set method"""
     
@@ -264,6 +446,203 @@ class TestConfigResolveRefs:
         Config.resolve_refs(config, config)
         assert config["nested"]["ref"] == "value"
 
+    def test_resolve_shares_node(self):
+        """References should share the node rather than copy it"""
+        config = Config.makevalue({
+            "source": {"a": [1, 2]},
+            "one": "//ref source",
+            "two": "//ref source"
+        })
+        Config.resolve_refs(config, config)
+        assert config["one"] is config["source"]
+        assert config["two"] is config["source"]
+
+    def test_resolve_reference_to_reference(self):
+        """A reference to a reference should reach the value"""
+        config = Config.makevalue({
+            "a": "//ref b",
+            "b": "//ref c",
+            "c": "value"
+        })
+        Config.resolve_refs(config, config)
+        assert config["a"] == "value"
+
+    def test_resolve_path_through_reference(self):
+        """A path passing through an unresolved reference should work"""
+        config = Config.makevalue({
+            "a": "//ref b.x.y",
+            "b": "//ref c",
+            "c": {"x": {"y": "value"}}
+        })
+        Config.resolve_refs(config, config)
+        assert config["a"] == "value"
+
+    def test_resolve_target_resolved_first(self):
+        """A referenced subtree should have its own references resolved"""
+        config = Config.makevalue({
+            "a": "//ref b",
+            "b": {"name": "//ref c"},
+            "c": "value"
+        })
+        Config.resolve_refs(config, config)
+        assert config["a"]["name"] == "value"
+
+    def test_resolve_reference_cycle(self):
+        """A cycle of references should be reported"""
+        config = Config.makevalue({"a": "//ref b", "b": "//ref a"})
+        with pytest.raises(RuntimeError, match="Config reference cycle"):
+            Config.resolve_refs(config, config)
+
+    def test_resolve_reference_to_container(self):
+        """A reference to its own container should be reported"""
+        config = Config.makevalue({"a": {"b": "//ref a"}})
+        with pytest.raises(RuntimeError, match="Config reference cycle: a"):
+            Config.resolve_refs(config, config)
+
+    def test_resolver_holds_resolved_nodes(self):
+        """Resolved containers should be kept, so their ids aren't reused"""
+        config = Config.makevalue({"a": {"b": [1]}, "c": "//ref a"})
+        Config.resolve_refs(config, config)
+
+        done = config.resolver.done.values()
+        assert any(node is config["a"] for node in done)
+        assert any(node is config["a"]["b"] for node in done)
+
+    def test_resolver_usable_after_error(self):
+        """A failed resolve should not leave containers marked active"""
+        config = Config.makevalue({"a": {"b": "//ref missing"}, "c": "x"})
+        with pytest.raises(RuntimeError, match="not known"):
+            Config.resolve_refs(config, config)
+
+        resolver = config.resolver
+        assert resolver.active == {}
+        assert resolver.following == []
+
+        config["a"]["b"] = "//ref c"
+        Config.resolve_refs(config["a"], config)
+        assert config["a"]["b"] == "x"
+
+    def test_resolve_unknown_reference(self):
+        """A reference to nothing should be reported"""
+        config = Config.makevalue({"a": "//ref missing"})
+        with pytest.raises(RuntimeError, match="Config value missing not known"):
+            Config.resolve_refs(config, config)
+
+
+class TestConfigImports:
+    """Test //import handling"""
+
+    def write(self, path, text):
+        path.write_text(text)
+        return str(path)
+
+    def test_import_loaded_on_first_access(self, tmp_path):
+        """Imported files should only be read when needed"""
+        used = self.write(tmp_path / "used.yaml", "value: 1\n")
+        unused = self.write(tmp_path / "unused.yaml", "value: 2\n")
+        root = self.write(
+            tmp_path / "root.yaml",
+            "a: //import %s\nb: //import %s\n" % (used, unused)
+        )
+
+        with patch.object(Config, "parse_file",
+                          wraps=Config.parse_file) as parse_file:
+            Config.parsed.clear()
+            config = Config.load(root)
+            assert config.get("a.value") == 1
+            files = [c.args[0] for c in parse_file.call_args_list]
+
+        assert used in files
+        assert unused not in files
+
+    def test_import_shared_between_importers(self, tmp_path):
+        """A file imported twice should be loaded once and shared"""
+        common = self.write(tmp_path / "common.yaml", "value: 1\n")
+        root = self.write(
+            tmp_path / "root.yaml",
+            "a: //import %s\nb: //import %s\n" % (common, common)
+        )
+
+        config = Config.load(root)
+
+        assert config.get("a") is config.get("b")
+
+    def test_refs_in_import_resolved_against_root(self, tmp_path):
+        """References in an imported file should be resolved when loaded"""
+        child = self.write(tmp_path / "child.yaml", "name: //ref company\n")
+        root = self.write(
+            tmp_path / "root.yaml",
+            "company: Example Ltd\nchild: //import %s\n" % child
+        )
+
+        config = Config.load(root)
+
+        assert config.get("child.name") == "Example Ltd"
+
+    def test_ref_into_import(self, tmp_path):
+        """References can point into an imported file"""
+        child = self.write(tmp_path / "child.yaml", "name: Example Ltd\n")
+        root = self.write(
+            tmp_path / "root.yaml",
+            "child: //import %s\nname: //ref child.name\n" % child
+        )
+
+        assert Config.load(root).get("name") == "Example Ltd"
+
+    def test_import_in_list(self, tmp_path):
+        """Imports in lists should be loaded and resolved"""
+        child = self.write(tmp_path / "child.yaml", "name: //ref company\n")
+        root = self.write(
+            tmp_path / "root.yaml",
+            "company: Example Ltd\nitems:\n- //import %s\n" % child
+        )
+
+        assert Config.load(root).get("items.0.name") == "Example Ltd"
+
+    def test_import_cycle_detected(self, tmp_path):
+        """An import cycle should be reported"""
+        a = tmp_path / "a.yaml"
+        b = tmp_path / "b.yaml"
+        self.write(a, "b: //import %s\n" % b)
+        self.write(b, "a: //import %s\n" % a)
+
+        config = Config.load(str(a))
+
+        with pytest.raises(RuntimeError, match="Config import cycle"):
+            config.get("b.a")
+
+    def test_import_loaded_once_across_threads(self, tmp_path):
+        """Threads reading an import at once should share one load"""
+        child = self.write(tmp_path / "child.yaml", "value: 1\n")
+        root = self.write(tmp_path / "root.yaml", "a: //import %s\n" % child)
+
+        config = Config.load(root)
+
+        # Slow the load down, so that threads overlap.
+        load = Import.load
+        def slow_load(imp):
+            time.sleep(0.05)
+            return load(imp)
+
+        with patch.object(Import, "load", autospec=True,
+                          side_effect=slow_load) as mock_load:
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                nodes = list(ex.map(lambda i: config.get("a"), range(4)))
+
+        assert mock_load.call_count == 1
+        assert all(node is nodes[0] for node in nodes)
+        assert nodes[0].get("value") == 1
+
+    def test_items_loads_imports(self, tmp_path):
+        """Iterating items should give loaded values"""
+        child = self.write(tmp_path / "child.yaml", "value: 1\n")
+        root = self.write(tmp_path / "root.yaml", "a: //import %s\n" % child)
+
+        config = Config.load(root)
+
+        assert isinstance(dict(config.items())["a"], Config)
+        assert isinstance(list(config.values())[0], Config)
+
 
 class TestConfigValueTypes:
     """Test Config value type classes"""
@@ -318,6 +697,12 @@ class TestConfigValueTypes:
         assert dv.month == 12
         assert dv.day == 25
 
+    def test_date_value_pickle(self):
+        """DateValue should survive pickling"""
+        dv = pickle.loads(pickle.dumps(DateValue(2023, 12, 25)))
+        assert isinstance(dv, DateValue)
+        assert dv == DateValue(2023, 12, 25)
+
 
 class TestConfigSpecialMethods:
     """Test Config special methods"""
@@ -357,6 +742,78 @@ class TestConfigSpecialMethods:
         assert result == "value"
 
 
+class TestConfigArtifacts:
+    """Test compiled configuration files"""
+
+    def test_artifact_round_trip(self, tmp_path):
+        """An artifact should hold the configuration as plain data"""
+        (tmp_path / "part.yaml").write_text("x: 1\n")
+        src = tmp_path / "src.yaml"
+        src.write_text(
+            "a: //import %s\nb: //ref a.x\nc: [1.5, true, null]\n" %
+            (tmp_path / "part.yaml")
+        )
+        out = str(tmp_path / "out.ixtx")
+
+        Config.write_artifact(Config.load(str(src)), "test", out)
+        data = Config.read_artifact(out, "test")
+
+        assert data == {"a": {"x": 1}, "b": 1, "c": [1.5, True, None]}
+        assert type(data["c"][1]) is bool
+
+    def test_artifact_imported(self, tmp_path):
+        """An artifact can be imported in place of YAML"""
+        out = str(tmp_path / "part.ixtx")
+        Config.write_artifact(Config.makevalue({"x": "y"}), "test", out)
+        src = tmp_path / "src.yaml"
+        src.write_text("a: //import %s\n" % out)
+
+        config = Config.load(str(src))
+        assert config.get("a.x") == "y"
+
+    def test_artifact_wrong_version(self, tmp_path, monkeypatch):
+        """An artifact of another version should be rejected"""
+        out = str(tmp_path / "out.ixtx")
+        Config.write_artifact(Config.makevalue({"x": "y"}), "test", out)
+
+        monkeypatch.setattr(
+            "ixbrl_reporter.config.ARTIFACT_VERSION", 1000
+        )
+        with pytest.raises(RuntimeError, match="compile it again"):
+            Config.read_artifact(out)
+
+    def test_artifact_wrong_kind(self, tmp_path):
+        """An artifact of another kind should be rejected"""
+        out = str(tmp_path / "out.ixtx")
+        Config.write_artifact(Config.makevalue({"x": "y"}), "test", out)
+
+        with pytest.raises(RuntimeError, match="not a compiled taxonomy"):
+            Config.read_artifact(out, "taxonomy")
+
+    def test_artifact_is_json(self, tmp_path):
+        """An artifact should be data after its header, not a pickle"""
+        out = str(tmp_path / "out.ixtx")
+        Config.write_artifact(Config.makevalue({"x": "y"}), "test", out)
+
+        with open(out, "rb") as f:
+            assert f.read(len(ARTIFACT_MAGIC)) == ARTIFACT_MAGIC
+            assert json.loads(f.read())["data"] == {"x": "y"}
+
+    def test_artifact_not_json_rejected(self, tmp_path):
+        """An artifact which isn't JSON should be reported, not loaded"""
+        out = tmp_path / "out.ixtx"
+        out.write_bytes(ARTIFACT_MAGIC + pickle.dumps({"version": 1}))
+
+        with pytest.raises(RuntimeError, match="Could not read"):
+            Config.read_artifact(str(out))
+
+    def test_artifact_non_string_key_rejected(self, tmp_path):
+        """Keys JSON would turn into strings should be refused"""
+        out = str(tmp_path / "out.ixtx")
+        with pytest.raises(RuntimeError, match="keys must be strings"):
+            Config.write_artifact(Config.makevalue({1: "y"}), "test", out)
+
+
 @pytest.fixture
 def config_with_references():
     """Config with reference patterns for testing"""
@@ -0,0 +1,64 @@
+"""
+Unit tests for ixbrl_reporter.context module
+"""
+import pickle
+import pytest
+from datetime import date
+
+from ixbrl_reporter.context import Context
+from ixbrl_reporter.period import Period
+
+
+PERIOD = Period("2020", date(2020, 1, 1), date(2020, 12, 31))
+
+
+class TestContext:
+    """Test Context derivation and interning"""
+
+    def test_dimensions(self):
+        """Test dimensions accumulate down the derivation chain"""
+        ctxt = Context(None).with_entity("scheme", "123").with_period(
+            PERIOD
+        ).with_segments([("officer", "director1")])
+        assert ctxt.get_dimensions() == (
+            ("entity", "scheme", "123"),
+            ("period", "2020-01-01", "2020-12-31"),
+            ("segment", "officer", "director1"),
+        )
+        assert ctxt.get_hash() == \
+            "entity,scheme,123@@period,2020-01-01,2020-12-31@@" \
+            "segment,officer,director1"
+
+    def test_equal_contexts_identical(self):
+        """Test contexts derived separately are the same object"""
+        root1 = Context(None)
+        root2 = Context(None)
+        a = root1.with_entity("scheme", "123").with_instant(date(2020, 12, 31))
+        b = root2.with_entity("scheme", "123").with_instant(date(2020, 12, 31))
+        assert a is b
+        assert hash(a) == hash(b)
+
+    def test_period_name_not_a_dimension(self):
+        """Test periods with the same dates give the same context"""
+        other = Period("", date(2020, 1, 1), date(2020, 12, 31))
+        root = Context(None).with_entity("scheme", "123")
+        assert root.with_period(PERIOD) is root.with_period(other)
+
+    def test_different_contexts(self):
+        """Test contexts with different dimensions are different"""
+        root = Context(None).with_entity("scheme", "123")
+        a = root.with_segment("officer", "director1")
+        b = root.with_segment("officer", "director2")
+        assert a is not b
+        assert a != b
+
+    def test_immutable(self):
+        """Test contexts can't be modified"""
+        ctxt = Context(None).with_entity("scheme", "123")
+        with pytest.raises(AttributeError):
+            ctxt.entity = "456"
+
+    def test_pickle(self):
+        """Test unpickled contexts are interned"""
+        ctxt = Context(None).with_entity("scheme", "123").with_period(PERIOD)
+        assert pickle.loads(pickle.dumps(ctxt)) is ctxt
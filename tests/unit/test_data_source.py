@@ -163,6 +163,27 @@ class TestDataSource:
             mock_expand.assert_called_once_with("template string", data_source)
             assert result == "expanded string"
     
+    def test_expand_string_cached(self):
+        """A note should only be expanded once"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = ["scheme", "number"]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'), \
+             patch('ixbrl_reporter.data_source.expand_string') as mock_expand:
+
+            mock_expand.side_effect = lambda value, data: Mock()
+
+            data_source = DataSource(mock_cfg, mock_session)
+            first = data_source.expand_string("template:note")
+            second = data_source.expand_string("template:note")
+            other = data_source.expand_string("template:other")
+
+            assert first is second
+            assert other is not first
+            assert mock_expand.call_count == 2
+    
     def test_get_business_context(self):
         """Test getting business context"""
         mock_cfg = Mock()
@@ -354,9 +375,44 @@ class TestDataSource:
             data_source.results[mock_context_with_period] = mock_existing_result
             
             result = data_source.perform_computations(mock_period)
-            
+
             assert result == mock_existing_result
-    
+
+    def test_perform_computations_with_provenance(self):
+        """Test result sets carry provenance once tracking is enabled"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = ["scheme", "number"]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations', return_value={}), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            mock_period = Mock()
+            mock_period.start = date(2020, 1, 1)
+            mock_period.end = date(2020, 12, 31)
+
+            data_source = DataSource(mock_cfg, mock_session)
+            assert data_source.perform_computations(mock_period).provenance is None
+
+            data_source.enable_provenance()
+            result = data_source.perform_computations(mock_period)
+
+            assert result.provenance is not None
+
+    def test_explain_without_provenance_raises_error(self):
+        """Test explain refuses to run without provenance tracking"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = ["scheme", "number"]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            data_source = DataSource(mock_cfg, mock_session)
+
+            with pytest.raises(RuntimeError, match="Provenance tracking is not enabled"):
+                data_source.explain("profit", Mock(), Mock())
+
     def test_get_result(self):
         """Test getting single result"""
         mock_cfg = Mock()
@@ -439,6 +495,87 @@ class TestDataSource:
             assert result[0] == mock_period1
             assert result[1] == mock_period2
     
+    def test_get_periods_parsed_once(self):
+        """Test periods are only read from configuration once"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [
+            "scheme", "number",  # init
+            [  # periods
+                {"name": "2020", "start": "2020-01-01", "end": "2020-12-31"},
+                {"name": "2019", "start": "2019-01-01", "end": "2019-12-31"}
+            ]
+        ]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            data_source = DataSource(mock_cfg, mock_session)
+            periods = data_source.get_periods()
+
+            assert data_source.get_periods() is periods
+            assert data_source.get_period("2019") is periods[1]
+            assert data_source.get_period("2020") is periods[0]
+            assert mock_cfg.get.call_count == 3
+
+    def test_get_config_period_cached(self):
+        """Test periods from configuration keys are parsed once"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [
+            "scheme", "number",  # init
+            {"name": "2020", "start": "2020-01-01", "end": "2020-12-31"}
+        ]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            data_source = DataSource(mock_cfg, mock_session)
+            period = data_source.get_config_period("period.key")
+
+            assert period.start == date(2020, 1, 1)
+            assert data_source.get_config_period("period.key") is period
+            assert mock_cfg.get.call_count == 3
+
+    def test_get_computation_periods(self):
+        """Test periods named by definitions are included, once each"""
+        from ixbrl_reporter.config import Config
+
+        y2020 = {"name": "2020", "start": "2020-01-01", "end": "2020-12-31"}
+        tax = {"name": "tax", "start": "2020-04-01", "end": "2021-03-31"}
+        cfg = Config({
+            "metadata": {
+                "business": {"entity-scheme": "s", "company-number": "1"},
+                "accounting": {"periods": [y2020]},
+                "tax": {"period": tax},
+            },
+            "report": {
+                "elements": [
+                    {"facts": [
+                        {"kind": "computation", "computation": "a",
+                         "period-config": "metadata.tax.period"},
+                        {"kind": "computation", "computation": "b",
+                         "period-config": "metadata.accounting.periods.0"},
+                    ]},
+                ],
+                "worksheets": [
+                    {"row": [
+                        {"kind": "computation", "computation": "a",
+                         "period-config": "metadata.tax.period"},
+                    ]},
+                ],
+            },
+        })
+
+        with patch('ixbrl_reporter.data_source.get_computations'):
+            data_source = DataSource(cfg, Mock())
+            periods = data_source.get_computation_periods()
+
+        assert [p.name for p in periods] == ["2020", "tax"]
+        assert periods[1] is data_source.get_config_period(
+            "metadata.tax.period"
+        )
+
     def test_get_period_by_name_existing(self):
         """Test getting period by name"""
         mock_cfg = Mock()
@@ -668,6 +805,73 @@ class TestDataSource:
             with pytest.raises(RuntimeError, match="Couldn't find report.elements"):
                 data_source.get_element("elem1")
     
+    def test_get_element_indexes_once(self):
+        """Test element definitions are only fetched once"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [
+            "scheme", "number",  # init
+            [  # elements
+                {"id": "elem1", "kind": "test"},
+                {"id": "elem2", "kind": "test"}
+            ]
+        ]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'), \
+             patch('ixbrl_reporter.data_source.Element') as mock_element_class:
+
+            data_source = DataSource(mock_cfg, mock_session)
+            data_source.get_element("elem1")
+            data_source.get_element("elem2")
+            data_source.get_element("elem1")
+
+            assert mock_cfg.get.call_count == 3
+            assert mock_element_class.load.call_count == 3
+            mock_element_class.load.assert_called_with(
+                {"id": "elem1", "kind": "test"}, data_source
+            )
+
+    def test_get_element_duplicate_id_raises_error(self):
+        """Test duplicate element ids are reported"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [
+            "scheme", "number",  # init
+            [  # elements
+                {"id": "elem1", "kind": "test"},
+                {"id": "elem1", "kind": "other"}
+            ]
+        ]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            data_source = DataSource(mock_cfg, mock_session)
+
+            with pytest.raises(RuntimeError, match="Element id 'elem1' is defined more than once"):
+                data_source.get_element("elem1")
+
+    def test_get_worksheet_duplicate_id_raises_error(self):
+        """Test duplicate worksheet ids are reported"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [
+            "scheme", "number",  # init
+            [  # worksheets
+                {"id": "ws1", "kind": "simple"},
+                {"id": "ws1", "kind": "flex"}
+            ]
+        ]
+        mock_session = Mock()
+
+        with patch('ixbrl_reporter.data_source.get_computations'), \
+             patch('ixbrl_reporter.data_source.Context'):
+
+            data_source = DataSource(mock_cfg, mock_session)
+
+            with pytest.raises(RuntimeError, match="Worksheet id 'ws1' is defined more than once"):
+                data_source.get_worksheet("ws1")
+
     def test_get_config(self):
         """Test getting config value"""
         mock_cfg = Mock()
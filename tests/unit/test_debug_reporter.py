@@ -111,12 +111,12 @@ class TestDebugReporterHandleTable:
             
             # Verify print statements
             expected_calls = [
-                call("Table:"),
-                call(),
-                call("Table has", 2, "header levels"),
-                call("Table has", 5, "columns"),
-                call("Table has", 10, "rows"),
-                call("Table has", 3, "index levels")
+                call("Table:", file=self.output),
+                call(file=self.output),
+                call("Table has", 2, "header levels", file=self.output),
+                call("Table has", 5, "columns", file=self.output),
+                call("Table has", 10, "rows", file=self.output),
+                call("Table has", 3, "index levels", file=self.output)
             ]
             mock_print.assert_has_calls(expected_calls)
     
@@ -212,7 +212,7 @@ class TestDebugReporterHandleColumn:
         assert "    " in output_content  # 2 * 2 spaces for indent=2
         
         # Verify print was called with column description
-        mock_print.assert_called_once_with("Column:", "Test Column")
+        mock_print.assert_called_once_with("Column:", "Test Column", file=self.output)
     
     def test_handle_column_with_children(self):
         """handle should recursively process Column children"""
@@ -257,7 +257,7 @@ class TestDebugReporterHandleColumn:
         
         # Should only call handle once (no children to recurse)
         mock_handle.assert_called_once_with(mock_column, self.output)
-        mock_print.assert_called_once_with("Column:", "Leaf Column")
+        mock_print.assert_called_once_with("Column:", "Leaf Column", file=self.output)
 
 
 class TestDebugReporterHandleIndex:
@@ -378,6 +378,25 @@ class TestDebugReporterHandleRow:
         ]
         mock_handle.assert_has_calls(expected_calls)
     
+    def test_handle_row_written_in_order(self):
+        """Indentation and descriptions should reach the stream in order"""
+        from ixbrl_reporter.table import Row, Cell
+
+        mock_row = Mock(spec=Row)
+        mock_cell1 = Mock(spec=Cell)
+        mock_cell1.value = Mock(value="test1")
+        mock_cell2 = Mock(spec=Cell)
+        mock_cell2.value = Mock(value=1.234)
+        mock_row.values = [mock_cell1, mock_cell2]
+
+        self.reporter.handle(mock_row, self.output, indent=1)
+
+        assert self.output.getvalue() == (
+            "  Row:\n"
+            "    Cell: test1\n"
+            "    Cell: 1.23\n"
+        )
+
     def test_handle_row_empty_values(self):
         """handle should handle Row with empty values"""
         from ixbrl_reporter.table import Row
@@ -390,7 +409,7 @@ class TestDebugReporterHandleRow:
                 self.reporter.handle(mock_row, self.output)
         
         # Should still print "Row:" but not recurse
-        mock_print.assert_called_once_with("Row:")
+        mock_print.assert_called_once_with("Row:", file=self.output)
         mock_handle.assert_called_once_with(mock_row, self.output)
 
 
@@ -415,7 +434,7 @@ class TestDebugReporterHandleCell:
             self.reporter.handle(mock_cell, self.output, indent=1)
         
         # Should print rounded float value
-        mock_print.assert_called_once_with("Cell:", 123.46)
+        mock_print.assert_called_once_with("Cell:", 123.46, file=self.output)
         
         # Verify indentation
         output_content = self.output.getvalue()
@@ -434,7 +453,7 @@ class TestDebugReporterHandleCell:
             self.reporter.handle(mock_cell, self.output)
         
         # Should print string value without modification
-        mock_print.assert_called_once_with("Cell:", "Test String Value")
+        mock_print.assert_called_once_with("Cell:", "Test String Value", file=self.output)
     
     def test_handle_cell_with_integer_value(self):
         """handle should display integer Cell values as-is"""
@@ -449,7 +468,7 @@ class TestDebugReporterHandleCell:
             self.reporter.handle(mock_cell, self.output, indent=2)
         
         # Should print integer value without rounding
-        mock_print.assert_called_once_with("Cell:", 42)
+        mock_print.assert_called_once_with("Cell:", 42, file=self.output)
     
     def test_handle_cell_with_none_value(self):
         """handle should handle Cell with None value"""
@@ -464,7 +483,7 @@ class TestDebugReporterHandleCell:
             self.reporter.handle(mock_cell, self.output)
         
         # Should print None value
-        mock_print.assert_called_once_with("Cell:", None)
+        mock_print.assert_called_once_with("Cell:", None, file=self.output)
     
     def test_handle_cell_with_boolean_value(self):
         """handle should handle Cell with boolean value"""
@@ -479,7 +498,7 @@ class TestDebugReporterHandleCell:
             self.reporter.handle(mock_cell, self.output)
         
         # Should print boolean value
-        mock_print.assert_called_once_with("Cell:", True)
+        mock_print.assert_called_once_with("Cell:", True, file=self.output)
 
 
 class TestDebugReporterHandleIndentation:
@@ -2,6 +2,7 @@
 Unit tests for ixbrl_reporter.expand module
 """
 import pytest
+import re
 from unittest.mock import Mock, MagicMock, patch
 
 from ixbrl_reporter.expand import expand_string
@@ -404,4 +405,57 @@ class TestExpandStringIntegration:
             
             self.mock_data.get_config.assert_called_with("report.taxonomy.note-templates.")
             mock_string_elt.assert_called_once_with("simple text", self.mock_data)
-            assert result == mock_string_instance
\ No newline at end of file
+            assert result == mock_string_instance
+
+class TestNoteParser:
+    """Test NoteParser tokenizing"""
+
+    def kinds(self, tokens):
+        return [type(t).__name__ for t in tokens]
+
+    def test_parse_tokens(self):
+        """Markup should produce tokens in order, text between them"""
+        tokens = NoteParser.tokenize(
+            "Profit ~(profit:2020) for ~[name:The :.:none], ~{tag:ctxt=x~[y]}."
+        )
+
+        assert self.kinds(tokens) == [
+            "TextToken", "ComputationToken", "TextToken", "MetadataToken",
+            "TextToken", "TagOpen", "TextToken", "MetadataToken", "TagClose",
+            "TextToken"
+        ]
+        assert (tokens[1].name, tokens[1].context) == ("profit", "2020")
+        assert (tokens[3].name, tokens[3].prefix, tokens[3].suffix,
+                tokens[3].null) == ("name", "The ", ".", "none")
+        assert (tokens[5].name, tokens[5].context) == ("tag", "ctxt")
+        assert tokens[8].name == "tag"
+        assert tokens[9].text == "."
+
+    @pytest.mark.parametrize("note,error", [
+        ("a ~x", "Didn't expect character 'x' after a tilde"),
+        ("a ~", "Unbalanced note, in state 2"),
+        ("a ~{tag", "Unbalanced note, in state 3"),
+        ("a ~(comp", "Unbalanced note, in state 4"),
+        ("a ~[meta", "Unbalanced note, in state 5"),
+        ("~{a:b:c=x}", "Too many parts to tag name: a:b:c"),
+        ("~[a:b:c:d:e]", "Too many fields: a:b:c:d:e"),
+        ("~(a:b:c:d)", "Too many fields: a:b:c:d"),
+    ])
+    def test_parse_errors(self, note, error):
+        """Bad markup should be reported"""
+        with pytest.raises(RuntimeError, match=re.escape(error)):
+            NoteParser.tokenize(note)
+
+    def test_parse_cached(self):
+        """A note should only be tokenized once"""
+        note = "Cached ~[note-parse-cache]"
+        NoteParser.cache.pop(note, None)
+
+        with patch.object(NoteParser, 'tokenize',
+                          wraps=NoteParser.tokenize) as mock_tokenize:
+            first = NoteParser.parse(note)
+            second = NoteParser.parse(note)
+
+        mock_tokenize.assert_called_once_with(note)
+        assert self.kinds(first) == self.kinds(second)
+        assert first is not second
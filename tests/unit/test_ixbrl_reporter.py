@@ -368,6 +368,43 @@ class TestIxbrlReporterFactCreation:
         
         assert result == mock_ix_element
     
+    def test_create_tagged_money_fact_html(self):
+        """Tagged money facts should keep their layout untagged in HTML"""
+        mock_fact = Mock()
+        mock_fact.value = -1000.0
+        mock_fact.name = "uk-gaap:TurnoverGrossOperatingRevenue"
+        mock_fact.context = "context-1"
+        mock_fact.reverse = False
+
+        self.mock_par.tag_facts = False
+        mock_spans = [Mock(), Mock(), Mock(), Mock()]
+        self.mock_xhtml_maker.span.side_effect = mock_spans
+
+        result = self.reporter.create_tagged_money_fact(mock_fact, "section")
+
+        self.mock_ix_maker.nonFraction.assert_not_called()
+        self.mock_xhtml_maker.span.assert_any_call("1,000.00")
+        mock_spans[0].set.assert_not_called()
+        mock_spans[1].append.assert_has_calls([
+            call(mock_spans[2]), call(mock_spans[0]), call(mock_spans[3])
+        ])
+        assert result == mock_spans[1]
+
+    def test_create_tagged_fact_html(self):
+        """Tagged non-money facts should be plain spans in HTML"""
+        mock_fact = Mock()
+        mock_fact.value = 12
+
+        self.mock_par.tag_facts = False
+        mock_span = Mock()
+        self.mock_xhtml_maker.span.return_value = mock_span
+
+        result = self.reporter.create_tagged_fact(mock_fact, "section")
+
+        self.mock_ix_maker.nonFraction.assert_not_called()
+        self.mock_xhtml_maker.span.assert_called_once_with("12")
+        assert result == mock_span
+
     def test_create_untagged_fact_non_money(self):
         """create_untagged_fact should return plain text for non-money facts"""
         mock_fact = Mock()
@@ -230,11 +230,11 @@ class TestTagElt:
         mock_content = Mock()
         tag_elt = TagElt("div", {}, [mock_content], mock_data)
         
-        with patch('builtins.print') as mock_print:
-            tag_elt.to_debug(Mock(), Mock())
+        out = StringIO()
+        tag_elt.to_debug(Mock(), out)
         
         mock_content.to_debug.assert_called()
-        mock_print.assert_called_with("tag:", "div")
+        assert out.getvalue() == "tag: div\n"
 
 
 class TestIfdefElt:
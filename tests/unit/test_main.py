@@ -3,10 +3,29 @@ Unit tests for ixbrl_reporter.__main__ module
 """
 import pytest
 import sys
+import os
+import gzip
+import zipfile
 from unittest.mock import Mock, patch, MagicMock, call
-from io import StringIO
+from io import StringIO, BytesIO, TextIOWrapper
 
-from ixbrl_reporter.__main__ import main
+from ixbrl_reporter.__main__ import main, formats
+
+
+def make_stdout():
+    """A text stream over bytes, like the real standard output"""
+    return TextIOWrapper(BytesIO(), encoding="utf-8")
+
+
+def assert_written(method, taxonomy, text=False):
+    """Documents go to the bytes under stdout, text to a wrapper over them"""
+    method.assert_called_once()
+    tx, out = method.call_args[0]
+    assert tx is taxonomy
+    if text:
+        assert isinstance(out, TextIOWrapper)
+    else:
+        assert out is sys.stdout.buffer
 
 
 class TestMainArgumentParsing:
@@ -52,6 +71,16 @@ class TestMainArgumentParsing:
                                 pass
 
 
+    def test_compile_taxonomy(self):
+        """compile-taxonomy should compile without loading a config"""
+        with patch('sys.argv', ['script', 'compile-taxonomy', 'tx.yaml', 'tx.ixtx']):
+            with patch('ixbrl_reporter.__main__.Config') as mock_config:
+                with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy:
+                    main()
+
+                    mock_taxonomy.compile.assert_called_once_with("tx.yaml", "tx.ixtx")
+                    mock_config.load.assert_not_called()
+
 class TestMainVersionRetrieval:
     """Test version retrieval from package metadata"""
     
@@ -166,6 +195,33 @@ class TestMainConfigurationLoading:
                         accounts_class.assert_called_once_with("test.csv")
                         mock_data_source.assert_called_once_with(config_instance, accounts_session)
 
+    @patch('sys.argv', ['script', 'config.yaml', 'report.yaml', 'html'])
+    def test_union_accounts_processing(self):
+        """Union accounts should be opened from the source list"""
+        with patch('ixbrl_reporter.__main__.Config') as mock_config:
+            with patch('ixbrl_reporter.__main__.accounts') as mock_accounts:
+                with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source:
+                    with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
+
+                        sources = [{"kind": "csv", "file": "a.csv"}]
+                        config_instance = Mock()
+                        config_instance.get.side_effect = lambda key: {
+                            "accounts.kind": "union",
+                            "accounts.sources": sources
+                        }[key]
+                        mock_config.load.return_value = config_instance
+
+                        accounts_class = Mock()
+                        mock_accounts.get_class.return_value = accounts_class
+
+                        try:
+                            main()
+                        except Exception:
+                            pass
+
+                        mock_accounts.get_class.assert_called_once_with("union")
+                        accounts_class.assert_called_once_with(sources)
+
 
 class TestMainOutputFormats:
     """Test different output format handling"""
@@ -197,7 +253,7 @@ class TestMainOutputFormats:
                 with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source_cls:
                     with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy_cls:
                         with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
-                            with patch('sys.stdout', new_callable=StringIO):
+                            with patch('sys.stdout', new_callable=make_stdout):
                                 
                                 # Set up mocks
                                 mock_config_cls.load.return_value = self.mock_config
@@ -208,7 +264,7 @@ class TestMainOutputFormats:
                                 main()
                                 
                                 # Verify ixbrl output was called
-                                self.mock_element.to_ixbrl.assert_called_once_with(self.mock_taxonomy, sys.stdout)
+                                assert_written(self.mock_element.to_ixbrl, self.mock_taxonomy)
     
     @patch('sys.argv', ['script', 'config.yaml', 'report.yaml', 'html'])
     def test_html_output_format(self):
@@ -218,7 +274,7 @@ class TestMainOutputFormats:
                 with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source_cls:
                     with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy_cls:
                         with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
-                            with patch('sys.stdout', new_callable=StringIO):
+                            with patch('sys.stdout', new_callable=make_stdout):
                                 
                                 # Set up mocks
                                 mock_config_cls.load.return_value = self.mock_config
@@ -229,7 +285,7 @@ class TestMainOutputFormats:
                                 main()
                                 
                                 # Verify html output was called
-                                self.mock_element.to_html.assert_called_once_with(self.mock_taxonomy, sys.stdout)
+                                assert_written(self.mock_element.to_html, self.mock_taxonomy)
     
     @patch('sys.argv', ['script', 'config.yaml', 'report.yaml', 'text'])
     def test_text_output_format(self):
@@ -239,7 +295,7 @@ class TestMainOutputFormats:
                 with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source_cls:
                     with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy_cls:
                         with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
-                            with patch('sys.stdout', new_callable=StringIO):
+                            with patch('sys.stdout', new_callable=make_stdout):
                                 
                                 # Set up mocks
                                 mock_config_cls.load.return_value = self.mock_config
@@ -250,7 +306,7 @@ class TestMainOutputFormats:
                                 main()
                                 
                                 # Verify text output was called
-                                self.mock_element.to_text.assert_called_once_with(self.mock_taxonomy, sys.stdout)
+                                assert_written(self.mock_element.to_text, self.mock_taxonomy, text=True)
     
     @patch('sys.argv', ['script', 'config.yaml', 'report.yaml', 'debug'])
     def test_debug_output_format(self):
@@ -260,7 +316,7 @@ class TestMainOutputFormats:
                 with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source_cls:
                     with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy_cls:
                         with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
-                            with patch('sys.stdout', new_callable=StringIO):
+                            with patch('sys.stdout', new_callable=make_stdout):
                                 
                                 # Set up mocks
                                 mock_config_cls.load.return_value = self.mock_config
@@ -271,7 +327,7 @@ class TestMainOutputFormats:
                                 main()
                                 
                                 # Verify debug output was called
-                                self.mock_element.to_debug.assert_called_once_with(self.mock_taxonomy, sys.stdout)
+                                assert_written(self.mock_element.to_debug, self.mock_taxonomy, text=True)
     
     @patch('sys.argv', ['script', 'config.yaml', 'report.yaml', 'unknown'])
     def test_unknown_output_format_raises_error(self):
@@ -380,7 +436,7 @@ class TestMainIntegration:
                 with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source:
                     with patch('ixbrl_reporter.__main__.Taxonomy') as mock_taxonomy:
                         with patch('ixbrl_reporter.__main__.version', return_value='1.2.3'):
-                            with patch('sys.stdout', new_callable=StringIO):
+                            with patch('sys.stdout', new_callable=make_stdout):
                                 
                                 # Set up complete mock chain
                                 config_instance = Mock()
@@ -416,7 +472,7 @@ class TestMainIntegration:
                                 mock_data_source.assert_called_once_with(config_instance, accounts_session)
                                 data_source_instance.get_element.assert_called_once_with('report.yaml')
                                 mock_taxonomy.assert_called_once_with("taxonomy.yaml", data_source_instance)
-                                element_instance.to_html.assert_called_once_with(taxonomy_instance, sys.stdout)
+                                assert_written(element_instance.to_html, taxonomy_instance)
 
 
 class TestMainParametrized:
@@ -424,11 +480,12 @@ class TestMainParametrized:
     
     @pytest.mark.parametrize("format_type,method_name", [
         ("ixbrl", "to_ixbrl"),
+        ("ixbrl-stream", "to_ixbrl_stream"),
         ("html", "to_html"),
         ("text", "to_text"),
         ("debug", "to_debug")
     ])
-    @patch('sys.stdout', new_callable=StringIO)
+    @patch('sys.stdout', new_callable=make_stdout)
     def test_all_output_formats(self, mock_stdout, format_type, method_name):
         """Test that all supported output formats work correctly"""
         with patch('sys.argv', ['script', 'config.yaml', 'report.yaml', format_type]):
@@ -457,7 +514,7 @@ class TestMainParametrized:
                                 
                                 # Verify correct method was called
                                 method = getattr(element_instance, method_name)
-                                method.assert_called_once_with(taxonomy_instance, sys.stdout)
+                                assert_written(method, taxonomy_instance, formats[format_type][2])
     
     @pytest.mark.parametrize("invalid_format", [
         "pdf", "xml", "json", "csv", "unknown", "IXBRL", "HTML"
@@ -481,6 +538,205 @@ class TestMainParametrized:
                                 main()
 
 
+class TestMainOutputDirectory:
+    """Test writing to output files and directories"""
+
+    def run_main(self, argv, element_instance=None):
+        with patch('sys.argv', argv):
+            with patch('ixbrl_reporter.__main__.Config') as mock_config:
+                with patch('ixbrl_reporter.__main__.accounts') as mock_accounts:
+                    with patch('ixbrl_reporter.__main__.DataSource') as mock_data_source:
+                        with patch('ixbrl_reporter.__main__.TaxonomyModel') as mock_model, \
+                             patch('ixbrl_reporter.__main__.Taxonomy'):
+                            with patch('ixbrl_reporter.__main__.version', return_value='1.1.2'):
+
+                                config_instance = Mock()
+                                config_instance.get.side_effect = lambda key: "test-value"
+                                mock_config.load.return_value = config_instance
+                                mock_accounts.get_class.return_value = Mock(return_value=Mock())
+
+                                data_source_instance = Mock()
+                                if element_instance is None:
+                                    element_instance = Mock()
+                                data_source_instance.get_element.return_value = element_instance
+                                mock_data_source.return_value = data_source_instance
+
+                                main()
+
+                                return element_instance, mock_model
+
+    def test_formats_written_to_directory(self, tmp_path):
+        """Each format should be written to its own file"""
+        element, model = self.run_main([
+            'script', 'config.yaml', 'report', 'ixbrl,html,text',
+            str(tmp_path / "out")
+        ])
+
+        element.to_ixbrl.assert_called_once()
+        element.to_html.assert_called_once()
+        element.to_text.assert_called_once()
+        element.to_debug.assert_not_called()
+
+        assert sorted(os.listdir(tmp_path / "out")) == [
+            "report.html", "report.txt", "report.xhtml"
+        ]
+
+        # The taxonomy configuration is loaded once, with a document for
+        # each format.
+        model.assert_called_once_with("test-value")
+        assert model.return_value.document.call_count == 3
+
+    def test_every_format_gets_own_file(self, tmp_path):
+        """Formats with the same kind of output should not overwrite"""
+        def writer(name):
+            def write(tx, out):
+                out.write(name.encode("ascii"))
+            return write
+
+        element = Mock()
+        element.to_ixbrl.side_effect = writer("ixbrl")
+        element.to_ixbrl_stream.side_effect = writer("stream")
+        element.to_html.side_effect = writer("html")
+        element.to_text.side_effect = lambda tx, out: out.write("text")
+        self.run_main([
+            'script', 'config.yaml', 'report', 'ixbrl,ixbrl-stream,html,text',
+            str(tmp_path)
+        ], element)
+
+        assert sorted(os.listdir(tmp_path)) == [
+            "report-stream.xhtml", "report.html", "report.txt", "report.xhtml"
+        ]
+        assert (tmp_path / "report.xhtml").read_text() == "ixbrl"
+        assert (tmp_path / "report-stream.xhtml").read_text() == "stream"
+
+    def test_debug_written_to_own_file(self, tmp_path):
+        """Debug output should go to its file, not to stdout"""
+        from ixbrl_reporter.layout import TagElt
+
+        content = Mock()
+        content.to_debug.side_effect = lambda tx, out: out.write("text\n")
+        elt = TagElt("div", {}, [content], Mock())
+
+        element = Mock()
+        element.to_debug.side_effect = elt.to_debug
+        with patch('sys.stdout', new_callable=make_stdout) as stdout:
+            self.run_main([
+                'script', 'config.yaml', 'report', 'text,debug', str(tmp_path)
+            ], element)
+            assert stdout.buffer.getvalue() == b""
+
+        assert (tmp_path / "report.debug").read_text() == "text\ntag: div\n"
+
+    def test_repeated_format_rejected(self, tmp_path):
+        """A format given twice should fail before output"""
+        with patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(RuntimeError, match="only be given once"):
+                self.run_main([
+                    'script', 'config.yaml', 'report', 'html,html',
+                    str(tmp_path)
+                ])
+        assert os.listdir(tmp_path) == []
+
+    def test_single_format_to_file(self, tmp_path):
+        """A single format should be written to a file through a sink"""
+        path = tmp_path / "report.txt.gz"
+
+        def write_text(tx, out):
+            out.write("Profit: \u00a3100\n")
+
+        element = Mock()
+        element.to_text.side_effect = write_text
+        self.run_main(
+            ['script', 'config.yaml', 'report', 'text', str(path)], element
+        )
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert f.read() == "Profit: \u00a3100\n"
+
+    def test_several_formats_need_directory(self):
+        """Several formats without an output directory should fail"""
+        with patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(RuntimeError, match="output directory"):
+                self.run_main(['script', 'config.yaml', 'report', 'ixbrl,html'])
+
+    @pytest.mark.parametrize("fmt", ["html", "text", "debug"])
+    @pytest.mark.parametrize("name", ["out.zip", "out.xbri"])
+    def test_only_ixbrl_packaged(self, tmp_path, name, fmt):
+        """Formats other than iXBRL should not be written to a package"""
+        path = tmp_path / name
+        with patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(RuntimeError, match="Only iXBRL output"):
+                self.run_main([
+                    'script', 'config.yaml', 'report', fmt, str(path)
+                ])
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.parametrize("fmt", ["ixbrl", "ixbrl-stream"])
+    def test_ixbrl_packaged(self, tmp_path, fmt):
+        """iXBRL output should be written to a package"""
+        path = tmp_path / "accts.xbri"
+        element = Mock()
+        getattr(element, formats[fmt][0]).side_effect = \
+            lambda tx, out: out.write(b"<html/>")
+        self.run_main(['script', 'config.yaml', 'report', fmt, str(path)],
+                      element)
+
+        with zipfile.ZipFile(path) as zf:
+            assert zf.read("accts/reports/accts.xhtml") == b"<html/>"
+
+    @pytest.mark.parametrize("name", ["out.zip", "out.xbri", "out.gz"])
+    def test_several_formats_not_to_package(self, tmp_path, name):
+        """Several formats to a package or compressed name should fail"""
+        path = tmp_path / name
+        with patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(RuntimeError, match="written to a directory"):
+                self.run_main([
+                    'script', 'config.yaml', 'report', 'ixbrl,html', str(path)
+                ])
+        assert os.listdir(tmp_path) == []
+
+    def test_document_written_as_bytes_to_stdout(self):
+        """Documents should go to stdout as serialised, not as text"""
+        element = Mock()
+        element.to_ixbrl.side_effect = \
+            lambda tx, out: out.write("£".encode("utf-8"))
+        with patch('sys.stdout', new_callable=make_stdout) as stdout:
+            self.run_main(['script', 'config.yaml', 'report', 'ixbrl'], element)
+            assert stdout.buffer.getvalue() == "£".encode("utf-8")
+
+    def test_debug_written_in_order_to_stdout(self):
+        """Debug output from layout elements should keep its order"""
+        from ixbrl_reporter.layout import TagElt
+
+        content = Mock()
+        content.to_debug.side_effect = lambda tx, out: out.write("text\n")
+        elt = TagElt("div", {}, [content], Mock())
+
+        element = Mock()
+        element.to_debug.side_effect = elt.to_debug
+        with patch('sys.stdout', new_callable=make_stdout) as stdout:
+            self.run_main(['script', 'config.yaml', 'report', 'debug'], element)
+            assert stdout.buffer.getvalue() == b"text\ntag: div\n"
+
+    def test_text_written_as_utf8_to_stdout(self):
+        """Text formats should reach stdout as UTF-8"""
+        element = Mock()
+        element.to_text.side_effect = lambda tx, out: out.write("£")
+        with patch('sys.stdout', new_callable=make_stdout) as stdout:
+            self.run_main(['script', 'config.yaml', 'report', 'text'], element)
+            assert stdout.buffer.getvalue() == "£".encode("utf-8")
+
+    def test_unknown_format_in_list(self, tmp_path):
+        """An unknown format in the list should fail before output"""
+        with patch('sys.stderr', new_callable=StringIO):
+            with pytest.raises(RuntimeError, match="Output type 'pdf' not known"):
+                self.run_main([
+                    'script', 'config.yaml', 'report', 'html,pdf',
+                    str(tmp_path)
+                ])
+        assert os.listdir(tmp_path) == []
+
+
 class TestMainEdgeCases:
     """Test edge cases and boundary conditions"""
     
@@ -0,0 +1,92 @@
+"""
+Unit tests for ixbrl_reporter.output module
+"""
+import pytest
+import gzip
+import json
+import zipfile
+
+from ixbrl_reporter.output import (
+    FileSink, GzipSink, ReportPackageSink, get_sink, is_package
+)
+
+
+class TestGetSink:
+    """Test choosing a sink from the file name"""
+
+    @pytest.mark.parametrize("path,cls", [
+        ("accts.html", FileSink),
+        ("accts.txt", FileSink),
+        ("accts.html.gz", GzipSink),
+        ("accts.zip", ReportPackageSink),
+        ("accts.xbri", ReportPackageSink),
+    ])
+    def test_sink_by_extension(self, path, cls):
+        """The extension should select the sink"""
+        sink = get_sink(path)
+        assert isinstance(sink, cls)
+        assert sink.path == path
+
+    @pytest.mark.parametrize("path,package", [
+        ("accts.zip", True),
+        ("accts.xbri", True),
+        ("accts.html.gz", False),
+        ("accts.xhtml", False),
+    ])
+    def test_is_package(self, path, package):
+        """Package names should be recognised by their extension"""
+        assert is_package(path) == package
+
+
+class TestSinks:
+    """Test writing through sinks"""
+
+    def test_file_sink(self, tmp_path):
+        """File sink should write bytes as given"""
+        path = tmp_path / "accts.html"
+        with FileSink(str(path)).open() as out:
+            out.write(b"<html/>")
+        assert path.read_bytes() == b"<html/>"
+
+    def test_gzip_sink(self, tmp_path):
+        """Gzip sink should compress the output"""
+        path = tmp_path / "accts.html.gz"
+        with GzipSink(str(path)).open() as out:
+            out.write(b"<html>")
+            out.write(b"</html>")
+        with gzip.open(path) as f:
+            assert f.read() == b"<html></html>"
+
+
+class TestReportPackageSink:
+    """Test writing report packages"""
+
+    def write(self, path):
+        with ReportPackageSink(str(path)).open() as out:
+            out.write(b"<html>")
+            out.write(b"</html>")
+        return zipfile.ZipFile(path)
+
+    def test_package_layout(self, tmp_path):
+        """Package should have one top-level directory, META-INF and reports"""
+        zf = self.write(tmp_path / "accts.xbri")
+
+        assert sorted(zf.namelist()) == [
+            "accts/META-INF/reportPackage.json",
+            "accts/reports/accts.xhtml",
+        ]
+        assert zf.read("accts/reports/accts.xhtml") == b"<html></html>"
+        assert zf.getinfo("accts/reports/accts.xhtml").compress_type == \
+            zipfile.ZIP_DEFLATED
+
+    def test_document_type(self, tmp_path):
+        """An .xbri package should be an inline XBRL report package"""
+        zf = self.write(tmp_path / "accts.xbri")
+        info = json.loads(zf.read("accts/META-INF/reportPackage.json"))
+        assert info["documentInfo"]["documentType"] == \
+            "https://xbrl.org/report-package/2023/xbri"
+
+        zf = self.write(tmp_path / "accts.zip")
+        info = json.loads(zf.read("accts/META-INF/reportPackage.json"))
+        assert info["documentInfo"]["documentType"] == \
+            "https://xbrl.org/report-package/2023"
@@ -0,0 +1,194 @@
+"""
+Unit tests for ixbrl_reporter.parallel module
+"""
+import pytest
+from unittest.mock import Mock, patch
+from lxml import etree
+
+from ixbrl_reporter import parallel
+from ixbrl_reporter.basic_element import BasicElement
+from ixbrl_reporter.composite import Composite
+from ixbrl_reporter.fact import StringFact
+
+xhtml_ns = "http://www.w3.org/1999/xhtml"
+ix_ns = "http://www.xbrl.org/2013/inlineXBRL"
+
+
+class FakeTaxonomy:
+    """Numbers contexts in order of use, as Taxonomy does"""
+
+    def __init__(self):
+        self.contexts = {"predefined": "ctxt-0"}
+        self.next_context_id = 1
+        self.contexts_used = set()
+        self.metadata = {}
+
+    def get_context_id(self, ctxt):
+        if ctxt not in self.contexts:
+            self.contexts[ctxt] = "ctxt-" + str(self.next_context_id)
+            self.next_context_id += 1
+        return self.contexts[ctxt]
+
+
+class FakeElement:
+    """Renders a fact in each of a list of contexts"""
+
+    def __init__(self, ctxts):
+        self.ctxts = ctxts
+
+    def to_ixbrl_elt(self, par, taxonomy):
+        div = par.xhtml_maker.div()
+        for ctxt in self.ctxts:
+            id = taxonomy.get_context_id(ctxt)
+            taxonomy.contexts_used.add(id)
+            div.append(par.xhtml_maker.span(
+                par.ix_maker.nonNumeric({"name": "x", "contextRef": id}, ""),
+            ))
+        return [div]
+
+
+class MetadataElement:
+    """Makes a metadata fact, as Taxonomy.get_metadata_by_id does"""
+
+    def __init__(self, id, ctxt):
+        self.id = id
+        self.ctxt = ctxt
+
+    def to_ixbrl_elt(self, par, taxonomy):
+        fact = StringFact(taxonomy.get_context_id(self.ctxt), "x", self.id)
+        taxonomy.metadata[self.id] = fact
+        return [par.xhtml_maker.div()]
+
+
+class AccountsElement:
+    """Reads the accounts while rendering"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def to_ixbrl_elt(self, par, taxonomy):
+        self.data.session.get_splits("Assets", None, None)
+        return []
+
+
+class TestParallelRender:
+    """Test rendering elements in worker processes"""
+
+    def setup_method(self):
+        self.par = BasicElement("root", Mock())
+        self.par.add_makers({None: xhtml_ns, "ix": ix_ns})
+        self.data = Mock()
+        self.data.get_computation_periods.return_value = []
+        self.elements = [
+            FakeElement(["a", "b"]),
+            FakeElement(["predefined", "c", "a"]),
+            FakeElement(["d", "c"]),
+        ]
+
+    def render(self, fn):
+        taxonomy = FakeTaxonomy()
+        elts = fn(taxonomy)
+        doc = self.par.root_maker.div(*elts)
+        return etree.tostring(doc), taxonomy
+
+    # Fewer workers than elements means workers are started for more than
+    # one element.
+    @pytest.mark.parametrize("workers", [1, 2, 3])
+    def test_same_as_sequential(self, workers):
+        """Output and contexts should match rendering in turn"""
+        def sequential(taxonomy):
+            elts = []
+            for v in self.elements:
+                elts.extend(v.to_ixbrl_elt(self.par, taxonomy))
+            return elts
+
+        def in_parallel(taxonomy):
+            return parallel.render(
+                self.elements, self.par, taxonomy, self.data, workers
+            )
+
+        doc1, tx1 = self.render(sequential)
+        doc2, tx2 = self.render(in_parallel)
+
+        assert doc2 == doc1
+        assert tx2.contexts == tx1.contexts
+        assert list(tx2.contexts) == list(tx1.contexts)
+        assert tx2.contexts_used == tx1.contexts_used
+        assert b'<ix:nonNumeric name="x" contextRef="ctxt-4"></ix:nonNumeric>' \
+            in doc2
+
+    def test_computations_done_first(self):
+        """Computations should be done before workers start"""
+        self.data.get_computation_periods.return_value = ["p1", "p2"]
+
+        parallel.render(
+            self.elements, self.par, FakeTaxonomy(), self.data, 2
+        )
+
+        assert self.data.perform_computations.call_count == 2
+
+    def test_workers_dont_use_accounts(self):
+        """A worker reading the accounts should fail, not use the parent's"""
+        elements = [AccountsElement(self.data), FakeElement(["a"])]
+
+        with pytest.raises(RuntimeError, match="Accounts used"):
+            parallel.render(elements, self.par, FakeTaxonomy(), self.data, 2)
+
+        self.data.session.get_splits.assert_not_called()
+
+    def test_metadata_facts_merged(self):
+        """Metadata facts made in workers should reach the taxonomy"""
+        elements = [
+            FakeElement(["a"]),
+            MetadataElement("m1", "b"),
+            MetadataElement("m2", "a"),
+        ]
+        taxonomy = FakeTaxonomy()
+
+        parallel.render(elements, self.par, taxonomy, self.data, 3)
+
+        assert set(taxonomy.metadata) == {"m1", "m2"}
+        assert taxonomy.metadata["m1"].context == taxonomy.contexts["b"]
+        assert taxonomy.metadata["m2"].context == taxonomy.contexts["a"]
+        assert taxonomy.metadata["m1"].value == "m1"
+
+    def test_merge_renumbers_contexts(self):
+        """Contexts from a worker should be numbered after existing ones"""
+        taxonomy = FakeTaxonomy()
+        taxonomy.get_context_id("a")
+
+        doc = (
+            '<div xmlns="%s" xmlns:ix="%s"><ix:nonNumeric contextRef="ctxt-1"/>'
+            '<ix:nonNumeric contextRef="ctxt-2"/></div>' % (xhtml_ns, ix_ns)
+        ).encode("utf-8")
+        result = (doc, [1], [("b", "ctxt-1"), ("a", "ctxt-2")],
+                  ["ctxt-1", "ctxt-2"], [])
+
+        elts = parallel.merge(result, taxonomy)
+
+        assert [e.get("contextRef") for e in elts] == ["ctxt-2", "ctxt-1"]
+        assert elts[0].text == ""
+        assert taxonomy.contexts_used == {"ctxt-1", "ctxt-2"}
+
+
+class TestCompositeParallel:
+    """Test Composite opting in to parallel rendering"""
+
+    @pytest.mark.parametrize("workers,expected", [(0, False), (1, False),
+                                                  (4, True)])
+    def test_render_workers(self, workers, expected):
+        """Composites should use workers when configured"""
+        data = Mock()
+        data.get_config.return_value = workers
+        a, b = Mock(), Mock()
+        a.to_ixbrl_elt.return_value = ["a"]
+        b.to_ixbrl_elt.return_value = ["b"]
+        composite = Composite("c", [a, b], data)
+
+        with patch('ixbrl_reporter.composite.parallel.render') as mock_render:
+            mock_render.return_value = ["a", "b"]
+            assert composite.to_ixbrl_elt(Mock(), Mock()) == ["a", "b"]
+
+        data.get_config.assert_called_with("render-workers", 0,
+                                           mandatory=False)
+        assert mock_render.called == expected
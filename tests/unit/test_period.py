@@ -0,0 +1,50 @@
+"""
+Unit tests for ixbrl_reporter.period module
+"""
+import pickle
+import pytest
+from datetime import date
+
+from ixbrl_reporter.period import Period
+
+
+class TestPeriod:
+    """Test Period class"""
+
+    def test_load(self):
+        """Test loading a period from configuration"""
+        period = Period.load({
+            "name": "2020", "start": "2020-01-01", "end": "2020-12-31"
+        })
+        assert period.name == "2020"
+        assert period.start == date(2020, 1, 1)
+        assert period.end == date(2020, 12, 31)
+        assert period.days() == 366
+
+    def test_load_bad_date_raises_error(self):
+        """Test loading a period with a bad date raises error"""
+        with pytest.raises(RuntimeError, match="Could not parse"):
+            Period.load({"name": "2020", "start": "bad", "end": "2020-12-31"})
+
+    def test_equal_by_value(self):
+        """Test periods with the same values are equal and hash the same"""
+        a = Period("2020", date(2020, 1, 1), date(2020, 12, 31))
+        b = Period("2020", date(2020, 1, 1), date(2020, 12, 31))
+        c = Period("2019", date(2020, 1, 1), date(2020, 12, 31))
+        assert a == b
+        assert hash(a) == hash(b)
+        assert a != c
+        assert len({a, b, c}) == 2
+
+    def test_immutable(self):
+        """Test periods can't be modified"""
+        period = Period("2020", date(2020, 1, 1), date(2020, 12, 31))
+        with pytest.raises(AttributeError):
+            period.name = "2021"
+        with pytest.raises(AttributeError):
+            period.extra = 1
+
+    def test_pickle(self):
+        """Test periods survive pickling"""
+        period = Period("2020", date(2020, 1, 1), date(2020, 12, 31))
+        assert pickle.loads(pickle.dumps(period)) == period
@@ -0,0 +1,157 @@
+"""
+Unit tests for ixbrl_reporter.provenance module
+"""
+import pytest
+from io import StringIO
+from unittest.mock import Mock
+from datetime import date
+
+from ixbrl_reporter.provenance import Provenance, Source
+from ixbrl_reporter.computation import (
+    Line, Group, Metadata, ResultSet, AT_END, IN_YEAR
+)
+from ixbrl_reporter.context import Context
+
+
+def make_metadata(id, period=IN_YEAR):
+    return Metadata(id, id.title(), Context(None), [], period, None)
+
+
+class TestSource:
+    """Test Source query records"""
+
+    def test_get_splits_queries_ledger(self):
+        """Source should re-run the recorded ledger query"""
+        session = Mock()
+        session.get_account.return_value = "acct"
+        session.get_splits.return_value = [{"amount": 1.0}]
+
+        src = Source("Income:Sales", date(2020, 1, 1), date(2020, 12, 31))
+
+        assert src.get_splits(session) == [{"amount": 1.0}]
+        session.get_account.assert_called_once_with(None, "Income:Sales")
+        session.get_splits.assert_called_once_with(
+            "acct", date(2020, 1, 1), date(2020, 12, 31)
+        )
+
+
+class TestProvenanceRecording:
+    """Test computations recording provenance"""
+
+    def setup_method(self):
+        self.session = Mock()
+        self.session.get_account.side_effect = lambda par, name: name
+        self.session.get_splits.return_value = [
+            {"date": date(2020, 3, 1), "amount": 10.0, "description": "Sale"}
+        ]
+        self.session.is_debit.return_value = False
+
+    def test_result_set_has_no_provenance_by_default(self):
+        """Provenance should be off unless attached"""
+        assert ResultSet().provenance is None
+
+    def test_line_records_sources(self):
+        """Line should record one source per account"""
+        line = Line(make_metadata("sales"), ["Income:Sales", "Income:Other"])
+
+        res = ResultSet()
+        res.provenance = Provenance()
+
+        line.compute(self.session, date(2020, 1, 1), date(2020, 12, 31), res)
+
+        sources = res.provenance.get_sources("sales")
+        assert [s.account for s in sources] == ["Income:Sales", "Income:Other"]
+        assert sources[0].start == date(2020, 1, 1)
+        assert sources[0].end == date(2020, 12, 31)
+
+    def test_line_records_history_range_for_instant(self):
+        """AT_END lines should record the full-history query"""
+        line = Line(make_metadata("bank", AT_END), ["Assets:Bank"])
+
+        res = ResultSet()
+        res.provenance = Provenance()
+
+        line.compute(self.session, date(2020, 1, 1), date(2020, 12, 31), res)
+
+        src = res.provenance.get_sources("bank")[0]
+        assert src.start == date(1970, 1, 1)
+        assert src.end == date(2020, 12, 31)
+
+    def test_group_records_inputs(self):
+        """Group should record the ids of its inputs"""
+        line = Line(make_metadata("sales"), ["Income:Sales"])
+        group = Group(make_metadata("income"), [line])
+
+        res = ResultSet()
+        res.provenance = Provenance()
+
+        group.compute(self.session, date(2020, 1, 1), date(2020, 12, 31), res)
+
+        assert res.provenance.get_inputs("income") == ["sales"]
+
+    def test_recompute_replaces_records(self):
+        """Computing twice should not duplicate sources"""
+        line = Line(make_metadata("sales"), ["Income:Sales"])
+
+        res = ResultSet()
+        res.provenance = Provenance()
+
+        line.compute(self.session, date(2020, 1, 1), date(2020, 12, 31), res)
+        line.compute(self.session, date(2020, 1, 1), date(2020, 12, 31), res)
+
+        assert len(res.provenance.get_sources("sales")) == 1
+
+    def test_no_recording_without_provenance(self):
+        """Computations should not fail when provenance is off"""
+        line = Line(make_metadata("sales"), ["Income:Sales"])
+        res = ResultSet()
+
+        total = line.compute(
+            self.session, date(2020, 1, 1), date(2020, 12, 31), res
+        )
+
+        assert total == 10.0
+
+
+class TestProvenanceExplain:
+    """Test explaining a computed value"""
+
+    def test_explain_expands_splits(self):
+        """explain should walk inputs and list contributing splits"""
+        session = Mock()
+        session.get_account.side_effect = lambda par, name: name
+        session.get_splits.return_value = [
+            {"date": date(2020, 3, 1), "amount": 10.0, "description": "Sale"}
+        ]
+        session.is_debit.return_value = False
+
+        line = Line(make_metadata("sales"), ["Income:Sales"])
+        group = Group(make_metadata("income"), [line])
+        comps = Provenance.index({"income": group})
+
+        res = ResultSet()
+        res.provenance = Provenance()
+        group.compute(session, date(2020, 1, 1), date(2020, 12, 31), res)
+
+        # Only the explain walk should touch the splits again
+        session.get_splits.reset_mock()
+
+        out = StringIO()
+        res.provenance.explain("income", session, comps, res, out)
+
+        text = out.getvalue()
+        assert "income (Income): 10.00" in text
+        assert "sales (Sales): 10.00" in text
+        assert "Income:Sales 2020-01-01..2020-12-31: 10.00" in text
+        assert "Sale" in text
+        session.get_splits.assert_called_once()
+
+    def test_index_finds_inline_inputs(self):
+        """index should include computations nested inside others"""
+        line = Line(make_metadata("sales"), ["Income:Sales"])
+        group = Group(make_metadata("income"), [line])
+
+        ix = Provenance.index({"income": group})
+
+        assert ix["sales"] is line
+        assert ix["income"] is group
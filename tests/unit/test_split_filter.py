@@ -0,0 +1,139 @@
+"""
+Unit tests for ixbrl_reporter.split_filter module
+"""
+import pytest
+from unittest.mock import Mock
+
+from ixbrl_reporter.split_filter import SplitFilter
+from ixbrl_reporter.splits import Splits, SplitCache
+
+
+def make_cfg(include=None, exclude=None):
+    cfg = Mock()
+    cfg.get.side_effect = lambda key, deflt=None, mandatory=True: {
+        "include": include, "exclude": exclude
+    }[key]
+    return cfg
+
+
+class TestSplitFilterLoad:
+    """Test loading filters from configuration"""
+
+    def test_no_rules_gives_no_filter(self):
+        """A Line without rules should not be filtered"""
+        assert SplitFilter.load(make_cfg()) is None
+
+    def test_identical_rules_same_key(self):
+        """Filters with the same rules should have the same key"""
+        a = SplitFilter.load(make_cfg(exclude=[{"memo": "x"}]))
+        b = SplitFilter.load(make_cfg(exclude=[{"memo": "x"}]))
+        c = SplitFilter.load(make_cfg(exclude=[{"memo": "y"}]))
+        assert a.key == b.key
+        assert a.key != c.key
+
+    def test_unknown_field_raises_error(self):
+        """Rules on unknown fields should be rejected"""
+        with pytest.raises(RuntimeError, match="Filter field 'payee' not known"):
+            SplitFilter.load(make_cfg(exclude=[{"payee": "x"}]))
+
+    def test_invalid_pattern_raises_error(self):
+        """Bad regular expressions should be reported at load time"""
+        with pytest.raises(RuntimeError, match="invalid"):
+            SplitFilter.load(make_cfg(exclude=[{"memo": "("}]))
+
+
+class TestSplitFilterMatch:
+    """Test split matching"""
+
+    def test_string_rule_matches_description(self):
+        """A bare string rule should match on description"""
+        f = SplitFilter([], ["^Closing"])
+        assert not f.match({"description": "Closing entries"})
+        assert f.match({"description": "Sales"})
+
+    def test_rule_fields_all_must_match(self):
+        """A rule should only match if all its fields match"""
+        f = SplitFilter([], [{"description": "Transfer", "number": "^IC"}])
+        assert f.match({"description": "Transfer", "number": "100"})
+        assert not f.match({"description": "Transfer", "number": "IC-1"})
+
+    def test_include_restricts_splits(self):
+        """Only splits matching an include rule should pass"""
+        f = SplitFilter([{"memo": "consulting"}], [])
+        assert f.match({"memo": "consulting fee"})
+        assert not f.match({"memo": "goods"})
+        assert not f.match({"memo": None})
+
+    def test_tags_from_notes_and_memo(self):
+        """Tag rules should match whole #tags in notes or memo"""
+        f = SplitFilter([], [{"tag": "intercompany"}])
+        assert not f.match({"notes": "Recharge #intercompany"})
+        assert not f.match({"memo": "#intercompany", "notes": None})
+        assert f.match({"notes": "#intercompany-loan"})
+        assert f.match({"description": "Sale"})
+
+
+class TestSplitFilterApply:
+    """Test filtering split lists"""
+
+    def test_apply_filters_list(self):
+        """apply should return only matching splits"""
+        f = SplitFilter([], [{"description": "closing"}])
+        splits = [
+            {"description": "Sale", "amount": 1.0},
+            {"description": "closing", "amount": 2.0}
+        ]
+        assert f.apply(splits) == [splits[0]]
+
+    def test_apply_evaluates_list_once(self):
+        """The same backend split list should only be evaluated once"""
+        f = SplitFilter([], [{"description": "closing"}])
+        f.match = Mock(return_value=True)
+        splits = Splits([{"description": "Sale"}])
+
+        first = f.apply(splits)
+        second = f.apply(splits)
+
+        assert first is second
+        assert f.match.call_count == 1
+
+    def test_apply_shares_results_between_same_rules(self):
+        """Filters with the same rules should share results"""
+        a = SplitFilter([], [{"description": "closing"}])
+        b = SplitFilter([], [{"description": "closing"}])
+        splits = Splits([{"description": "Sale"}])
+
+        assert a.apply(splits) is b.apply(splits)
+
+    def test_apply_plain_list_not_remembered(self):
+        """Lists which aren't from a backend should be filtered each time"""
+        f = SplitFilter([], [{"description": "closing"}])
+        splits = [{"description": "Sale"}]
+
+        assert f.apply(splits) == splits
+        assert f.apply(splits) is not f.apply(splits)
+
+
+class TestSplitCache:
+    """Test the backends' record of split lists"""
+
+    def test_get_returns_stored_list(self):
+        """A stored list should be returned for its key"""
+        cache = SplitCache()
+        splits = Splits()
+        cache.put("a", splits)
+        assert cache.get("a") is splits
+        assert cache.get("b") is None
+
+    def test_least_recently_used_dropped(self):
+        """The cache should drop the least recently used list when full"""
+        cache = SplitCache(size=2)
+        cache.put("a", Splits())
+        cache.put("b", Splits())
+        cache.get("a")
+        cache.put("c", Splits())
+
+        assert len(cache) == 2
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
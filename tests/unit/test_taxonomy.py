@@ -4,15 +4,21 @@ Simplified unit tests for taxonomy module
 Testing core functionality without complex initialization dependencies.
 """
 import pytest
+import yaml
 from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+import time
+from lxml import etree
 
-from ixbrl_reporter.taxonomy import Taxonomy, NamedDimension, TypedDimension
+from ixbrl_reporter.taxonomy import (
+    Taxonomy, TaxonomyModel, NamedDimension, TypedDimension
+)
 from ixbrl_reporter.datum import StringDatum, DateDatum, MoneyDatum, BoolDatum, CountDatum, NumberDatum, VariableDatum
 from ixbrl_reporter.fact import StringFact, DateFact, MoneyFact, BoolFact, CountFact, NumberFact
 from ixbrl_reporter.period import Period
 from ixbrl_reporter.context import Context
-from ixbrl_reporter.config import NoneValue
+from ixbrl_reporter.config import Config, NoneValue
 
 
 class TestNamedDimension:
@@ -50,7 +56,7 @@ class TestTypedDimension:
         mock_typed_member = Mock()
         mock_base.xbrldi_maker.typedMember.return_value = mock_typed_member
         
-        with patch('ixbrl_reporter.taxonomy.objectify.ElementMaker') as mock_element_maker:
+        with patch('ixbrl_reporter.taxonomy.ElementMaker') as mock_element_maker:
             mock_maker = Mock()
             mock_element_maker.return_value = mock_maker
             mock_element = Mock()
@@ -59,8 +65,7 @@ class TestTypedDimension:
             result = dim.describe(mock_base)
             
             mock_element_maker.assert_called_once_with(
-                annotate=False,
-                namespace="http://example.com/namespace"
+                "http://example.com/namespace", "ns"
             )
             mock_maker.assert_called_once_with("element", "test-value")
             mock_typed_member.set.assert_called_once_with("dimension", "test-dimension")
@@ -286,6 +291,44 @@ class TestTaxonomyBasic:
             mock_observe.assert_called_once_with(mock_fact)
             assert result == mock_fact
     
+    def test_get_tag_looked_up_once(self):
+        """Test tag configuration is only looked up once per id"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [[], []]
+        mock_data = Mock()
+        mock_data.get_config.side_effect = [2, 0, "EUR"]
+
+        taxonomy = Taxonomy(mock_cfg, mock_data)
+
+        with patch.object(taxonomy, 'get_tag_name', return_value="tag") as mock_get_tag, \
+             patch.object(taxonomy, 'get_sign_reversed', return_value=True), \
+             patch.object(taxonomy, 'get_tag_dimensions', return_value=None):
+
+            first = taxonomy.get_tag("test-id")
+            second = taxonomy.get_tag("test-id")
+
+            assert first is second
+            assert first.name == "tag"
+            assert first.reversed == True
+            mock_get_tag.assert_called_once_with("test-id")
+
+    def test_create_fact_dispatches_subclass(self):
+        """Test datum subclasses use their base type's fact creation"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [[], []]
+        mock_data = Mock()
+        mock_data.get_config.side_effect = [2, 0, "EUR"]
+
+        taxonomy = Taxonomy(mock_cfg, mock_data)
+
+        class SpecialMoneyDatum(MoneyDatum):
+            pass
+
+        with patch.object(taxonomy, 'create_money_fact') as mock_create:
+            datum = SpecialMoneyDatum("test-id", 1.0, Mock())
+            taxonomy.create_fact(datum)
+            mock_create.assert_called_once_with(datum)
+
     def test_get_metadata_by_id_existing(self):
         """Test getting existing metadata by ID"""
         mock_cfg = Mock()
@@ -313,7 +356,28 @@ class TestTaxonomyBasic:
         result = taxonomy.get_metadata_by_id("nonexistent")
         
         assert isinstance(result, NoneValue)
-    
+
+    def test_get_metadata_by_id_lazy(self):
+        """Test metadata facts are only made when first asked for"""
+        defn = Mock()
+        defn.get.return_value = "company-name"
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [[], [defn]]
+        mock_data = Mock()
+        mock_data.get_config.side_effect = [2, 0, "EUR"]
+
+        with patch.object(Taxonomy, 'load_metadata') as mock_load:
+            taxonomy = Taxonomy(mock_cfg, mock_data)
+            assert mock_load.call_count == 0
+
+            fact = taxonomy.get_metadata_by_id("company-name")
+            assert taxonomy.get_metadata_by_id("company-name") is fact
+
+            mock_load.assert_called_once_with(
+                mock_data, defn, taxonomy.contexts
+            )
+            assert fact is mock_load.return_value
+
     def test_get_context_existing(self):
         """Test getting existing context"""
         mock_cfg = Mock()
@@ -350,10 +414,10 @@ class TestTaxonomyBasic:
         
         taxonomy = Taxonomy(mock_cfg, mock_data)
         
-        # Set up mock to fail for typed dimension, then succeed for named
+        # Set up mock to have no typed dimension, then succeed for named
         def mock_cfg_get_side_effect(key, mandatory=True):
             if "typed-dimension" in key:
-                raise Exception("Not found")
+                return None
             elif "dimension" in key:
                 return "named-dim"
             elif "map" in key:
@@ -369,6 +433,148 @@ class TestTaxonomyBasic:
         assert result.value == "mapped-value"
 
 
+    def test_lookup_dimension_cached(self):
+        """Test dimensions are only looked up once per segment value"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [[], []]  # init calls
+        mock_data = Mock()
+        mock_data.get_config.side_effect = [2, 0, "EUR"]
+
+        taxonomy = Taxonomy(mock_cfg, mock_data)
+
+        mock_cfg.get.side_effect = lambda key, mandatory=True: {
+            "segment.officer.typed-dimension": None,
+            "segment.officer.dimension": "dim",
+            "segment.officer.map.director1": "member1",
+            "segment.officer.map.director2": "member2",
+        }[key]
+
+        a = taxonomy.lookup_dimension("officer", "director1")
+        b = taxonomy.lookup_dimension("officer", "director2")
+
+        assert taxonomy.lookup_dimension("officer", "director1") is a
+        assert (a.value, b.value) == ("member1", "member2")
+        assert mock_cfg.get.call_count == 1 + 4
+
+    def test_lookup_typed_dimension_shares_makers(self):
+        """Test typed dimensions with one definition share element makers"""
+        mock_cfg = Mock()
+        mock_cfg.get.side_effect = [[], []]  # init calls
+        mock_data = Mock()
+        mock_data.get_config.side_effect = [2, 0, "EUR"]
+
+        taxonomy = Taxonomy(mock_cfg, mock_data)
+
+        mock_cfg.get.side_effect = lambda key, mandatory=True: {
+            "segment.officer.typed-dimension": "typed-dim",
+            "segment.officer.content": {"tag": "ns:officer"},
+        }[key]
+
+        a = taxonomy.lookup_dimension("officer", "director1")
+        b = taxonomy.lookup_dimension("officer", "director2")
+
+        assert isinstance(a, TypedDimension)
+        assert a.dim == "typed-dim"
+        assert a.value == "director1"
+        assert a.makers is b.makers
+
+class TestTaxonomyModel:
+    """Test sharing a taxonomy model between documents"""
+
+    def make_cfg(self):
+        cfg = Mock()
+        cfg.get.side_effect = lambda key, deflt=None, mandatory=True: {
+            "contexts": [],
+            "metadata": [],
+            "tags.turnover": "uk-core:Turnover",
+            "segments.turnover": None,
+        }[key]
+        cfg.get_bool.return_value = False
+        return cfg
+
+    def make_data(self):
+        data = Mock()
+        data.get_config.side_effect = lambda key, deflt=None: deflt
+        return data
+
+    def test_taxonomy_creates_own_model(self):
+        """Test a Taxonomy without a model gets one of its own"""
+        cfg = self.make_cfg()
+        a = Taxonomy(cfg, self.make_data())
+        b = Taxonomy(cfg, self.make_data())
+
+        assert isinstance(a.model, TaxonomyModel)
+        assert a.model.cfg is cfg
+        assert a.model is not b.model
+
+    def test_document_uses_model(self):
+        """Test documents made from a model share it"""
+        model = TaxonomyModel(self.make_cfg())
+        a = model.document(self.make_data())
+        b = model.document(self.make_data())
+
+        assert a is not b
+        assert a.model is model and b.model is model
+        assert a.cfg is model.cfg
+
+    def test_documents_share_tags(self):
+        """Test tagging is only looked up once across documents"""
+        cfg = self.make_cfg()
+        model = TaxonomyModel(cfg)
+        a = model.document(self.make_data())
+        b = model.document(self.make_data())
+
+        assert a.get_tag("turnover") is b.get_tag("turnover")
+        assert a.get_tag("turnover").name == "uk-core:Turnover"
+        assert cfg.get_bool.call_count == 1
+
+    def test_documents_share_context_descriptions(self):
+        """Test a context is described once across documents"""
+        model = TaxonomyModel(self.make_cfg())
+        a = model.document(self.make_data())
+        b = model.document(self.make_data())
+        ctxt = a.root_context.with_entity("scheme", "12345678")
+        make = Mock(side_effect=lambda: etree.Element("context"))
+
+        elt = a.get_context_elt(ctxt, "ctxt-0", make)
+
+        assert b.get_context_elt(ctxt, "ctxt-0", make) is elt
+        assert b.get_context_elt(ctxt, "ctxt-1", make) is not elt
+        assert make.call_count == 2
+
+    def test_concurrent_first_lookups_agree(self):
+        """Test documents on several threads get the same tagging"""
+        cfg = self.make_cfg()
+        model = TaxonomyModel(cfg)
+
+        # Slow the first look-up down, so that threads overlap.
+        def get_bool(key, deflt):
+            time.sleep(0.05)
+            return False
+        cfg.get_bool.side_effect = get_bool
+
+        docs = [model.document(self.make_data()) for i in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            tags = list(ex.map(lambda d: d.get_tag("turnover"), docs))
+
+        assert all(tag is tags[0] for tag in tags)
+        assert cfg.get_bool.call_count == 1
+
+    def test_documents_have_own_contexts(self):
+        """Test context ids and usage are per document"""
+        model = TaxonomyModel(self.make_cfg())
+        a = model.document(self.make_data())
+        b = model.document(self.make_data())
+
+        ctxt = a.root_context.with_entity("scheme", "12345678")
+        fact = a.create_fact(MoneyDatum("turnover", 10.0, ctxt))
+
+        assert fact.context == "ctxt-0"
+        assert a.contexts_used == {"ctxt-0"}
+        assert b.contexts_used == set()
+        assert b.next_context_id == 0
+        assert ctxt not in b.contexts
+
 class TestTaxonomyFactCreation:
     """Test fact creation methods"""
     
@@ -504,4 +710,79 @@ class TestTaxonomyFactCreation:
             
             mock_number_fact.assert_called_once_with("ctx-1", "number-tag", 3.14)
             mock_observe.assert_called_once_with(mock_fact)
-            assert result == mock_fact
\ No newline at end of file
+            assert result == mock_fact
+
+
+TAXONOMY = """
+contexts:
+- id: business
+  entity: metadata.business.company-number
+  scheme: metadata.business.entity-scheme
+- id: report-period
+  from: business
+  period: metadata.accounting.periods.0
+metadata:
+- id: company-name
+  context: business
+  config: metadata.business.company-name
+document-metadata:
+- company-name
+namespaces:
+  uk-bus: http://xbrl.frc.org.uk/cd/2023-01-01/business
+schema:
+- https://xbrl.frc.org.uk/FRS-102/2023-01-01/FRS-102-2023-01-01.xsd
+tags:
+  company-name: uk-bus:EntityCurrentLegalOrRegisteredName
+segment:
+  officer:
+    typed-dimension: uk-bus:NameEntityOfficersTypedDimension
+    content:
+      tag: uk-bus:NameEntityOfficerTypedMember
+"""
+
+
+class TestTaxonomyCompile:
+    """Test taxonomy validation and compilation"""
+
+    def test_validate_good_taxonomy(self):
+        """A good taxonomy should validate"""
+        Taxonomy.validate(Config.makevalue(yaml.safe_load(TAXONOMY)))
+
+    def test_validate_reports_problems(self):
+        """Problems should all be reported together"""
+        tx = yaml.safe_load(TAXONOMY)
+        tx["contexts"][1]["from"] = "nowhere"
+        tx["tags"]["turnover"] = "uk-core:Turnover"
+        tx["segment"]["sector"] = {"dimension": "uk-bus:Sector"}
+        del tx["schema"]
+
+        with pytest.raises(RuntimeError) as exc_info:
+            Taxonomy.validate(Config.makevalue(tx))
+
+        msg = str(exc_info.value)
+        assert "no 'schema' section" in msg
+        assert "context 'report-period' is from unknown context 'nowhere'" in msg
+        assert "tags 'turnover' has tag 'uk-core:Turnover' without a namespace" in msg
+        assert "segment 'sector' needs a dimension and map" in msg
+
+    def test_compile_writes_artifact(self, tmp_path):
+        """A compiled taxonomy should load as the same configuration"""
+        src = tmp_path / "tx.yaml"
+        src.write_text(TAXONOMY)
+        out = str(tmp_path / "tx.ixtx")
+
+        Taxonomy.compile(str(src), out)
+
+        assert Config.read_artifact(out, "taxonomy") == \
+            yaml.safe_load(TAXONOMY)
+
+    def test_compile_invalid_taxonomy(self, tmp_path):
+        """An invalid taxonomy should not be compiled"""
+        src = tmp_path / "tx.yaml"
+        src.write_text("contexts: []\n")
+        out = tmp_path / "tx.ixtx"
+
+        with pytest.raises(RuntimeError, match="Taxonomy is not valid"):
+            Taxonomy.compile(str(src), str(out))
+
+        assert not out.exists()